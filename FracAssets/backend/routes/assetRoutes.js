@@ -6,9 +6,20 @@ const router = express.Router();
 const HEDERA_API = process.env.HEDERA_API_URL || "http://localhost:8000";
 
 // GET /api/assets — fetch real marketplace listings from MongoDB via Python API
+// Paging/filter params (limit, cursor, category, token_type, min_available, fields)
+// are passed through; the next-page cursor comes back in X-Next-Cursor.
+// ETag / If-None-Match are relayed so unchanged pages come back as 304.
 router.get("/assets", verifyToken, async (req, res) => {
   try {
-    const r = await fetch(`${HEDERA_API}/marketplace`);
+    const qs = new URLSearchParams(req.query).toString();
+    const headers = {};
+    if (req.get("If-None-Match")) headers["If-None-Match"] = req.get("If-None-Match");
+    const r = await fetch(`${HEDERA_API}/marketplace${qs ? `?${qs}` : ""}`, { headers });
+    const nextCursor = r.headers.get("x-next-cursor");
+    const etag = r.headers.get("etag");
+    if (nextCursor) res.set("X-Next-Cursor", nextCursor);
+    if (etag) res.set({ ETag: etag, "Cache-Control": "no-cache" });
+    if (r.status === 304) return res.status(304).end();
     const data = await r.json();
     res.json(data);
   } catch (err) {
@@ -16,4 +27,28 @@ router.get("/assets", verifyToken, async (req, res) => {
   }
 });
 
+// GET /api/assets/search?q= — relevance-ranked listings (name, symbol, description, category)
+router.get("/assets/search", verifyToken, async (req, res) => {
+  try {
+    const qs = new URLSearchParams(req.query).toString();
+    const r = await fetch(`${HEDERA_API}/marketplace/search?${qs}`);
+    const data = await r.json();
+    res.status(r.status).json(data);
+  } catch (err) {
+    res.status(500).json({ message: err.message });
+  }
+});
+
+// GET /api/assets/autocomplete?q= — name/symbol completions while typing
+router.get("/assets/autocomplete", verifyToken, async (req, res) => {
+  try {
+    const qs = new URLSearchParams(req.query).toString();
+    const r = await fetch(`${HEDERA_API}/marketplace/autocomplete?${qs}`);
+    const data = await r.json();
+    res.status(r.status).json(data);
+  } catch (err) {
+    res.status(500).json({ message: err.message });
+  }
+});
+
 module.exports = router;
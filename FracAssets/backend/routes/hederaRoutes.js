@@ -6,60 +6,142 @@ const verifyToken = require("../middleware/authMiddleware");
 const HEDERA_API = process.env.HEDERA_API_URL || "http://localhost:8000";
 
 // Helper: forward JSON POST to Python Hedera API
-const forwardToHedera = async (path, body) => {
+// X-User-Sub keys the per-user rate limit; a 429 keeps its Retry-After.
+const forwardToHedera = async (path, body, req) => {
     const res = await fetch(`${HEDERA_API}${path}`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: { "Content-Type": "application/json", "X-User-Sub": req.user?.sub || "" },
         body: JSON.stringify(body),
     });
     const data = await res.json();
     if (!res.ok) {
-        const err = new Error(data.detail || data.message || "Hedera API error");
+        const detail = typeof data.detail === "object" ? data.detail.message : data.detail;
+        const err = new Error(detail || data.message || "Hedera API error");
         err.status = res.status;
+        err.retryAfter = res.headers.get("retry-after");
         throw err;
     }
     return data;
 };
 
+// ?wait=false: Python answers 202 with the transaction id once it passes
+// precheck; progress is then followed on /submissions/.../events.
+const waitQuery = (req) => (req.query.wait === "false" ? "?wait=false" : "");
+const submitStatus = (req) => (req.query.wait === "false" ? 202 : 200);
+
+const sendError = (res, err) => {
+    if (err.retryAfter) res.set("Retry-After", err.retryAfter);
+    res.status(err.status || 500).json({ message: err.message });
+};
+
 // ── POST /api/hedera/create-token ─────────────────────────────────────────
 // Injects auth0_id from JWT so Python can store the asset creator
 router.post("/create-token", verifyToken, async (req, res) => {
     try {
         const auth0_id = req.user?.sub || null;
-        const result = await forwardToHedera("/create-token", { ...req.body, auth0_id });
-        res.json(result);
+        const result = await forwardToHedera(`/create-token${waitQuery(req)}`, { ...req.body, auth0_id }, req);
+        res.status(submitStatus(req)).json(result);
     } catch (err) {
-        res.status(err.status || 500).json({ message: err.message });
+        sendError(res, err);
     }
 });
 
 // ── POST /api/hedera/mint-token ───────────────────────────────────────────
 router.post("/mint-token", verifyToken, async (req, res) => {
     try {
-        const result = await forwardToHedera("/mint-token", req.body);
-        res.json(result);
+        const result = await forwardToHedera(`/mint-token${waitQuery(req)}`, req.body, req);
+        res.status(submitStatus(req)).json(result);
     } catch (err) {
-        res.status(err.status || 500).json({ message: err.message });
+        sendError(res, err);
     }
 });
 
 // ── POST /api/hedera/transfer-token ──────────────────────────────────────
 router.post("/transfer-token", verifyToken, async (req, res) => {
     try {
-        const result = await forwardToHedera("/transfer-token", req.body);
+        const result = await forwardToHedera(`/transfer-token${waitQuery(req)}`, req.body, req);
+        res.status(submitStatus(req)).json(result);
+    } catch (err) {
+        sendError(res, err);
+    }
+});
+
+// ── POST /api/hedera/transfer-token/batch ────────────────────────────────
+// Body: { transfers: [{ token_id, recipient_id, amount }, ...] }
+router.post("/transfer-token/batch", verifyToken, async (req, res) => {
+    try {
+        const result = await forwardToHedera("/transfer-token/batch", req.body, req);
         res.json(result);
     } catch (err) {
-        res.status(err.status || 500).json({ message: err.message });
+        sendError(res, err);
+    }
+});
+
+// ── POST /api/hedera/mint-nft/bulk?token_id=&admin_key=[&run_id=] ─────────
+// NDJSON or CSV body, one NFT per row; streamed through to Python unparsed
+router.post("/mint-nft/bulk", verifyToken, async (req, res) => {
+    try {
+        const qs = new URLSearchParams(req.query).toString();
+        const fetchRes = await fetch(`${HEDERA_API}/mint-nft/bulk?${qs}`, {
+            method: "POST",
+            headers: { "Content-Type": req.headers["content-type"] || "", "X-User-Sub": req.user?.sub || "" },
+            body: req,
+            duplex: "half",
+        });
+        const retryAfter = fetchRes.headers.get("retry-after");
+        if (retryAfter) res.set("Retry-After", retryAfter);
+        res.status(fetchRes.status).json(await fetchRes.json());
+    } catch (err) {
+        res.status(500).json({ message: err.message });
+    }
+});
+
+// ── GET /api/hedera/mint-nft/bulk/:runId ──────────────────────────────────
+router.get("/mint-nft/bulk/:runId", verifyToken, async (req, res) => {
+    try {
+        const fetchRes = await fetch(`${HEDERA_API}/mint-nft/bulk/${encodeURIComponent(req.params.runId)}`);
+        res.status(fetchRes.status).json(await fetchRes.json());
+    } catch (err) {
+        res.status(500).json({ message: err.message });
+    }
+});
+
+// ── POST /api/hedera/create-token/import[?import_id=] ─────────────────────
+// NDJSON or CSV catalog, one asset per row; every row is owned by the uploader
+router.post("/create-token/import", verifyToken, async (req, res) => {
+    try {
+        const qs = new URLSearchParams({ ...req.query, auth0_id: req.user?.sub || "" }).toString();
+        const fetchRes = await fetch(`${HEDERA_API}/create-token/import?${qs}`, {
+            method: "POST",
+            headers: { "Content-Type": req.headers["content-type"] || "", "X-User-Sub": req.user?.sub || "" },
+            body: req,
+            duplex: "half",
+        });
+        const retryAfter = fetchRes.headers.get("retry-after");
+        if (retryAfter) res.set("Retry-After", retryAfter);
+        res.status(fetchRes.status).json(await fetchRes.json());
+    } catch (err) {
+        res.status(500).json({ message: err.message });
+    }
+});
+
+// ── GET /api/hedera/create-token/import/:importId ─────────────────────────
+router.get("/create-token/import/:importId", verifyToken, async (req, res) => {
+    try {
+        const fetchRes = await fetch(`${HEDERA_API}/create-token/import/${encodeURIComponent(req.params.importId)}`);
+        res.status(fetchRes.status).json(await fetchRes.json());
+    } catch (err) {
+        res.status(500).json({ message: err.message });
     }
 });
 
 // ── POST /api/hedera/create-account ──────────────────────────────────────
 router.post("/create-account", verifyToken, async (req, res) => {
     try {
-        const result = await forwardToHedera("/create-account", req.body);
+        const result = await forwardToHedera("/create-account", req.body, req);
         res.json(result);
     } catch (err) {
-        res.status(err.status || 500).json({ message: err.message });
+        sendError(res, err);
     }
 });
 
@@ -75,16 +157,75 @@ router.get("/balance", verifyToken, async (req, res) => {
     }
 });
 
+// ── GET /api/hedera/balances?account_ids=0.0.1,0.0.2 ─────────────────────
+router.get("/balances", verifyToken, async (req, res) => {
+    try {
+        const { account_ids } = req.query;
+        const fetchRes = await fetch(`${HEDERA_API}/balances?account_ids=${encodeURIComponent(account_ids || "")}`);
+        const data = await fetchRes.json();
+        res.status(fetchRes.status).json(data);
+    } catch (err) {
+        res.status(500).json({ message: err.message });
+    }
+});
+
 // ── GET /api/hedera/transactions/:accountId ───────────────────────────────
+// Python streams NDJSON (one transaction per line); pipe it through unbuffered
 router.get("/transactions/:accountId", verifyToken, async (req, res) => {
     try {
         const { accountId } = req.params;
-        const fetchRes = await fetch(`${HEDERA_API}/transactions/${accountId}`);
-        const data = await fetchRes.json();
-        res.json(data);
+        const qs = new URLSearchParams(req.query).toString();
+        const fetchRes = await fetch(`${HEDERA_API}/transactions/${accountId}${qs ? `?${qs}` : ""}`);
+        res.status(fetchRes.status);
+        res.type(fetchRes.headers.get("content-type") || "application/x-ndjson");
+        fetchRes.body.pipe(res);
     } catch (err) {
         res.status(500).json({ message: err.message });
     }
 });
 
+// ── GET /api/hedera/submissions/events ────────────────────────────────────
+// Server-Sent Events for every transaction the caller has open
+router.get("/submissions/events", verifyToken, async (req, res) => {
+    try {
+        const auth0_id = encodeURIComponent(req.user?.sub || "");
+        const fetchRes = await fetch(`${HEDERA_API}/submissions/events?auth0_id=${auth0_id}`);
+        pipeEvents(fetchRes, req, res);
+    } catch (err) {
+        res.status(500).json({ message: err.message });
+    }
+});
+
+// ── GET /api/hedera/submissions/:txId(/events) ────────────────────────────
+router.get("/submissions/:txId", verifyToken, async (req, res) => {
+    try {
+        const fetchRes = await fetch(`${HEDERA_API}/submissions/${encodeURIComponent(req.params.txId)}`);
+        res.status(fetchRes.status).json(await fetchRes.json());
+    } catch (err) {
+        res.status(500).json({ message: err.message });
+    }
+});
+
+router.get("/submissions/:txId/events", verifyToken, async (req, res) => {
+    try {
+        const fetchRes = await fetch(`${HEDERA_API}/submissions/${encodeURIComponent(req.params.txId)}/events`);
+        pipeEvents(fetchRes, req, res);
+    } catch (err) {
+        res.status(500).json({ message: err.message });
+    }
+});
+
+// Relays an event stream unbuffered and drops the upstream when the browser leaves
+function pipeEvents(fetchRes, req, res) {
+    res.status(fetchRes.status);
+    res.set({
+        "Content-Type": fetchRes.headers.get("content-type") || "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    });
+    res.flushHeaders();
+    fetchRes.body.pipe(res);
+    req.on("close", () => fetchRes.body.destroy());
+}
+
 module.exports = router;
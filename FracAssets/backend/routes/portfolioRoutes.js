@@ -19,6 +19,34 @@ router.get("/portfolio", verifyToken, async (req, res) => {
   }
 });
 
+// GET /api/portfolio/summary — one aggregated row per held token
+router.get("/portfolio/summary", verifyToken, async (req, res) => {
+  try {
+    const auth0_id = req.user?.sub;
+    if (!auth0_id) return res.status(401).json({ message: "No user identity" });
+
+    const r = await fetch(`${HEDERA_API}/portfolio/summary?auth0_id=${encodeURIComponent(auth0_id)}`);
+    const data = await r.json();
+    res.json(data);
+  } catch (err) {
+    res.status(500).json({ message: err.message });
+  }
+});
+
+// GET /api/portfolio/valuation — cost basis, market value and P&L computed server-side
+router.get("/portfolio/valuation", verifyToken, async (req, res) => {
+  try {
+    const auth0_id = req.user?.sub;
+    if (!auth0_id) return res.status(401).json({ message: "No user identity" });
+
+    const r = await fetch(`${HEDERA_API}/portfolio/valuation?auth0_id=${encodeURIComponent(auth0_id)}`);
+    const data = await r.json();
+    res.json(data);
+  } catch (err) {
+    res.status(500).json({ message: err.message });
+  }
+});
+
 // POST /api/invest — record an investment in MongoDB
 router.post("/invest", verifyToken, async (req, res) => {
   try {
@@ -39,4 +67,25 @@ router.post("/invest", verifyToken, async (req, res) => {
   }
 });
 
+// POST /api/invest/bulk — record many investments atomically
+// Body: { investments: [{ token_id, asset_name, symbol, amount, price_per_unit, tx_id }, ...] }
+router.post("/invest/bulk", verifyToken, async (req, res) => {
+  try {
+    const auth0_id = req.user?.sub;
+    if (!auth0_id) return res.status(401).json({ message: "No user identity" });
+
+    const investments = (req.body.investments || []).map((inv) => ({ ...inv, auth0_id }));
+    const r = await fetch(`${HEDERA_API}/portfolio/invest/bulk`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ investments }),
+    });
+    const data = await r.json();
+    if (!r.ok) return res.status(r.status).json(data);
+    res.json(data);
+  } catch (err) {
+    res.status(500).json({ message: err.message });
+  }
+});
+
 module.exports = router;
@@ -12,7 +12,7 @@ const app = express();
 const PORT = process.env.PORT || 5000;
 
 // ── Middleware ────────────────────────────────────────────────────────────
-app.use(cors());
+app.use(cors({ exposedHeaders: ["X-Next-Cursor", "ETag"] })); // readable by the SPA for paging
 app.use(bodyParser.json());
 
 // ── Routes ────────────────────────────────────────────────────────────────
@@ -1,5 +1,5 @@
 import React, { createContext, useContext, useState } from "react";
-import { getAssets, getPortfolio, investInAsset } from "../services/api";
+import { getAssets, getPortfolio, getPortfolioSummary, investInAsset } from "../services/api";
 import { useAuth } from "./AuthContext";
 
 const InvestmentContext = createContext();
@@ -8,7 +8,10 @@ export const InvestmentProvider = ({ children }) => {
   const { token } = useAuth();
 
   const [assets, setAssets] = useState([]);
-  const [portfolio, setPortfolio] = useState([]);
+  const [assetsCursor, setAssetsCursor] = useState(null); // next marketplace page; null on the last one
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [portfolio, setPortfolio] = useState([]); // every investment, newest last
+  const [holdings, setHoldings] = useState([]);   // one row per held token (/portfolio/summary)
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
 
@@ -19,8 +22,9 @@ export const InvestmentProvider = ({ children }) => {
       setLoading(true);
       setError(null);
 
-      const data = await getAssets(token);
-      setAssets(data);
+      const { items, nextCursor } = await getAssets(token);
+      setAssets(items);
+      setAssetsCursor(nextCursor);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -28,6 +32,23 @@ export const InvestmentProvider = ({ children }) => {
     }
   };
 
+  const loadMoreAssets = async () => {
+    if (!token || !assetsCursor || loadingMore) return;
+
+    try {
+      setLoadingMore(true);
+      setError(null);
+
+      const { items, nextCursor } = await getAssets(token, { cursor: assetsCursor });
+      setAssets((prev) => [...prev, ...items]);
+      setAssetsCursor(nextCursor);
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchPortfolio = async () => {
     if (!token) return;
 
@@ -35,8 +56,12 @@ export const InvestmentProvider = ({ children }) => {
       setLoading(true);
       setError(null);
 
-      const data = await getPortfolio(token);
+      const [data, summary] = await Promise.all([
+        getPortfolio(token),
+        getPortfolioSummary(token),
+      ]);
       setPortfolio(data);
+      setHoldings(summary.holdings ?? []);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -64,10 +89,14 @@ export const InvestmentProvider = ({ children }) => {
     <InvestmentContext.Provider
       value={{
         assets,
+        hasMoreAssets: Boolean(assetsCursor),
+        loadingMore,
         portfolio,
+        holdings,
         loading,
         error,
         fetchAssets,
+        loadMoreAssets,
         fetchPortfolio,
         invest,
       }}
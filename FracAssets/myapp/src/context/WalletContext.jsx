@@ -8,7 +8,7 @@ import {
   isNoAccountError,
   createHederaAccountViaBackend,
 } from "../services/hederaService";
-import { syncUser } from "../services/api";
+import { syncUser, waitForSyncJob } from "../services/api";
 import { useAuth0 } from "@auth0/auth0-react";
 
 const WalletContext = createContext();
@@ -104,6 +104,11 @@ export const WalletProvider = ({ children }) => {
             });
 
             accountId = synced.hedera_account_id;
+            if (!accountId && synced.job_id) {
+              status("Waiting for Hedera account creation...");
+              const job = await waitForSyncJob(token, synced.job_id);
+              accountId = job.hedera_account_id;
+            }
 
             if (!accountId) {
               throw new Error("Account created but ID not returned.");
@@ -4,7 +4,7 @@ import { FaSearch } from "react-icons/fa";
 import { useInvestment } from "../context/InvestmentProvider";
 
 const Assets = () => {
-  const { assets = [], loading, error, fetchAssets, invest } = useInvestment();
+  const { assets = [], hasMoreAssets, loadingMore, loading, error, fetchAssets, loadMoreAssets, invest } = useInvestment();
 
   const [searchTerm, setSearchTerm] = useState("");
   const [selectedAsset, setSelectedAsset] = useState(null);
@@ -113,6 +113,18 @@ const Assets = () => {
         ))}
       </div>
 
+      {hasMoreAssets && (
+        <div className="flex justify-center mt-8">
+          <button
+            onClick={loadMoreAssets}
+            disabled={loadingMore}
+            className="px-5 py-2.5 border border-gray-700 rounded-xl text-sm hover:border-indigo-500 transition disabled:opacity-50"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
+
       {/* Modal */}
       {selectedAsset && (
         <div className="fixed inset-0 bg-black/70 backdrop-blur-sm flex items-end sm:items-center justify-center z-50">
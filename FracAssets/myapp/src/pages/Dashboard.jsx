@@ -9,7 +9,7 @@ import {
 } from "react-icons/fa";
 import { Link } from "react-router-dom";
 import { useAuth } from "../context/AuthContext";
-import { getPortfolio } from "../services/api";
+import { getPortfolioSummary, getPortfolioValuation } from "../services/api";
 
 const Dashboard = () => {
   const { token } = useAuth();
@@ -20,7 +20,8 @@ const Dashboard = () => {
   const [overview, setOverview] = useState({
     totalInvested: "$0",
     portfolioValue: "$0",
-    profitLoss: "Profit",
+    profitLoss: "",
+    inProfit: true,
     activeAssets: 0,
     walletStatus: "Connected",
   });
@@ -32,32 +33,33 @@ const Dashboard = () => {
       try {
         setLoading(true);
 
-        const data = await getPortfolio(token);
-
-        let totalInvested = 0;
-
-        data.forEach((item) => {
-          // total_cost is amount * price_per_unit, stored in MongoDB
-          totalInvested += Number(item.total_cost ?? 0);
-        });
+        // Cost basis, market value and P&L are computed by the Python service;
+        // activity is one row per held token rather than the whole ledger
+        const [summary, valuation] = await Promise.all([
+          getPortfolioSummary(token),
+          getPortfolioValuation(token),
+        ]);
 
         setOverview({
-          totalInvested: `$${totalInvested.toFixed(2)}`,
-          portfolioValue: `$${totalInvested.toFixed(2)}`, // no live price feed yet
-          profitLoss: "—",
-          activeAssets: data.length,
+          totalInvested: `$${Number(valuation.cost_basis ?? 0).toFixed(2)}`,
+          portfolioValue: `$${Number(valuation.market_value ?? 0).toFixed(2)}`,
+          profitLoss: formatPnl(valuation.unrealized_pnl, valuation.pnl_pct),
+          inProfit: (valuation.unrealized_pnl ?? 0) >= 0,
+          activeAssets: valuation.holdings?.length ?? 0,
           walletStatus: "Connected",
         });
 
-        const formattedTransactions = data.map((item, index) => ({
-          _id: index,
-          assetName: item.asset_name,
-          fractions: item.amount,
-          date: item.created_at || new Date().toISOString(),
-          amount: Number(item.total_cost ?? 0).toFixed(2),
-          status: item.status,
-          type: "Buy",
-        }));
+        const formattedTransactions = [...(summary.holdings ?? [])]
+          .sort((a, b) => String(b.last_invested_at ?? "").localeCompare(String(a.last_invested_at ?? "")))
+          .map((item) => ({
+            _id: item.token_id,
+            assetName: item.asset_name,
+            fractions: item.amount,
+            date: item.last_invested_at || new Date().toISOString(),
+            amount: Number(item.total_cost ?? 0).toFixed(2),
+            status: `${item.investments} purchase${item.investments === 1 ? "" : "s"}`,
+            type: "Buy",
+          }));
 
         setTransactions(formattedTransactions);
       } catch (err) {
@@ -128,6 +130,7 @@ const Dashboard = () => {
           title="Portfolio Value"
           value={overview.portfolioValue}
           sub={overview.profitLoss}
+          subPositive={overview.inProfit}
         />
         <StatCard
           icon={<FaLayerGroup />}
@@ -189,8 +192,16 @@ const Dashboard = () => {
   );
 };
 
+// Unrealized P&L as "+$12.50 (+4.17%)"
+const formatPnl = (pnl, pct) => {
+  const value = Number(pnl ?? 0);
+  const percent = Number(pct ?? 0);
+  const sign = (n) => (n >= 0 ? "+" : "-");
+  return `${sign(value)}$${Math.abs(value).toFixed(2)} (${sign(percent)}${Math.abs(percent).toFixed(2)}%)`;
+};
+
 // Professional stat card
-const StatCard = ({ icon, title, value, sub }) => (
+const StatCard = ({ icon, title, value, sub, subPositive = true }) => (
   <div className="bg-slate-800 border border-slate-700 rounded-xl p-6 
       hover:border-slate-600 transition">
 
@@ -202,7 +213,7 @@ const StatCard = ({ icon, title, value, sub }) => (
     <p className="text-2xl font-semibold">{value}</p>
 
     {sub && (
-      <p className={`text-sm mt-2 ${sub === "Profit" ? "text-emerald-400" : "text-rose-400"
+      <p className={`text-sm mt-2 ${subPositive ? "text-emerald-400" : "text-rose-400"
         }`}>
         {sub}
       </p>
@@ -3,7 +3,9 @@ import { Link } from "react-router-dom";
 import { FaSearch, FaBuilding, FaPaintBrush, FaOilCan, FaBolt, FaFilter } from "react-icons/fa";
 import { useInvestment } from "../context/InvestmentProvider";
 import { useWallet } from "../context/WalletContext";
+import { useAuth } from "../context/AuthContext";
 import { transferToken, associateToken } from "../services/hederaService";
+import { autocompleteAssets, searchAssets } from "../services/api";
 
 const CATEGORIES = ["All", "Real Estate", "Art", "Commodities", "Infrastructure", "Crypto"];
 
@@ -24,10 +26,13 @@ const CATEGORY_COLORS = {
 };
 
 const Marketplace = () => {
-    const { assets = [], loading, error, fetchAssets, invest } = useInvestment();
+    const { assets = [], hasMoreAssets, loadingMore, loading, error, fetchAssets, loadMoreAssets, invest } = useInvestment();
     const { connected, hederaAccountId } = useWallet();
+    const { token } = useAuth();
 
     const [searchTerm, setSearchTerm] = useState("");
+    const [searchResults, setSearchResults] = useState(null); // ranked by the server; null = not searching
+    const [suggestions, setSuggestions] = useState([]);        // name/symbol completions for the last word
     const [category, setCategory] = useState("All");
     const [selectedAsset, setSelectedAsset] = useState(null);
     const [shares, setShares] = useState("");
@@ -38,13 +43,26 @@ const Marketplace = () => {
         fetchAssets();
     }, []);
 
-    const filtered = assets.filter((a) => {
-        const matchSearch =
-            a.name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-            a.symbol?.toLowerCase().includes(searchTerm.toLowerCase());
-        const matchCat = category === "All" || a.category === category;
-        return matchSearch && matchCat;
-    });
+    // Server-side search (ranked, prefix-aware), debounced while typing
+    useEffect(() => {
+        const q = searchTerm.trim();
+        if (!q || !token) {
+            setSearchResults(null);
+            setSuggestions([]);
+            return;
+        }
+        const timer = setTimeout(() => {
+            searchAssets(token, q, category === "All" ? undefined : category)
+                .then(setSearchResults)
+                .catch(() => setSearchResults(null));
+            autocompleteAssets(token, q)
+                .then(setSuggestions)
+                .catch(() => setSuggestions([]));
+        }, 200);
+        return () => clearTimeout(timer);
+    }, [searchTerm, category, token]);
+
+    const filtered = searchResults ?? assets.filter((a) => category === "All" || a.category === category);
 
     const openModal = (asset) => {
         setSelectedAsset(asset);
@@ -161,8 +179,14 @@ const Marketplace = () => {
                         placeholder="Search assets..."
                         value={searchTerm}
                         onChange={(e) => setSearchTerm(e.target.value)}
+                        list="asset-suggestions"
                         className="w-full bg-gray-900 border border-gray-800 rounded-xl pl-10 pr-4 py-3 text-sm focus:outline-none focus:ring-2 focus:ring-indigo-500"
                     />
+                    <datalist id="asset-suggestions">
+                        {suggestions.map((s) => (
+                            <option key={s.token_id} value={s.name}>{s.symbol}</option>
+                        ))}
+                    </datalist>
                 </div>
 
                 <div className="flex items-center gap-2 flex-wrap">
@@ -250,6 +274,19 @@ const Marketplace = () => {
                 </div>
             )}
 
+            {/* Next page of listings (search results come back whole) */}
+            {searchResults === null && hasMoreAssets && (
+                <div className="flex justify-center mt-8">
+                    <button
+                        onClick={loadMoreAssets}
+                        disabled={loadingMore}
+                        className="px-5 py-2.5 rounded-xl text-sm font-medium border border-white/10 bg-white/5 hover:border-indigo-500/40 transition disabled:opacity-50"
+                    >
+                        {loadingMore ? "Loading..." : "Load more"}
+                    </button>
+                </div>
+            )}
+
             {/* Investment Modal */}
             {selectedAsset && (
                 <div className="fixed inset-0 bg-black/70 backdrop-blur-sm flex items-end sm:items-center justify-center z-50">
@@ -3,7 +3,7 @@ import { Link } from "react-router-dom";
 import { useInvestment } from "../context/InvestmentProvider";
 
 const Portfolio = () => {
-  const { portfolio, loading, error, fetchPortfolio } = useInvestment();
+  const { portfolio, holdings, loading, error, fetchPortfolio } = useInvestment();
 
   useEffect(() => {
     fetchPortfolio();
@@ -45,7 +45,7 @@ const Portfolio = () => {
       {/* Holdings */}
       <div className="bg-white/5 backdrop-blur-xl border border-white/10 rounded-2xl p-6 mb-10">
         <h2 className="text-xl font-semibold mb-6">Holdings</h2>
-        {portfolio.length === 0 ? (
+        {holdings.length === 0 ? (
           <p className="text-gray-400 text-sm">No holdings yet. Start investing to build your portfolio.</p>
         ) : (
           <div className="overflow-x-auto">
@@ -56,28 +56,19 @@ const Portfolio = () => {
                   <th className="py-3 text-left">Symbol</th>
                   <th className="py-3 text-left">Fractions</th>
                   <th className="py-3 text-left">Total Cost</th>
+                  <th className="py-3 text-left">Avg Price</th>
                   <th className="py-3 text-left">Token ID</th>
-                  <th className="py-3 text-left">Status</th>
                 </tr>
               </thead>
               <tbody>
-                {portfolio.map((item, index) => (
-                  <tr key={index} className="border-b border-white/5 hover:bg-white/5 transition">
+                {holdings.map((item) => (
+                  <tr key={item.token_id} className="border-b border-white/5 hover:bg-white/5 transition">
                     <td className="py-4 font-medium">{item.asset_name}</td>
                     <td className="py-4 font-mono text-indigo-300">{item.symbol}</td>
                     <td className="py-4">{item.amount}</td>
                     <td className="py-4">${Number(item.total_cost ?? 0).toFixed(2)}</td>
+                    <td className="py-4">${Number(item.avg_price ?? 0).toFixed(2)}</td>
                     <td className="py-4 font-mono text-xs text-gray-400">{item.token_id || "—"}</td>
-                    <td className="py-4">
-                      <span className={`px-3 py-1 text-xs font-medium rounded-full ${item.status === "confirmed"
-                          ? "bg-green-500/20 text-green-400 border border-green-500/30"
-                          : item.status === "pending"
-                            ? "bg-yellow-500/20 text-yellow-400 border border-yellow-500/30"
-                            : "bg-red-500/20 text-red-400 border border-red-500/30"
-                        }`}>
-                        {item.status}
-                      </span>
-                    </td>
                   </tr>
                 ))}
               </tbody>
@@ -1,6 +1,8 @@
 const BASE_URL = "http://localhost:5000/api";
-const HEDERA_URL = "http://localhost:8000";   // testnet_test.py — token ops
-const ONBOARDING_URL = "http://localhost:8002"; // user_onboarding.py — signups
+// Both default to the standalone services; set both to the same origin when
+// running the co-hosted test_net/server.py.
+const HEDERA_URL = import.meta.env.VITE_HEDERA_URL || "http://localhost:8000";         // testnet_test.py — token ops
+const ONBOARDING_URL = import.meta.env.VITE_ONBOARDING_URL || "http://localhost:8002"; // user_onboarding.py — signups
 
 // ─────────────────────────────────────────────
 // Helper: Build auth headers (token + user sub)
@@ -54,11 +56,56 @@ export const syncUser = async (token, userData) => {
   return handleResponse(res);
 };
 
+// New wallets are onboarded by a background job: /sync-user answers 202 with
+// a job_id, and the account id shows up on the status endpoint when done.
+export const getSyncStatus = async (token, jobId) => {
+  const res = await fetch(`${ONBOARDING_URL}/sync-user/status/${jobId}`, {
+    headers: authHeaders(token),
+  });
+  return handleResponse(res);
+};
+
+export const waitForSyncJob = async (token, jobId, { timeoutMs = 90000 } = {}) => {
+  const deadline = Date.now() + timeoutMs;
+  let delay = 500;
+  while (Date.now() < deadline) {
+    await new Promise((r) => setTimeout(r, delay));
+    const job = await getSyncStatus(token, jobId);
+    if (job.status === "completed") return job;
+    if (job.status === "failed") throw new Error(job.error || "Account creation failed");
+    delay = Math.min(delay * 2, 5000);
+  }
+  throw new Error("Timed out waiting for account creation");
+};
+
 // ─────────────────────────────────────────────
 // ASSETS
 // ─────────────────────────────────────────────
-export const getAssets = async (token) => {
-  const res = await fetch(`${BASE_URL}/assets`, {
+// One page of listings, newest first; pass the returned nextCursor back to
+// get the next page (null once there are no more).
+export const getAssets = async (token, { cursor, limit } = {}) => {
+  const params = new URLSearchParams();
+  if (cursor) params.set("cursor", cursor);
+  if (limit) params.set("limit", limit);
+  const qs = params.toString();
+  const res = await fetch(`${BASE_URL}/assets${qs ? `?${qs}` : ""}`, {
+    headers: authHeaders(token),
+  });
+  const items = await handleResponse(res);
+  return { items, nextCursor: res.headers.get("X-Next-Cursor") };
+};
+
+export const searchAssets = async (token, q, category) => {
+  const params = new URLSearchParams({ q });
+  if (category) params.set("category", category);
+  const res = await fetch(`${BASE_URL}/assets/search?${params}`, {
+    headers: authHeaders(token),
+  });
+  return handleResponse(res);
+};
+
+export const autocompleteAssets = async (token, q) => {
+  const res = await fetch(`${BASE_URL}/assets/autocomplete?${new URLSearchParams({ q })}`, {
     headers: authHeaders(token),
   });
   return handleResponse(res);
@@ -74,6 +121,20 @@ export const getPortfolio = async (token) => {
   return handleResponse(res);
 };
 
+export const getPortfolioSummary = async (token) => {
+  const res = await fetch(`${BASE_URL}/portfolio/summary`, {
+    headers: authHeaders(token),
+  });
+  return handleResponse(res);
+};
+
+export const getPortfolioValuation = async (token) => {
+  const res = await fetch(`${BASE_URL}/portfolio/valuation`, {
+    headers: authHeaders(token),
+  });
+  return handleResponse(res);
+};
+
 // ─────────────────────────────────────────────
 // INVEST
 // ─────────────────────────────────────────────
@@ -0,0 +1,213 @@
+"""
+Admission control for endpoints that spend operator fees.
+
+Every admitted call takes a token from two buckets: the caller's own (keyed
+by auth0_id, else the X-User-Sub header, else the client IP) and the
+operator's, which caps what this process submits to the network. A call
+that finds a bucket empty waits its turn (tokens are reserved, so waiters
+are served in arrival order) as long as the wait stays under
+ADMISSION_MAX_WAIT and fewer than ADMISSION_MAX_QUEUE calls are already
+waiting; otherwise it fails fast with 429 and a Retry-After telling the
+client when a token will be free.
+
+Buckets are per process: with N workers the operator sees up to N times
+ADMISSION_OPERATOR_RATE, so size it per worker.
+
+    @router.post("/mint-token", dependencies=[Depends(limit("mint-token"))])
+    ...
+    await admission.admit("sync-user", claims["sub"])     # once the caller is known
+    await admission.pace("mint-nft/bulk")                 # per transaction inside a bulk upload
+
+A bulk upload is one call against the user's bucket (its endpoint's
+limit() dependency); the transactions it submits are paced against the
+operator bucket alone, so a long run neither crawls at the per-user rate
+nor leaves the user's other calls throttled until it ends.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+
+from metrics import ADMISSION_DECISIONS, ADMISSION_TOKENS, ADMISSION_USERS, ADMISSION_WAIT, ADMISSION_WAITING
+
+ADMISSION_ENABLED        = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_USER_RATE      = float(os.getenv("ADMISSION_USER_RATE", "1"))       # calls/s per user
+ADMISSION_USER_BURST     = float(os.getenv("ADMISSION_USER_BURST", "5"))
+ADMISSION_OPERATOR_RATE  = float(os.getenv("ADMISSION_OPERATOR_RATE", "10"))  # transactions/s per process
+ADMISSION_OPERATOR_BURST = float(os.getenv("ADMISSION_OPERATOR_BURST", "20"))
+ADMISSION_MAX_WAIT       = float(os.getenv("ADMISSION_MAX_WAIT", "2"))        # seconds a call may queue
+ADMISSION_MAX_QUEUE      = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))       # waiters per bucket
+ADMISSION_MAX_USERS      = 10_000     # idle per-user buckets beyond this are dropped (they are full anyway)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; `reserve` returns how long the caller must wait."""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, max_wait: float, cost: float = 1):
+        """Take `cost` tokens, or return None if they would not be available within max_wait."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill()
+            wait = max(0.0, (cost - self.tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self.tokens -= cost
+            return wait
+
+    def refund(self, cost: float = 1):
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + cost)
+
+    def retry_after(self, cost: float = 1) -> float:
+        """Seconds until `cost` tokens are free (ignoring later reservations)."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill()
+            return max(0.0, (cost - self.tokens) / self.rate)
+
+    def level(self) -> float:
+        with self._lock:
+            self._refill()
+            return self.tokens
+
+
+class Rejected(Exception):
+    def __init__(self, limiter: str, retry_after: float):
+        self.limiter = limiter
+        self.retry_after = retry_after
+        super().__init__(f"{limiter} rate limit exceeded")
+
+
+class Limiter:
+    """One bucket plus a cap on how many callers may be waiting on it."""
+
+    def __init__(self, name: str, rate: float, burst: float,
+                 max_wait: float = ADMISSION_MAX_WAIT, max_queue: int = ADMISSION_MAX_QUEUE):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.waiting = 0
+
+    def reserve(self, cost: float = 1) -> float:
+        cost = min(cost, self.bucket.capacity)      # a large batch drains the bucket, it is not refused outright
+        wait = None if self.waiting >= self.max_queue else self.bucket.reserve(self.max_wait, cost)
+        if wait is None:
+            raise Rejected(self.name, self.bucket.retry_after(cost))
+        return wait
+
+
+class Admission:
+    def __init__(self, user_rate=ADMISSION_USER_RATE, user_burst=ADMISSION_USER_BURST,
+                 operator_rate=ADMISSION_OPERATOR_RATE, operator_burst=ADMISSION_OPERATOR_BURST,
+                 enabled=ADMISSION_ENABLED):
+        self.enabled = enabled
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.operator = Limiter("operator", operator_rate, operator_burst)
+        self.users = OrderedDict()          # key -> Limiter, least recently used first
+        # Read at scrape time
+        ADMISSION_TOKENS.labels("operator").set_function(self.operator.bucket.level)
+        ADMISSION_WAITING.labels("operator").set_function(lambda: self.operator.waiting)
+        ADMISSION_WAITING.labels("user").set_function(lambda: sum(u.waiting for u in self.users.values()))
+        ADMISSION_USERS.set_function(lambda: len(self.users))
+
+    def _user(self, key: str) -> Limiter:
+        limiter = self.users.get(key)
+        if limiter is None:
+            limiter = self.users[key] = Limiter("user", self.user_rate, self.user_burst)
+            while len(self.users) > ADMISSION_MAX_USERS:
+                self.users.popitem(last=False)
+        self.users.move_to_end(key)
+        return limiter
+
+    async def admit(self, operation: str, key: str, cost: float = 1):
+        """Wait for a token from the caller's and the operator's bucket, or raise 429."""
+        if not self.enabled:
+            return
+        await self._take(operation, (self._user(key or "anonymous"), self.operator), cost)
+
+    async def _take(self, operation: str, limiters: tuple, cost: float):
+        taken = []
+        try:
+            wait = 0.0
+            for limiter in limiters:
+                wait = max(wait, limiter.reserve(cost))
+                taken.append(limiter)
+        except Rejected as e:
+            for limiter in taken:
+                limiter.bucket.refund(min(cost, limiter.bucket.capacity))
+            ADMISSION_DECISIONS.labels(operation, e.limiter, "rejected").inc()
+            retry_after = max(1, math.ceil(e.retry_after))
+            raise HTTPException(
+                status_code=429,
+                detail={"message": f"Too many requests ({e.limiter} limit)", "retry_after": retry_after},
+                headers={"Retry-After": str(retry_after)},
+            )
+
+        ADMISSION_WAIT.labels(operation).observe(wait)
+        if wait <= 0:
+            ADMISSION_DECISIONS.labels(operation, "", "admitted").inc()
+            return
+        ADMISSION_DECISIONS.labels(operation, "", "queued").inc()
+        for limiter in taken:
+            limiter.waiting += 1
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            for limiter in taken:
+                limiter.bucket.refund(min(cost, limiter.bucket.capacity))   # client went away: hand them back
+            raise
+        finally:
+            for limiter in taken:
+                limiter.waiting -= 1
+
+    async def pace(self, operation: str, cost: float = 1):
+        """
+        Operator tokens for bulk work already admitted as one call: waits out
+        a full bucket instead of raising 429.
+        """
+        if not self.enabled:
+            return
+        while True:
+            try:
+                return await self._take(operation, (self.operator,), cost)
+            except HTTPException as e:
+                await asyncio.sleep(float(e.headers["Retry-After"]))
+
+
+admission = Admission()
+
+
+def request_key(request: Request) -> str:
+    """Caller identity for endpoints whose body does not name the user."""
+    sub = request.headers.get("x-user-sub")
+    if sub:
+        return sub
+    return f"ip:{request.client.host}" if request.client else "anonymous"
+
+
+def limit(operation: str, cost: float = 1):
+    """FastAPI dependency admitting one call of `operation` for the requesting user."""
+    async def dependency(request: Request):
+        await admission.admit(operation, request_key(request), cost)
+    return dependency
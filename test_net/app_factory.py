@@ -0,0 +1,61 @@
+"""
+Application factory shared by the token API and the onboarding API.
+
+Each service module exposes a `service = Service(...)` (its router, its
+own startup/shutdown hook and any response headers browsers must see) and
+builds its standalone app with `create_app(service)`. server.py passes
+both services to host them in one ASGI app; either way the process has one
+MongoDB pool and one Hedera client (runtime.py), one HTTP pool (pools.py)
+and one set of metrics.
+"""
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Callable, NamedTuple
+
+from fastapi import APIRouter, FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+import metrics
+from logs import RequestIdMiddleware, setup_logging
+from pools import close_http_client
+from responses import CompressionMiddleware
+from runtime import runtime
+
+
+class Service(NamedTuple):
+    name: str
+    router: APIRouter
+    lifespan: Callable = None           # async context manager factory taking the app
+    expose_headers: tuple = ()
+
+
+def create_app(*services: Service, name: str = None) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await runtime.start()       # Mongo and Hedera in parallel; stragglers retry in the background
+        try:
+            async with AsyncExitStack() as stack:
+                for service in services:
+                    if service.lifespan is not None:
+                        await stack.enter_async_context(service.lifespan(app))
+                yield
+        finally:
+            await runtime.stop()
+            await close_http_client()
+
+    setup_logging(name or services[0].name)
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=sorted({"X-Request-ID"} | {h for s in services for h in s.expose_headers}),
+    )
+    app.add_middleware(CompressionMiddleware)
+    metrics.install(app, service=name or services[0].name)
+    runtime.install(app)
+    app.add_middleware(RequestIdMiddleware)     # outermost: every log line of the request has its id
+    for service in services:
+        app.include_router(service.router)
+    return app
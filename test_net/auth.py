@@ -0,0 +1,104 @@
+"""
+Local verification of Auth0 RS256 access tokens.
+
+The signing keys come from a JWKS source that is fetched once and cached;
+an unknown `kid` triggers one refresh (key rotation), rate-limited so a
+stream of forged tokens cannot hammer the JWKS endpoint. Verified claims
+are kept in a small TTL/LRU cache so a returning token costs one dict
+lookup instead of an RSA verify.
+
+Sources are pluggable: RemoteJWKS for Auth0, StaticJWKS for tests or
+offline runs with a local key set.
+"""
+import hashlib
+import time
+
+import jwt
+
+from cache import TTLCache
+from pools import get_http_client
+
+
+# ── JWKS Sources ──────────────────────────────────────────────────────────
+
+class RemoteJWKS:
+    """Auth0's published key set at https://{domain}/.well-known/jwks.json."""
+
+    def __init__(self, domain: str):
+        self.url = f"https://{domain}/.well-known/jwks.json"
+
+    async def fetch(self) -> dict:
+        res = await get_http_client().get(self.url)
+        res.raise_for_status()
+        return res.json()
+
+
+class StaticJWKS:
+    """Fixed in-memory key set, e.g. built from a test key pair."""
+
+    def __init__(self, jwks: dict):
+        self.jwks = jwks
+
+    async def fetch(self) -> dict:
+        return self.jwks
+
+
+# ── Verifier ──────────────────────────────────────────────────────────────
+
+class TokenVerifier:
+    def __init__(
+        self,
+        source,
+        issuer: str = None,
+        audience: str = None,
+        jwks_ttl: float = 3600,
+        refresh_interval: float = 30,
+        cache_size: int = 1024,
+        cache_ttl: float = 300,
+    ):
+        self.source = source
+        self.issuer = issuer
+        self.audience = audience
+        self.jwks_ttl = jwks_ttl
+        self.refresh_interval = refresh_interval
+        self.claims_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._keys = {}
+        self._fetched_at = 0.0
+
+    async def _refresh(self):
+        jwk_set = jwt.PyJWKSet.from_dict(await self.source.fetch())
+        self._keys = {k.key_id: k.key for k in jwk_set.keys}
+        self._fetched_at = time.time()
+
+    async def _signing_key(self, kid: str):
+        age = time.time() - self._fetched_at
+        if not self._keys or age > self.jwks_ttl:
+            await self._refresh()
+        elif kid not in self._keys and age > self.refresh_interval:
+            await self._refresh()       # keys may have rotated since the last fetch
+        key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown signing key: {kid}")
+        return key
+
+    async def verify(self, token: str) -> dict:
+        """Return the token's claims or raise jwt.InvalidTokenError."""
+        cache_key = hashlib.sha256(token.encode()).hexdigest()
+        claims = self.claims_cache.get(cache_key)
+        if claims is not None:
+            return claims
+
+        header = jwt.get_unverified_header(token)
+        if header.get("alg") != "RS256":
+            raise jwt.InvalidAlgorithmError("Only RS256 tokens are accepted")
+        key = await self._signing_key(header.get("kid"))
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=self.audience,
+            issuer=self.issuer,
+            options={"verify_aud": self.audience is not None, "require": ["exp", "sub"]},
+        )
+        self.claims_cache.set(cache_key, claims, expires_at=claims["exp"])
+        return claims
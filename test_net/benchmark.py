@@ -0,0 +1,432 @@
+"""
+Offline load test for the FastAPI services.
+
+Runs testnet_test.app and user_onboarding.app in-process (httpx ASGI
+transport, no sockets) with stub backends injected in place of the real
+ones:
+- MongoDB: mongomock behind a thin async adapter with per-call latency
+- Hedera:  run_hedera replaced by a stub that sleeps, then settles the call
+           on the in-process simulator ledger (simulator.py)
+- Auth0:   tokens signed with a throwaway RSA key, verified via StaticJWKS
+
+Each scenario is driven at a fixed concurrency and reported as JSON
+(requests/s, p50/p95/p99 latency, CPU ms per response and mean bytes on
+the wire), so runs can be diffed between commits:
+
+    python benchmark.py --requests 1000 --concurrency 50 > after.json
+    python benchmark.py --compare before.json after.json
+
+The *_full and transactions scenarios return large lists; compare
+serialization/compression cost with e.g.
+
+    python benchmark.py --scenarios marketplace_full portfolio transactions --accept-encoding identity
+    python benchmark.py --scenarios marketplace_full portfolio transactions --accept-encoding "br, gzip"
+
+--payloads skips the services and times response encoding alone (FastAPI's
+default jsonable_encoder + json vs orjson, then gzip/brotli): CPU ms per
+response and bytes on the wire for typical large pages.
+
+Needs mongomock in addition to the service dependencies.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import types
+import warnings
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from hiero_sdk_python import AccountId, PrivateKey
+
+warnings.filterwarnings("ignore")
+
+SCENARIOS = [
+    "marketplace", "marketplace_full", "portfolio", "transactions",
+    "portfolio_invest", "create_token", "sync_user",
+]
+BENCH_TX_ACCOUNT = "0.0.5005"
+BENCH_USERS = 50
+
+
+# ── Stub MongoDB ──────────────────────────────────────────────────────────
+
+class StubCursor:
+    def __init__(self, cursor, latency):
+        self._cursor = cursor
+        self._latency = latency
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(self._latency)
+        rows = list(self._cursor)
+        return rows if length is None else rows[:length]
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        await asyncio.sleep(self._latency)
+        for row in self._cursor:
+            yield row
+
+
+class StubCollection:
+    """Motor-shaped async facade over a mongomock collection."""
+
+    def __init__(self, collection, latency):
+        self._c = collection
+        self._latency = latency
+
+    async def _io(self, fn, *args, **kwargs):
+        kwargs.pop("session", None)
+        await asyncio.sleep(self._latency)
+        return fn(*args, **kwargs)
+
+    def find(self, *args, session=None, **kwargs):
+        return StubCursor(self._c.find(*args, **kwargs), self._latency)
+
+    def aggregate(self, pipeline, session=None):
+        return StubCursor(self._c.aggregate(pipeline), self._latency)
+
+    async def find_one(self, *a, **k):           return await self._io(self._c.find_one, *a, **k)
+    async def insert_one(self, *a, **k):         return await self._io(self._c.insert_one, *a, **k)
+    async def insert_many(self, *a, **k):        return await self._io(self._c.insert_many, *a, **k)
+    async def update_one(self, *a, **k):         return await self._io(self._c.update_one, *a, **k)
+    async def find_one_and_update(self, *a, **k): return await self._io(self._c.find_one_and_update, *a, **k)
+    async def create_index(self, *a, **k):       return await self._io(self._c.create_index, *a, **k)
+
+    async def bulk_write(self, requests, ordered=True, session=None):
+        await asyncio.sleep(self._latency)
+        matched = 0
+        for op in requests:
+            matched += self._c.update_one(op._filter, op._doc, upsert=op._upsert).matched_count
+        return types.SimpleNamespace(matched_count=matched)
+
+
+class StubDatabase:
+    def __init__(self, latency):
+        import mongomock
+        self._db = mongomock.MongoClient()["bench"]
+        self._latency = latency
+
+    def __getitem__(self, name):
+        return StubCollection(self._db[name], self._latency)
+
+
+class StubMongoClient:
+    """What the runtime hands to the services' bind_mongo(): any db name -> the stub."""
+
+    def __init__(self, db):
+        self._db = db
+
+    def __getitem__(self, name):
+        return self._db
+
+
+# ── Stub Hedera ───────────────────────────────────────────────────────────
+
+class StubHedera:
+    """Drop-in for pools.run_hedera: sleeps on the loop, then executes on the simulator."""
+
+    def __init__(self, latency, client):
+        self.latency = latency
+        self.client = client
+
+    async def run(self, fn, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self.client.simulator.execute(fn.__self__, **kwargs)
+
+
+# ── Wiring ────────────────────────────────────────────────────────────────
+
+def load_services(mongo_latency, hedera_latency):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.environ["NETWORK"] = "simulator"     # no testnet client (or mirror node lookup) at import
+    os.environ.setdefault("INGEST_ENABLED", "false")   # no mirror-node tailing during a load test
+    os.environ.setdefault("LOG_LEVEL", "WARNING")      # keep the report readable
+    os.environ.setdefault("LOG_FILE", "")
+    os.environ.setdefault("ADMISSION_ENABLED", "false")    # measure capacity, not the rate limits
+    import testnet_test
+    import user_onboarding
+    from auth import StaticJWKS, TokenVerifier
+    from simulator import SimulatedClient, Simulator
+
+    db = StubDatabase(mongo_latency)
+
+    # Simulated client with a throwaway operator; latency is added by StubHedera
+    operator_key = PrivateKey.generate_ed25519()
+    operator_id = AccountId.from_string("0.0.2")
+    client = SimulatedClient(Simulator(consensus_latency=0, query_latency=0))
+    client.set_operator(operator_id, operator_key)
+    hedera = StubHedera(hedera_latency, client)
+
+    for mod in (testnet_test, user_onboarding):
+        mod.run_hedera = hedera.run
+    testnet_test._transactions_supported = False
+
+    # Handed to runtime.provide() once the loop runs; the services bind them as usual
+    backends = {"mongo": StubMongoClient(db), "hedera": (client, operator_id, operator_key)}
+
+    signing_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(signing_key.public_key()))
+    jwk["kid"] = "bench"
+    user_onboarding.token_verifier = TokenVerifier(StaticJWKS({"keys": [jwk]}))
+    tokens = [
+        jwt.encode(
+            {"sub": f"bench|user-{i}", "email": f"user{i}@bench", "name": f"User {i}",
+             "exp": int(time.time()) + 3600},
+            signing_key, algorithm="RS256", headers={"kid": "bench"},
+        )
+        for i in range(BENCH_USERS)
+    ]
+    return testnet_test, user_onboarding, tokens, backends
+
+
+async def _no_sync(account_id):
+    pass
+
+
+async def seed(token_api, listings, rows_per_user):
+    for i in range(listings):
+        await token_api.marketplace_col.insert_one({
+            "token_id": f"0.0.{10000 + i}", "name": f"Asset {i}", "symbol": f"A{i}",
+            "description": "benchmark listing", "category": ["Art", "Real Estate", "Commodities"][i % 3],
+            "decimals": 0, "initial_supply": 10**9, "max_supply": 10**9, "available": 10**9,
+            "supply_type": "FINITE", "token_type": "FUNGIBLE_COMMON", "price": 1,
+            "created_by": "bench", "created_at": f"2026-01-01T00:00:{i:06d}",
+        })
+    for u in range(BENCH_USERS):
+        for j in range(rows_per_user):
+            await token_api.portfolio_col.insert_one({
+                "auth0_id": f"bench|user-{u}", "token_id": f"0.0.{10000 + j % listings}",
+                "asset_name": "Asset", "symbol": "A", "amount": 1, "price_per_unit": 1.0,
+                "total_cost": 1.0, "tx_id": "", "status": "confirmed", "created_at": "2026-01-01",
+            })
+    await token_api.transactions_col.insert_many([
+        {"account_id": BENCH_TX_ACCOUNT, "consensus_timestamp": f"1767225600.{i:09d}",
+         "transaction_id": f"0.0.2-1767225600-{i:09d}", "name": "CRYPTOTRANSFER", "result": "SUCCESS",
+         "charged_tx_fee": 84000, "memo": "", "transfers": [{"account": BENCH_TX_ACCOUNT, "amount": -i}],
+         "token_transfers": []}
+        for i in range(token_api.TX_MAX_PAGE_SIZE)
+    ])
+    token_api.sync_transactions = _no_sync     # serve the seeded cache; no mirror node offline
+
+
+def make_requests(listings, tokens):
+    """Scenario name -> (service, function(i) returning request kwargs)."""
+    def invest(i):
+        return {"method": "POST", "url": "/portfolio/invest", "json": {
+            "auth0_id": f"bench|user-{i % BENCH_USERS}", "token_id": f"0.0.{10000 + random.randrange(listings)}",
+            "asset_name": "Asset", "symbol": "A", "amount": 1, "price_per_unit": 1.0}}
+
+    def create_token(i):
+        return {"method": "POST", "url": "/create-token", "json": {
+            "name": f"Bench {i}", "symbol": f"B{i}", "initial_supply": 1000, "max_supply": 10000,
+            "category": "Art", "auth0_id": "bench"}}
+
+    def sync_user(i):
+        return {"method": "POST", "url": "/sync-user",
+                "json": {"wallet_address": f"0x{i % BENCH_USERS:040x}", "hedera_account_id": "0.0.1234"},
+                "headers": {"Authorization": f"Bearer {tokens[i % BENCH_USERS]}"}}
+
+    return {
+        "marketplace":      ("token", lambda i: {"method": "GET", "url": "/marketplace", "params": {"limit": 50}}),
+        "marketplace_full": ("token", lambda i: {"method": "GET", "url": "/marketplace", "params": {"limit": 500}}),
+        "portfolio":        ("token", lambda i: {"method": "GET", "url": "/portfolio",
+                                                 "params": {"auth0_id": f"bench|user-{i % BENCH_USERS}"}}),
+        "transactions":     ("token", lambda i: {"method": "GET", "url": f"/transactions/{BENCH_TX_ACCOUNT}",
+                                                 "params": {"limit": 1000}}),
+        "portfolio_invest": ("token", invest),
+        "create_token":     ("token", create_token),
+        "sync_user":        ("onboarding", sync_user),
+    }
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+async def drive(http, build, total, concurrency, accept_encoding="gzip"):
+    latencies, errors, wire_bytes = [], 0, 0
+    queue = iter(range(total))
+
+    async def worker():
+        nonlocal errors, wire_bytes
+        for i in queue:
+            request = build(i)
+            request["headers"] = {**request.get("headers", {}), "Accept-Encoding": accept_encoding}
+            start = time.perf_counter()
+            res = await http.request(**request)
+            latencies.append(time.perf_counter() - start)
+            wire_bytes += res.num_bytes_downloaded
+            if res.status_code >= 300:
+                errors += 1
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    cpu = time.process_time() - cpu_start
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 3)
+    return {
+        "requests":    total,
+        "errors":      errors,
+        "concurrency": concurrency,
+        "rps":         round(total / elapsed, 1),
+        "mean_ms":     ms(sum(latencies) / len(latencies)),
+        "p50_ms":      ms(percentile(latencies, 50)),
+        "p95_ms":      ms(percentile(latencies, 95)),
+        "p99_ms":      ms(percentile(latencies, 99)),
+        "cpu_ms":      ms(cpu / total),         # whole process, client side included
+        "wire_bytes":  round(wire_bytes / total),
+    }
+
+
+async def run(args):
+    token_api, onboarding, tokens, backends = load_services(args.mongo_latency / 1000, args.hedera_latency / 1000)
+    for name, value in backends.items():
+        token_api.runtime.provide(name, value)
+    apps = {"token": token_api.app, "onboarding": onboarding.app}
+    scenarios = make_requests(args.listings, tokens)
+    results = {}
+
+    async with token_api.app.router.lifespan_context(token_api.app), \
+               onboarding.app.router.lifespan_context(onboarding.app):
+        await seed(token_api, args.listings, args.rows_per_user)
+        for name in args.scenarios:
+            service, build = scenarios[name]
+            transport = httpx.ASGITransport(app=apps[service])
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+                await drive(http, build, max(1, args.requests // 10), args.concurrency,
+                            args.accept_encoding)   # warm-up
+                results[name] = await drive(http, build, args.requests, args.concurrency, args.accept_encoding)
+            print(f"{name}: {results[name]['rps']} req/s, p99 {results[name]['p99_ms']} ms", file=sys.stderr)
+
+    return {
+        "config": {
+            "requests": args.requests, "concurrency": args.concurrency,
+            "mongo_latency_ms": args.mongo_latency, "hedera_latency_ms": args.hedera_latency,
+            "listings": args.listings, "rows_per_user": args.rows_per_user,
+            "accept_encoding": args.accept_encoding,
+        },
+        "python":    platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results":   results,
+    }
+
+
+def payload_report(repeat):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from responses import FastJSONResponse, brotli, encode_body
+
+    pages = {
+        "marketplace_500": [
+            {"token_id": f"0.0.{10000 + i}", "name": f"Asset {i}", "symbol": f"A{i}",
+             "description": "benchmark listing", "category": "Art", "decimals": 0,
+             "initial_supply": 10**9, "max_supply": 10**9, "available": 10**9 - i, "supply_type": "FINITE",
+             "token_type": "FUNGIBLE_COMMON", "price": 1.5, "created_by": "bench",
+             "created_at": f"2026-01-01T00:00:{i:06d}"}
+            for i in range(500)
+        ],
+        "transactions_1000": [
+            {"consensus_timestamp": f"1767225600.{i:09d}", "transaction_id": f"0.0.2-1767225600-{i:09d}",
+             "name": "CRYPTOTRANSFER", "result": "SUCCESS", "charged_tx_fee": 84000, "memo": "",
+             "transfers": [{"account": "0.0.2", "amount": -i}, {"account": "0.0.98", "amount": i}],
+             "token_transfers": []}
+            for i in range(1000)
+        ],
+    }
+
+    def cpu_ms(fn):
+        start = time.process_time()
+        for _ in range(repeat):
+            result = fn()
+        return round((time.process_time() - start) / repeat * 1000, 3), result
+
+    report = {}
+    for name, rows in pages.items():
+        stdlib_ms, stdlib_body = cpu_ms(lambda: JSONResponse(jsonable_encoder(rows)).body)
+        orjson_ms, body = cpu_ms(lambda: FastJSONResponse(rows).body)
+        report[name] = {
+            "stdlib_json": {"cpu_ms": stdlib_ms, "bytes": len(stdlib_body)},
+            "orjson":      {"cpu_ms": orjson_ms, "bytes": len(body)},
+        }
+        for encoding in ("gzip", "br"):
+            if encoding == "br" and brotli is None:
+                continue
+            ms, compressed = cpu_ms(lambda: encode_body(body, encoding))
+            report[name][f"orjson+{encoding}"] = {"cpu_ms": round(orjson_ms + ms, 3), "bytes": len(compressed)}
+    return report
+
+
+def compare(before_path, after_path):
+    before = json.load(open(before_path))["results"]
+    after = json.load(open(after_path))["results"]
+    report = {}
+    for name in after:
+        if name not in before:
+            continue
+        report[name] = {
+            metric: {
+                "before": before[name][metric],
+                "after":  after[name][metric],
+                "change_pct": round((after[name][metric] - before[name][metric]) / before[name][metric] * 100, 1)
+                              if before[name][metric] else None,
+            }
+            for metric in ("rps", "p50_ms", "p95_ms", "p99_ms", "cpu_ms", "wire_bytes")
+            if metric in before[name] and metric in after[name]
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--mongo-latency", type=float, default=1.0, help="ms added to every stub Mongo call")
+    parser.add_argument("--hedera-latency", type=float, default=50.0, help="ms added to every stub Hedera call")
+    parser.add_argument("--listings", type=int, default=1000)
+    parser.add_argument("--rows-per-user", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--accept-encoding", default="gzip",
+                        help='Accept-Encoding sent with every request ("identity" disables compression)')
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="diff two earlier JSON reports instead of running")
+    parser.add_argument("--payloads", action="store_true",
+                        help="time response encoding/compression only, no services")
+    parser.add_argument("--repeat", type=int, default=50, help="encodings per payload with --payloads")
+    args = parser.parse_args()
+
+    # The services print() on import and per request; keep stdout for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.compare:
+            report = compare(*args.compare)
+        elif args.payloads:
+            report = payload_report(args.repeat)
+        else:
+            report = asyncio.run(run(args))
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
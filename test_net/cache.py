@@ -0,0 +1,76 @@
+"""
+In-process caches shared by the services.
+
+TTLCache is a plain LRU with per-entry expiry. SingleFlightCache wraps it
+for async loaders: concurrent misses on one key share a single load, so N
+simultaneous requests for the same value cost one backend call.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Small LRU cache whose entries also expire after a per-entry deadline."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, expires_at: float = None):
+        deadline = time.time() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        self._data[key] = (value, deadline)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+
+class SingleFlightCache:
+    def __init__(self, ttl: float, maxsize: int = 4096):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight = {}
+
+    async def get(self, key, loader):
+        """Cached value for key, else the result of one shared `await loader()`."""
+        value = self._cache.get(key)
+        if value is not None:
+            return value
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(loader())
+            self._inflight[key] = future
+
+            def _done(f, key=key):
+                # A load that was invalidated while in flight is not cached
+                if self._inflight.get(key) is f:
+                    del self._inflight[key]
+                    if not f.cancelled() and f.exception() is None:
+                        self._cache.set(key, f.result())
+
+            future.add_done_callback(_done)
+        # shield: one caller disconnecting must not cancel the shared load
+        return await asyncio.shield(future)
+
+    def invalidate(self, key):
+        self._cache.pop(key)
+        self._inflight.pop(key, None)
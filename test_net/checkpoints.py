@@ -0,0 +1,98 @@
+"""
+Shared scaffolding for resumable bulk uploads (nft_mint.py, token_import.py).
+
+A run is one document in its runs collection, keyed by a run id the client
+passes back to resume. Whoever uploads takes the run's lease with open();
+a second upload for the same id gets RunConflict until that lease is
+released by close() or expires. Subclasses keep their per-item checkpoints
+in their own collection and call renew() on every item outcome, so a slow
+or failing upload keeps its lease for as long as it is making progress.
+They await throttle() before every submission, which charges the `admit`
+callback (admission.pace) so bulk uploads spend fees within the operator's
+rate; the user is charged once, for the upload itself.
+
+    run = MintRun(...)
+    await run.open()            # RunConflict -> 409
+    try:
+        ... run.error(row, message); await run.renew() ...
+    finally:
+        status = await run.close()
+"""
+import time
+import uuid
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from clock import utcnow
+
+MAX_REPORTED_ERRORS = 100
+
+RUNNING   = "running"
+COMPLETED = "completed"
+PARTIAL   = "partial"
+
+
+class RunConflict(Exception):
+    """Another upload is still working on this run id."""
+
+
+class CheckpointedRun:
+    noun = "Run"                # for error messages
+    conflict = RunConflict
+
+    def __init__(self, runs_col, run_id: str = None, lease_seconds: float = 120, admit=None):
+        self.runs_col = runs_col
+        self.run_id = run_id or uuid.uuid4().hex
+        self.lease_seconds = lease_seconds
+        self.admit = admit          # async (cost) -> None, waits for admission
+        self.owner = uuid.uuid4().hex
+        self.counts = {}
+        self.errors = []
+        self._renewed = 0.0
+
+    async def open(self, on_insert: dict = None) -> dict:
+        """Take the run's lease, creating the run (with `on_insert` fields) if new."""
+        now = utcnow()
+        try:
+            doc = await self.runs_col.find_one_and_update(
+                {"_id": self.run_id, "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "lease_until": utcnow(self.lease_seconds),
+                          "status": RUNNING, "updated_at": now},
+                 "$setOnInsert": {**(on_insert or {}), "created_at": now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            raise self.conflict(f"{self.noun} {self.run_id} is still in progress")
+        self._renewed = time.monotonic()
+        return doc
+
+    async def renew(self):
+        """Push the lease out again; writes at most every tenth of the lease."""
+        if time.monotonic() - self._renewed < self.lease_seconds / 10:
+            return
+        self._renewed = time.monotonic()
+        await self.runs_col.update_one(
+            {"_id": self.run_id, "owner": self.owner},
+            {"$set": {"lease_until": utcnow(self.lease_seconds), "updated_at": utcnow()}},
+        )
+
+    async def close(self) -> str:
+        """Release the lease and record the outcome: completed, or partial if anything needs another pass."""
+        c = self.counts
+        status = PARTIAL if c.get("failed") or c.get("unconfirmed") or c.get("invalid") else COMPLETED
+        await self.runs_col.update_one(
+            {"_id": self.run_id, "owner": self.owner},
+            {"$set": {"status": status, "lease_until": None, "updated_at": utcnow(), "last_counts": c}},
+        )
+        return status
+
+    async def throttle(self, cost: float = 1):
+        """Wait for admission to submit `cost` transactions."""
+        if self.admit is not None:
+            await self.admit(cost)
+
+    def error(self, row: int, message: str):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
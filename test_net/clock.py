@@ -0,0 +1,10 @@
+"""
+Timestamps as stored in MongoDB: ISO-8601 strings in UTC, which sort and
+compare correctly as strings (lease deadlines, updated_at cursors).
+"""
+from datetime import datetime, timedelta, timezone
+
+
+def utcnow(offset: float = 0) -> str:
+    """Now, or `offset` seconds from now."""
+    return (datetime.now(timezone.utc) + timedelta(seconds=offset)).isoformat()
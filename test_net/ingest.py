@@ -0,0 +1,409 @@
+"""
+Mirror-node ingestion: a chain-consistent view of token holdings and supply.
+
+A background worker tails the mirror node's per-account transaction feed
+(consensus order, from a stored checkpoint) for every account we care
+about, the treasury of each token listed in marketplace_col and every
+onboarded user's Hedera account, and folds the token transfers (fungible
+amounts and NFT serials) of listed tokens into:
+
+- holdings: one doc per (token_id, account_id) with the chain balance
+- marketplace_col: `chain_available` (treasury balance) and `chain_supply`
+
+An account seen for the first time is not replayed from genesis: its
+holdings (and, for a treasury, its listings' chain fields) are seeded from
+the mirror's latest balance snapshot, and its feed is tailed from that
+snapshot's timestamp. Each account's state records which tokens its
+checkpoint covers; a token listed after the feed has moved past its
+transfers (a listing written mid-tick, or an import batch inserted after
+its creations) is seeded for that account from the snapshot at or before
+the checkpoint, and the feed between the two is replayed for it alone.
+
+Each holding is only ever written from its own account's feed, and every
+write is guarded by the consensus timestamp it has applied up to, so a
+page replayed after a crash (apply done, checkpoint not yet saved) is a
+no-op. A lease document makes one process the writer when several run;
+it is renewed after every page, and a writer that lost it stops.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from clock import utcnow
+from metrics import INGEST_LAG
+from pools import get_http_client
+
+INGEST_POLL_INTERVAL = float(os.getenv("INGEST_POLL_INTERVAL", "5"))
+INGEST_MAX_PAGES     = int(os.getenv("INGEST_MAX_PAGES", "10"))       # per account per tick
+INGEST_CONCURRENCY   = int(os.getenv("INGEST_CONCURRENCY", "4"))
+INGEST_PAGE_SIZE     = 100
+LEASE_ID = "_lease"
+
+log = logging.getLogger(__name__)
+
+
+
+def _ts_seconds(consensus_timestamp: str) -> float:
+    return float(consensus_timestamp)
+
+
+def _moves(tx: dict) -> list:
+    """A transaction's token movements as {token_id, account, amount}; NFT serials count 1 each."""
+    moves = list(tx.get("token_transfers") or [])
+    for nft in tx.get("nft_transfers") or []:
+        if nft.get("sender_account_id"):        # none on mint
+            moves.append({"token_id": nft["token_id"], "account": nft["sender_account_id"], "amount": -1})
+        if nft.get("receiver_account_id"):      # none on burn
+            moves.append({"token_id": nft["token_id"], "account": nft["receiver_account_id"], "amount": 1})
+    return moves
+
+
+def _not_applied(ts_field: str, page_ts: str) -> dict:
+    # Missing field counts as "nothing applied yet"
+    return {ts_field: {"$not": {"$gte": page_ts}}}
+
+
+class MirrorIngestor:
+    def __init__(
+        self,
+        mirror_url: str,
+        on_change=None,
+        poll_interval: float = INGEST_POLL_INTERVAL,
+        max_pages: int = INGEST_MAX_PAGES,
+        lease_seconds: float = 60,
+    ):
+        self.mirror_url = mirror_url
+        self.state_col = None               # set by bind() once MongoDB is up
+        self.holdings_col = None
+        self.marketplace_col = None
+        self.users_col = None
+        self.on_change = on_change          # called after marketplace_col was written
+        self.poll_interval = poll_interval
+        self.max_pages = max_pages
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self.last_caught_up = None          # time.time() when every account reached the head
+        self.last_error = None
+        self.accounts = 0
+        self._task = None
+
+    def bind(self, db):
+        self.state_col = db["ingest_state"]
+        self.holdings_col = db["holdings"]
+        self.marketplace_col = db["marketplace"]
+        self.users_col = db["users"]          # written by the onboarding service
+
+    async def ensure_indexes(self):
+        await self.holdings_col.create_index([("token_id", 1), ("account_id", 1)], unique=True)
+        await self.holdings_col.create_index([("account_id", 1), ("token_id", 1)])
+
+    # ── Lease ─────────────────────────────────────────────────────────────
+
+    async def _acquire_lease(self) -> bool:
+        now = utcnow()
+        try:
+            await self.state_col.update_one(
+                {"_id": LEASE_ID, "$or": [{"owner": self.owner}, {"lease_until": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "lease_until": utcnow(self.lease_seconds)}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False    # duplicate key on upsert: someone else holds a live lease
+
+    async def _renew_lease(self) -> bool:
+        """Extend a lease we hold; False if another process has taken it over."""
+        result = await self.state_col.update_one(
+            {"_id": LEASE_ID, "owner": self.owner},
+            {"$set": {"lease_until": utcnow(self.lease_seconds)}},
+        )
+        return result.matched_count == 1
+
+    # ── Inputs ────────────────────────────────────────────────────────────
+
+    async def _tracked_tokens(self) -> dict:
+        """token_id -> treasury account, fetching the treasury from the mirror if unknown."""
+        tokens = {}
+        listings = await self.marketplace_col.find({}, {"_id": 0, "token_id": 1, "treasury_id": 1}).to_list(None)
+        for doc in listings:
+            treasury = doc.get("treasury_id")
+            if not treasury:
+                res = await get_http_client().get(f"{self.mirror_url}/api/v1/tokens/{doc['token_id']}")
+                if res.status_code == 404:
+                    continue        # not (yet) visible on the mirror node
+                res.raise_for_status()
+                treasury = res.json()["treasury_account_id"]
+                await self.marketplace_col.update_one({"token_id": doc["token_id"]},
+                                                      {"$set": {"treasury_id": treasury}})
+            tokens[doc["token_id"]] = treasury
+        return tokens
+
+    async def _user_accounts(self) -> set:
+        rows = await self.users_col.find(
+            {"hedera_account_id": {"$nin": [None, ""]}}, {"_id": 0, "hedera_account_id": 1}
+        ).to_list(None)
+        return {r["hedera_account_id"] for r in rows if r["hedera_account_id"].startswith("0.0.")}
+
+    # ── Applying a page ───────────────────────────────────────────────────
+
+    async def _apply_page(self, account_id: str, txs: list, tokens: dict) -> bool:
+        page_ts = txs[-1]["consensus_timestamp"]
+        balance = {}        # token -> this account's net change
+        supply = {}         # token -> net mint/burn, seen from the treasury's feed
+        for tx in txs:
+            transfers = _moves(tx)
+            for token_id in {t["token_id"] for t in transfers} & tokens.keys():
+                moves = [t for t in transfers if t["token_id"] == token_id]
+                own = sum(t["amount"] for t in moves if t["account"] == account_id)
+                if own:
+                    balance[token_id] = balance.get(token_id, 0) + own
+                if tokens[token_id] == account_id:
+                    net = sum(t["amount"] for t in moves)       # zero for plain transfers
+                    if net:
+                        supply[token_id] = supply.get(token_id, 0) + net
+        if not balance and not supply:
+            return False
+
+        now = utcnow()
+        ops = [
+            UpdateOne(
+                {"token_id": t, "account_id": account_id, **_not_applied("last_ts", page_ts)},
+                {"$inc": {"balance": delta}, "$set": {"last_ts": page_ts, "updated_at": now}},
+                upsert=True,
+            )
+            for t, delta in balance.items()
+        ]
+        try:
+            if ops:
+                await self.holdings_col.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # Upsert collided with an existing doc that already applied this page
+            if any(err["code"] != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+
+        listing_ops = []
+        for t in set(balance) | set(supply):
+            if tokens[t] != account_id:
+                continue
+            inc = {"chain_available": balance.get(t, 0), "chain_supply": supply.get(t, 0)}
+            listing_ops.append(UpdateOne(
+                {"token_id": t, **_not_applied("chain_ts", page_ts)},
+                {"$inc": inc, "$set": {"chain_ts": page_ts}},
+            ))
+        if listing_ops:
+            await self.marketplace_col.bulk_write(listing_ops, ordered=False)
+            return True
+        return False
+
+    # ── Tailing one account ───────────────────────────────────────────────
+
+    async def _snapshot(self, account_id: str, tokens: dict, at: str = None) -> tuple:
+        """
+        Set the account's holdings of `tokens` (and, for a treasury, its
+        listings' chain fields) from the mirror's balance snapshot, the latest
+        one or the last at or before `at`. Returns (snapshot timestamp or
+        None if there is none, marketplace_changed).
+        """
+        http = get_http_client()
+        url = f"{self.mirror_url}/api/v1/balances?account.id={account_id}"
+        if at:
+            url += f"&timestamp=lte:{at}"
+        res = await http.get(url)
+        res.raise_for_status()
+        data = res.json()
+        snapshot = data.get("timestamp")
+        if not snapshot:
+            return None, False
+        entry = next((b for b in data.get("balances", []) if b.get("account") == account_id), {})
+        held = {t["token_id"]: t["balance"] for t in entry.get("tokens", []) if t["token_id"] in tokens}
+
+        now = utcnow()
+        ops = [
+            UpdateOne(
+                {"token_id": t, "account_id": account_id},
+                {"$set": {"balance": amount, "last_ts": snapshot, "updated_at": now}},
+                upsert=True,
+            )
+            for t, amount in held.items()
+        ]
+        if ops:
+            await self.holdings_col.bulk_write(ops, ordered=False)
+
+        changed = False
+        for token_id, treasury in tokens.items():
+            if treasury != account_id:
+                continue
+            res = await http.get(f"{self.mirror_url}/api/v1/tokens/{token_id}?timestamp={snapshot}")
+            if res.status_code == 404:
+                supply = 0          # created after the snapshot; its mint is in the feed
+            else:
+                res.raise_for_status()
+                supply = int(res.json()["total_supply"])
+            await self.marketplace_col.update_one(
+                {"token_id": token_id},
+                {"$set": {"chain_available": held.get(token_id, 0), "chain_supply": supply, "chain_ts": snapshot}},
+            )
+            changed = True
+        return snapshot, changed
+
+    async def _seed_account(self, account_id: str, tokens: dict) -> tuple:
+        """
+        Start a new account at the mirror's latest balance snapshot; returns
+        (checkpoint, marketplace_changed). The checkpoint is None when the
+        mirror has no snapshot yet, and the feed is then replayed from the start.
+        """
+        snapshot, changed = await self._snapshot(account_id, tokens)
+        if snapshot:
+            await self.state_col.update_one(
+                {"_id": account_id},
+                {"$set": {"timestamp": snapshot, "seeded_at": snapshot, "updated_at": utcnow()}},
+                upsert=True,
+            )
+        return snapshot, changed
+
+    async def _seed_tokens(self, account_id: str, tokens: dict, checkpoint: str) -> tuple:
+        """
+        Bring tokens that became tracked after the account's feed passed
+        their transfers up to `checkpoint`: seed them from the snapshot at or
+        before it, then replay the feed in between for those tokens only.
+        Returns (done, marketplace_changed); not done if the lease was lost.
+        """
+        since, changed = await self._snapshot(account_id, tokens, at=checkpoint)
+        http = get_http_client()
+        while True:
+            url = (f"{self.mirror_url}/api/v1/transactions?account.id={account_id}"
+                   f"&result=success&order=asc&limit={INGEST_PAGE_SIZE}&timestamp=lte:{checkpoint}")
+            if since:
+                url += f"&timestamp=gt:{since}"
+            res = await http.get(url)
+            res.raise_for_status()
+            data = res.json()
+            txs = data.get("transactions", [])
+            if not txs:
+                return True, changed
+            changed |= await self._apply_page(account_id, txs, tokens)
+            since = txs[-1]["consensus_timestamp"]
+            if not data.get("links", {}).get("next"):
+                return True, changed
+            if not await self._renew_lease():
+                log.warning("Ingest lease lost; stopped seeding %s for %s", sorted(tokens), account_id)
+                return False, changed
+
+    async def _sync_account(self, account_id: str, tokens: dict) -> tuple:
+        """Returns (reached_head, marketplace_changed)."""
+        state = await self.state_col.find_one({"_id": account_id})
+        changed = False
+        if state is None:
+            checkpoint, changed = await self._seed_account(account_id, tokens)
+            new = tokens
+        else:
+            checkpoint = state.get("timestamp")
+            new = {t: tokens[t] for t in tokens.keys() - set(state.get("tokens", []))}
+            if new and checkpoint:
+                done, changed = await self._seed_tokens(account_id, new, checkpoint)
+                if not done:
+                    return False, changed
+        if new:
+            # the checkpoint now covers these tokens too
+            await self.state_col.update_one(
+                {"_id": account_id}, {"$addToSet": {"tokens": {"$each": list(new)}}}, upsert=True,
+            )
+        http = get_http_client()
+        for _ in range(self.max_pages):
+            url = (f"{self.mirror_url}/api/v1/transactions?account.id={account_id}"
+                   f"&result=success&order=asc&limit={INGEST_PAGE_SIZE}")
+            if checkpoint:
+                url += f"&timestamp=gt:{checkpoint}"
+            res = await http.get(url)
+            res.raise_for_status()
+            data = res.json()
+            txs = data.get("transactions", [])
+            if not txs:
+                return True, changed
+            changed |= await self._apply_page(account_id, txs, tokens)
+            checkpoint = txs[-1]["consensus_timestamp"]
+            await self.state_col.update_one(
+                {"_id": account_id},
+                {"$set": {"timestamp": checkpoint, "updated_at": utcnow()}},
+                upsert=True,
+            )
+            if not data.get("links", {}).get("next"):
+                return True, changed
+            if not await self._renew_lease():
+                log.warning("Ingest lease lost; stopping at %s for %s", checkpoint, account_id)
+                return False, changed
+        return False, changed
+
+    # ── Loop ──────────────────────────────────────────────────────────────
+
+    async def tick(self):
+        if not await self._acquire_lease():
+            return
+        tokens = await self._tracked_tokens()
+        accounts = set(tokens.values()) | await self._user_accounts()
+        self.accounts = len(accounts)
+        semaphore = asyncio.Semaphore(INGEST_CONCURRENCY)
+
+        async def sync(account_id):
+            async with semaphore:
+                return await self._sync_account(account_id, tokens)
+
+        started = time.time()
+        results = await asyncio.gather(*(sync(a) for a in accounts))
+        if any(changed for _, changed in results) and self.on_change:
+            self.on_change()
+        if all(at_head for at_head, _ in results):
+            self.last_caught_up = started
+        if self.last_caught_up is not None:
+            INGEST_LAG.set(self.lag_seconds())
+
+    def lag_seconds(self):
+        """Upper bound on how far the view trails the mirror node (None before the first catch-up)."""
+        if self.last_caught_up is None:
+            return None
+        return round(time.time() - self.last_caught_up, 3)
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.tick()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                log.exception("Mirror ingestion tick failed: %s", e)
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def status(self) -> dict:
+        lease = await self.state_col.find_one({"_id": LEASE_ID}) or {}
+        checkpoints = await self.state_col.find(
+            {"_id": {"$ne": LEASE_ID}}, {"timestamp": 1, "updated_at": 1}
+        ).to_list(None)
+        oldest = min((c["timestamp"] for c in checkpoints if c.get("timestamp")), default=None)
+        return {
+            "running":          self._task is not None,
+            "leader":           lease.get("owner") == self.owner,
+            "lease_until":      lease.get("lease_until"),
+            "accounts":         self.accounts,
+            "checkpoints":      len(checkpoints),
+            "oldest_checkpoint": oldest,
+            "oldest_checkpoint_age_s": round(time.time() - _ts_seconds(oldest), 3) if oldest else None,
+            "lag_seconds":      self.lag_seconds(),
+            "last_error":       self.last_error,
+        }
@@ -0,0 +1,186 @@
+"""
+Persistent background job queue backed by a MongoDB collection.
+
+Jobs are plain documents; a pool of asyncio worker tasks claims them with
+an atomic find_one_and_update and holds a lease while the handler runs,
+renewed every lease_seconds / 3 for as long as it runs. A job whose worker
+died is re-claimed once its lease expires, and a failing job is retried
+with exponential backoff up to max_attempts. Each claim stamps an `owner`;
+the outcome is only recorded by the worker that still owns the job.
+
+Handlers receive the job document and return a dict stored as `result`.
+They can report progress with `queue.update(job_id, stage=...)`.
+"""
+import asyncio
+import logging
+import uuid
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from clock import utcnow
+
+QUEUED    = "queued"
+RUNNING   = "running"
+COMPLETED = "completed"
+FAILED    = "failed"
+OPEN_STATES = [QUEUED, RUNNING]
+
+log = logging.getLogger(__name__)
+
+
+
+class JobQueue:
+    def __init__(
+        self,
+        collection,
+        handler,
+        workers: int = 4,
+        lease_seconds: float = 120,
+        poll_interval: float = 1.0,
+        max_attempts: int = 5,
+        retry_delay: float = 2.0,
+    ):
+        self.collection = collection
+        self.handler = handler
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("status", 1), ("available_at", 1)])
+        # At most one open job per dedupe_key ($in in a partial filter needs MongoDB 6.0+)
+        await self.collection.create_index(
+            "dedupe_key",
+            unique=True,
+            partialFilterExpression={"dedupe_key": {"$type": "string"}, "status": {"$in": OPEN_STATES}},
+        )
+
+    async def enqueue(self, payload: dict, dedupe_key: str = None) -> dict:
+        """
+        Add a job. With a dedupe_key, an already open job for the same key is
+        returned instead of creating a second one.
+        """
+        now = utcnow()
+        doc = {
+            "_id":          uuid.uuid4().hex,
+            "payload":      payload,
+            "status":       QUEUED,
+            "stage":        None,
+            "attempts":     0,
+            "result":       None,
+            "error":        None,
+            "dedupe_key":   dedupe_key,
+            "available_at": now,
+            "lease_until":  None,
+            "created_at":   now,
+            "updated_at":   now,
+        }
+        if dedupe_key is None:
+            await self.collection.insert_one(doc)
+            job = doc
+        else:
+            query = {"dedupe_key": dedupe_key, "status": {"$in": OPEN_STATES}}
+            try:
+                job = await self.collection.find_one_and_update(
+                    query, {"$setOnInsert": doc}, upsert=True, return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:   # a concurrent enqueue inserted it first: already queued
+                job = await self.collection.find_one(query)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> dict:
+        return await self.collection.find_one({"_id": job_id})
+
+    async def update(self, job_id: str, **fields):
+        fields["updated_at"] = utcnow()
+        await self.collection.update_one({"_id": job_id}, {"$set": fields})
+
+    async def _claim(self):
+        now = utcnow()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "available_at": {"$lte": now}},
+                {"status": RUNNING, "lease_until": {"$lt": now}},   # worker died mid-job
+            ]},
+            {"$set": {"status": RUNNING, "owner": uuid.uuid4().hex,
+                      "lease_until": utcnow(self.lease_seconds), "updated_at": now},
+             "$inc": {"attempts": 1}},
+            sort=[("available_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _heartbeat(self, job: dict):
+        """Keep the lease of a running job; stops once another worker owns it."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                result = await self.collection.update_one(
+                    {"_id": job["_id"], "owner": job["owner"], "status": RUNNING},
+                    {"$set": {"lease_until": utcnow(self.lease_seconds)}},
+                )
+            except Exception as e:
+                log.warning("Job %s lease renewal failed: %s", job["_id"], e, extra={"job_id": job["_id"]})
+                continue
+            if result.matched_count == 0:
+                log.warning("Job %s lease lost", job["_id"], extra={"job_id": job["_id"]})
+                return
+
+    async def _finish(self, job: dict, **fields):
+        """Record the outcome, unless the lease was lost and another worker owns the job now."""
+        fields["updated_at"] = utcnow()
+        result = await self.collection.update_one(
+            {"_id": job["_id"], "owner": job["owner"]}, {"$set": {**fields, "lease_until": None}},
+        )
+        if result.matched_count == 0:
+            log.warning("Job %s finished after losing its lease; outcome not recorded", job["_id"],
+                        extra={"job_id": job["_id"], "status": fields.get("status")})
+
+    async def _run(self, job: dict):
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            result = await self.handler(job)
+            await self._finish(job, status=COMPLETED, result=result, error=None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if job["attempts"] >= self.max_attempts:
+                await self._finish(job, status=FAILED, error=str(e))
+            else:
+                backoff = self.retry_delay * 2 ** (job["attempts"] - 1)
+                await self._finish(job, status=QUEUED, error=str(e), available_at=utcnow(backoff))
+            log.exception("Job %s attempt %d failed: %s", job["_id"], job["attempts"], e,
+                          extra={"job_id": job["_id"], "stage": job.get("stage")})
+        finally:
+            heartbeat.cancel()
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                log.warning("Job queue claim failed: %s", e)
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
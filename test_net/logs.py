@@ -0,0 +1,182 @@
+"""
+Structured, non-blocking logging for both services.
+
+    log = logging.getLogger(__name__)
+    log.info("Token created", extra={"token_id": token_id})
+
+setup_logging() puts a QueueHandler on the root logger: the calling thread
+only enqueues the record, and a QueueListener thread formats it as one JSON
+line and writes it to stdout and to a size-capped rotating LOG_FILE. Each
+record carries the id of the request it was logged under (X-Request-ID,
+set by RequestIdMiddleware and echoed on the response).
+
+Identical tracebacks (same exception type and frames) are logged in full at
+most LOG_TRACEBACK_LIMIT times per LOG_TRACEBACK_WINDOW seconds; the rest
+keep their message but drop the traceback, and the next full one reports
+how many were suppressed.
+"""
+import atexit
+import contextvars
+import hashlib
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timezone
+
+import orjson
+
+LOG_LEVEL           = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE            = os.getenv("LOG_FILE", "fractok.log")        # empty: stdout only
+LOG_MAX_BYTES       = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT    = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_TRACEBACK_LIMIT = int(os.getenv("LOG_TRACEBACK_LIMIT", "5"))
+LOG_TRACEBACK_WINDOW = float(os.getenv("LOG_TRACEBACK_WINDOW", "60"))
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+# ── Formatting ────────────────────────────────────────────────────────────
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, service: str = None):
+        super().__init__()
+        self.service = service
+
+    def format(self, record) -> str:
+        entry = {
+            "ts":         datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level":      record.levelname,
+            "logger":     record.name,
+            "msg":        record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        if self.service:
+            entry["service"] = self.service
+        entry.update({k: v for k, v in vars(record).items() if k not in _RESERVED and k != "request_id"})
+        if record.exc_info:
+            entry["exc_type"] = record.exc_info[0].__name__
+            entry["traceback"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["traceback"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+# ── Traceback rate limiting ───────────────────────────────────────────────
+
+class TracebackRateLimiter(logging.Filter):
+    """Keeps the message of a repeated traceback but drops the stack after the limit."""
+
+    def __init__(self, limit: int = LOG_TRACEBACK_LIMIT, window: float = LOG_TRACEBACK_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._seen = {}         # signature -> [window_start, logged, suppressed]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(exc_info) -> str:
+        exc_type, _, tb = exc_info
+        frames = [(f.f_code.co_filename, lineno) for f, lineno in traceback.walk_tb(tb)]
+        return hashlib.blake2b(repr((exc_type.__qualname__, frames)).encode(), digest_size=8).hexdigest()
+
+    def filter(self, record) -> bool:
+        if not record.exc_info or record.exc_info[0] is None:
+            return True
+        signature = self._signature(record.exc_info)
+        now = time.monotonic()
+        with self._lock:
+            state = self._seen.get(signature)
+            if state is None or now - state[0] >= self.window:
+                if len(self._seen) > 10_000:
+                    self._seen.clear()
+                suppressed = state[2] if state else 0
+                state = self._seen[signature] = [now, 0, 0]
+                if suppressed:
+                    record.tracebacks_suppressed = suppressed
+            if state[1] < self.limit:
+                state[1] += 1
+            else:
+                state[2] += 1
+                record.exc_info = None
+                record.exc_text = None
+                record.traceback_suppressed = True
+        record.traceback_id = signature
+        return True
+
+
+# ── Queue plumbing ────────────────────────────────────────────────────────
+
+class _RequestQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Runs on the caller's thread: stamp the request id and merge args,
+        # leave traceback formatting to the listener thread.
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_listener = None
+
+
+def setup_logging(service: str = None):
+    """Idempotent; the first caller's `service` name is stamped on every record."""
+    global _listener
+    if _listener is not None:
+        return
+    formatter = JsonFormatter(service)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if LOG_FILE:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8",
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _RequestQueueHandler(log_queue)
+    queue_handler.addFilter(TracebackRateLimiter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    logging.getLogger("httpx").setLevel(logging.WARNING)   # one INFO line per outbound call; metrics cover it
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)     # drains what is still queued
+
+
+# ── Request ids ───────────────────────────────────────────────────────────
+
+class RequestIdMiddleware:
+    """Adopts an inbound X-Request-ID (or makes one) for the request's log records."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")[:128] or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (b"x-request-id", request_id.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,217 @@
+"""
+Prometheus metrics for the FastAPI services.
+
+- per-route request latency histogram and in-flight gauge (ASGI middleware)
+- Hedera SDK call latency by transaction/query class (timed in pools.run_hedera)
+- MongoDB command latency by command name (pymongo CommandListener)
+- outbound HTTP latency by host (wrapping httpx transport)
+
+`install(app, service)` adds the middleware and a GET /metrics endpoint.
+"""
+import time
+
+import httpx
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from pymongo import monitoring
+from starlette.routing import Match
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Inbound request latency",
+    ["service", "method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Inbound requests currently being handled",
+    ["service", "route"],
+)
+HEDERA_LATENCY = Histogram(
+    "hedera_call_duration_seconds",
+    "Hedera SDK execute() latency",
+    ["operation", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60),
+)
+MONGO_LATENCY = Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency",
+    ["command", "outcome"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+HTTP_CLIENT_LATENCY = Histogram(
+    "http_client_duration_seconds",
+    "Outbound HTTP latency until response headers",
+    ["host", "method", "status"],
+)
+ADMISSION_DECISIONS = Counter(
+    "admission_decisions_total",
+    "Admission control outcomes for fee-spending calls",
+    ["operation", "limiter", "outcome"],       # outcome: admitted | queued | rejected
+)
+ADMISSION_WAIT = Histogram(
+    "admission_wait_seconds",
+    "Time admitted calls waited for a rate-limit token",
+    ["operation"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+ADMISSION_TOKENS = Gauge(
+    "admission_tokens_available",
+    "Tokens left in a shared rate-limit bucket",
+    ["limiter"],
+)
+ADMISSION_WAITING = Gauge(
+    "admission_waiting",
+    "Calls currently queued for a rate-limit token",
+    ["limiter"],
+)
+ADMISSION_USERS = Gauge(
+    "admission_tracked_users",
+    "Per-user rate-limit buckets held in memory",
+)
+SUBMISSION_OUTCOMES = Counter(
+    "hedera_submissions_total",
+    "Asynchronously submitted transactions by final status",
+    ["operation", "status"],                    # status: succeeded | failed
+)
+SUBMISSION_RESOLVE_TIME = Histogram(
+    "hedera_submission_resolve_seconds",
+    "Time from submission until the receipt was known",
+    ["operation"],
+    buckets=(0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60, 120),
+)
+SUBMISSIONS_OPEN = Gauge(
+    "hedera_submissions_open",
+    "Submitted transactions this process is still resolving",
+)
+SSE_STREAMS = Gauge(
+    "sse_streams_open",
+    "Open Server-Sent Event status streams",
+)
+OPERATOR_IN_FLIGHT = Gauge(
+    "operator_in_flight",
+    "Hedera calls currently paid by each pool account",
+    ["account"],
+)
+OPERATOR_HEALTHY = Gauge(
+    "operator_healthy",
+    "1 while a pool account is eligible to pay (not cooling down, enough HBAR)",
+    ["account"],
+)
+OPERATOR_HBAR = Gauge(
+    "operator_hbar_balance",
+    "HBAR balance of each pool account at the last poll",
+    ["account"],
+)
+OPERATOR_FAILURES = Counter(
+    "operator_refusals_total",
+    "Transactions refused for payer-side reasons, by pool account",
+    ["account", "status"],
+)
+INGEST_LAG = Gauge(
+    "mirror_ingest_lag_seconds",
+    "Seconds since the holdings/supply view last caught up with the mirror node",
+)
+
+
+# ── Inbound requests ──────────────────────────────────────────────────────
+
+def _route_template(scope, routes=None) -> str:
+    """Path template of the matching route, so ids do not explode label cardinality."""
+    if routes is None:
+        routes = getattr(getattr(scope.get("app"), "router", None), "routes", [])
+    for route in routes:
+        included = getattr(route, "original_router", None)     # include_router() on newer FastAPI
+        if included is not None:
+            template = _route_template(scope, included.routes)
+            if template != "unmatched":
+                return template
+            continue
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = _route_template(scope)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(self.service, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            route = getattr(scope.get("route"), "path", route)     # set by the router once matched
+            REQUEST_LATENCY.labels(self.service, scope["method"], route, str(status[0])).observe(
+                time.perf_counter() - start
+            )
+
+
+def metrics_endpoint():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def install(app, service: str):
+    app.add_middleware(MetricsMiddleware, service=service)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+
+# ── Hedera SDK ────────────────────────────────────────────────────────────
+
+def hedera_operation(fn) -> str:
+    """`TokenCreateTransaction` for a bound `tx.execute`, else the function name."""
+    owner = getattr(fn, "__self__", None)
+    return type(owner).__name__ if owner is not None else getattr(fn, "__name__", "unknown")
+
+
+# ── MongoDB ───────────────────────────────────────────────────────────────
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Pass via event_listeners=[...] when creating the (motor) client."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_LATENCY.labels(event.command_name, "success").observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_LATENCY.labels(event.command_name, "error").observe(event.duration_micros / 1e6)
+
+
+# ── Outbound HTTP ─────────────────────────────────────────────────────────
+
+class TimedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            HTTP_CLIENT_LATENCY.labels(request.url.host, request.method, status).observe(
+                time.perf_counter() - start
+            )
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,230 @@
+"""
+Bulk NFT minting from an NDJSON or CSV metadata upload.
+
+Each row is one NFT's metadata: for NDJSON a JSON string, an object's
+"metadata" field, or any other JSON value serialized compactly; for CSV
+the "metadata" column, else the first column. Rows are batched by
+position: batch k holds the valid rows among rows k*B+1 .. (k+1)*B, where B
+is NFT_MINT_BATCH_SIZE (at most the network's tokens.nfts.maxBatchSizeMint).
+Up to NFT_MINT_CONCURRENCY batches are in flight while the rest of the body
+is still being read.
+
+Progress is checkpointed per batch under a run id:
+
+    nft_mint_runs      one doc per run: token, batch size, lease, outcome
+    nft_mint_batches   one doc per batch: row range, metadata hash, status, serials
+
+Uploading the same file again with the same run_id skips batches already
+minted and retries failed ones. Because batches are tied to row numbers, a
+fixed invalid row only changes its own batch; a resume whose metadata for
+a minted or unconfirmed batch hashes differently (rows inserted, removed or
+edited, or another file) is refused rather than minting anything twice.
+
+A batch is only marked failed when it provably did not mint: refused at
+precheck, or reached consensus with a failure status. Any other error
+(receipt timeout, lost connection) leaves it unconfirmed, as does a batch
+left pending by a process that died mid-flight. Unconfirmed batches are
+never resubmitted; check them on the mirror node.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+
+import orjson
+from hiero_sdk_python.exceptions import PrecheckError, ReceiptStatusError
+
+from checkpoints import CheckpointedRun, RunConflict
+from clock import utcnow
+
+NFT_MAX_BATCH_SIZE     = 10         # tokens.nfts.maxBatchSizeMint
+NFT_MAX_METADATA_BYTES = 100        # tokens.nfts.maxMetadataBytes
+NFT_MINT_BATCH_SIZE    = min(int(os.getenv("NFT_MINT_BATCH_SIZE", str(NFT_MAX_BATCH_SIZE))), NFT_MAX_BATCH_SIZE)
+NFT_MINT_CONCURRENCY   = int(os.getenv("NFT_MINT_CONCURRENCY", "8"))
+NFT_MINT_LEASE_SECONDS = float(os.getenv("NFT_MINT_LEASE_SECONDS", "120"))
+
+PENDING     = "pending"
+MINTED      = "minted"
+FAILED      = "failed"
+UNCONFIRMED = "unconfirmed"
+
+log = logging.getLogger(__name__)
+
+
+class RunMismatch(RunConflict):
+    """The resumed upload's rows differ from what the run already minted."""
+
+
+def nft_metadata(record, fmt: str) -> bytes:
+    if fmt == "csv":
+        value = record["metadata"] if "metadata" in record else next(iter(record.values()), "")
+    elif isinstance(record, dict) and "metadata" in record:
+        value = record["metadata"]
+    else:
+        value = record
+    data = value.encode() if isinstance(value, str) else orjson.dumps(value)
+    if not data or data == b"null":
+        raise ValueError("empty metadata")
+    if len(data) > NFT_MAX_METADATA_BYTES:
+        raise ValueError(f"metadata is {len(data)} bytes; the network allows {NFT_MAX_METADATA_BYTES}")
+    return data
+
+
+def batch_hash(metadata: list) -> str:
+    digest = hashlib.sha256()
+    for data in metadata:
+        digest.update(len(data).to_bytes(2, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class MintRun(CheckpointedRun):
+    def __init__(self, runs_col, batches_col, token_id: str, mint_batch, run_id: str = None,
+                 concurrency: int = NFT_MINT_CONCURRENCY, admit=None):
+        super().__init__(runs_col, run_id, NFT_MINT_LEASE_SECONDS, admit)
+        self.batches_col = batches_col
+        self.token_id = token_id
+        self.mint_batch = mint_batch        # async (list[bytes]) -> TransactionReceipt
+        self.concurrency = concurrency
+        self.batch_size = NFT_MINT_BATCH_SIZE
+        self.counts = {"rows": 0, "minted": 0, "already_minted": 0, "failed": 0, "unconfirmed": 0, "invalid": 0}
+
+    async def open(self):
+        """Take the run's lease (creating the run if new); raises RunConflict."""
+        existing = await self.runs_col.find_one({"_id": self.run_id}, {"token_id": 1})
+        if existing is not None and existing["token_id"] != self.token_id:
+            raise RunConflict(f"Run {self.run_id} mints {existing['token_id']}, not {self.token_id}")
+        doc = await super().open({"token_id": self.token_id, "batch_size": self.batch_size})
+        self.batch_size = doc["batch_size"]     # a resumed run keeps its original batch boundaries
+
+    # ── Minting ───────────────────────────────────────────────────────────
+
+    async def run(self, records, fmt: str) -> dict:
+        """Mint every row of `records` (uploads.iter_records output) not minted by an earlier attempt."""
+        previous = {
+            b["index"]: b
+            async for b in self.batches_col.find({"run_id": self.run_id}, {"index": 1, "status": 1, "hash": 1})
+        }
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        dispatched = 0
+
+        async def dispatch(index, metadata):
+            nonlocal dispatched
+            dispatched += 1
+            first_row = index * self.batch_size + 1
+            digest = batch_hash(metadata)
+            done = previous.get(index, {})
+            status = done.get("status")
+            if status in (MINTED, PENDING, UNCONFIRMED) and done.get("hash") != digest:
+                raise RunMismatch(
+                    f"Rows {first_row}-{first_row + self.batch_size - 1} differ from the batch run "
+                    f"{self.run_id} already submitted; resume with the original file or start a new run"
+                )
+            if status == MINTED:
+                self.counts["already_minted"] += len(metadata)
+                return
+            if status in (PENDING, UNCONFIRMED):
+                self.counts["unconfirmed"] += len(metadata)
+                self.error(first_row, "batch may have minted in an earlier attempt; check the mirror node")
+                return
+            await semaphore.acquire()       # backpressure: stop reading the upload while the pipeline is full
+
+            async def mint():
+                try:
+                    await self._mint(index, first_row, digest, metadata)
+                finally:
+                    semaphore.release()
+            task = asyncio.create_task(mint())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        index, batch = None, []
+        try:
+            async for row, record, error in records:
+                self.counts["rows"] += 1
+                if error is None:
+                    try:
+                        metadata = nft_metadata(record, fmt)
+                    except (ValueError, TypeError) as e:
+                        error = str(e)
+                if error is not None:
+                    self.counts["invalid"] += 1
+                    self.error(row, error)
+                    continue
+                block = (row - 1) // self.batch_size
+                if block != index:
+                    if batch:
+                        await dispatch(index, batch)
+                    index, batch = block, []
+                batch.append(metadata)
+            if batch:
+                await dispatch(index, batch)
+        finally:
+            # Batches already submitted still record their outcome if the upload broke off,
+            # and the lease is released so the run can be resumed straight away
+            await asyncio.gather(*tasks, return_exceptions=True)
+            status = await self.close()
+        return {
+            "run_id":   self.run_id,
+            "token_id": self.token_id,
+            "status":   status,
+            "batches":  dispatched,
+            **self.counts,
+            "errors":   self.errors,
+        }
+
+    async def _mint(self, index: int, first_row: int, digest: str, metadata: list):
+        last_row = first_row + self.batch_size - 1
+        key = f"{self.run_id}:{first_row}-{last_row}"
+        batch = {"run_id": self.run_id, "index": index, "first_row": first_row, "last_row": last_row,
+                 "count": len(metadata), "hash": digest}
+        await self.throttle()               # one TokenMintTransaction per batch
+        await self.batches_col.update_one(
+            {"_id": key}, {"$set": {**batch, "status": PENDING, "updated_at": utcnow()}}, upsert=True,
+        )
+        try:
+            receipt = await self.mint_batch(metadata)
+        except (PrecheckError, ReceiptStatusError) as e:    # refused, or failed at consensus: nothing minted
+            self.counts["failed"] += len(metadata)
+            self.error(first_row, str(e))
+            await self._settle(key, FAILED, error=str(e))
+            return
+        except Exception as e:      # may have reached consensus; never resubmitted
+            log.warning("Mint batch %s unconfirmed: %s", key, e, extra={"run_id": self.run_id})
+            self.counts["unconfirmed"] += len(metadata)
+            self.error(first_row, f"outcome unknown, check the mirror node: {e}")
+            await self._settle(key, UNCONFIRMED, error=str(e))
+            return
+        self.counts["minted"] += len(metadata)
+        await self._settle(
+            key, MINTED,
+            serials=list(receipt.serial_numbers),
+            transaction_id=str(receipt.transaction_id),
+            error=None,
+        )
+
+    async def _settle(self, key: str, status: str, **fields):
+        await self.batches_col.update_one(
+            {"_id": key}, {"$set": {"status": status, "updated_at": utcnow(), **fields}},
+        )
+        await self.renew()
+
+
+async def ensure_indexes(runs_col, batches_col):
+    await batches_col.create_index([("run_id", 1), ("index", 1)], unique=True)
+
+
+async def run_status(runs_col, batches_col, run_id: str):
+    run = await runs_col.find_one({"_id": run_id}, {"owner": 0})
+    if run is None:
+        return None
+    totals = {}
+    async for group in batches_col.aggregate([
+        {"$match": {"run_id": run_id}},
+        {"$group": {"_id": "$status", "batches": {"$sum": 1}, "nfts": {"$sum": "$count"}}},
+    ]):
+        totals[group["_id"]] = {"batches": group["batches"], "nfts": group["nfts"]}
+    run["run_id"] = run.pop("_id")
+    run["batches"] = totals
+    return run
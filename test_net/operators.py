@@ -0,0 +1,214 @@
+"""
+Pool of payer accounts for Hedera transactions.
+
+One operator paying for every transaction caps throughput at that
+account's throttle and at one client minting its transaction ids.
+OPERATOR_POOL adds payers, each with its own Client:
+
+    OPERATOR_POOL=0.0.5001:302e0201...,0.0.5002:302e0201...
+
+    async with operators.payer() as payer:
+        transaction.freeze_with(payer.client)
+        receipt = await run_hedera(transaction.execute, payer.client, validate_status=True)
+
+The primary operator (OPERATOR_ID) is always a member and stays the
+treasury: it still co-signs what moves its tokens, it just no longer pays
+for everything. payer() hands out the healthy payer with the fewest calls
+in flight (OPERATOR_POOL_STRATEGY=round-robin rotates instead). A payer
+whose transaction is refused for a payer-side reason (BUSY, insufficient
+balance, bad payer signature) sits out OPERATOR_COOLDOWN seconds, and HBAR
+balances are polled every OPERATOR_BALANCE_INTERVAL so payers under
+OPERATOR_MIN_HBAR are skipped. If nobody is eligible the least loaded
+payer is used anyway rather than failing the call here.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from hiero_sdk_python import AccountId, CryptoGetAccountBalanceQuery, Hbar, PrivateKey
+from hiero_sdk_python.exceptions import PrecheckError, ReceiptStatusError
+from hiero_sdk_python.response_code import ResponseCode
+
+from metrics import OPERATOR_FAILURES, OPERATOR_HBAR, OPERATOR_HEALTHY, OPERATOR_IN_FLIGHT
+from pools import run_hedera
+from runtime import runtime
+from simulator import SIMULATOR_NETWORK, new_client
+
+OPERATOR_POOL             = os.getenv("OPERATOR_POOL", "")          # "id:key,id:key"; the primary operator is implied
+OPERATOR_POOL_STRATEGY    = os.getenv("OPERATOR_POOL_STRATEGY", "least-loaded")   # or round-robin
+OPERATOR_COOLDOWN         = float(os.getenv("OPERATOR_COOLDOWN", "10"))
+OPERATOR_BALANCE_INTERVAL = float(os.getenv("OPERATOR_BALANCE_INTERVAL", "60"))
+OPERATOR_MIN_HBAR         = float(os.getenv("OPERATOR_MIN_HBAR", "5"))
+
+# Refusals that say something about the payer rather than the transaction
+PAYER_STATUSES = {
+    ResponseCode.BUSY,
+    ResponseCode.INSUFFICIENT_PAYER_BALANCE,
+    ResponseCode.INSUFFICIENT_TX_FEE,
+    ResponseCode.PAYER_ACCOUNT_NOT_FOUND,
+    ResponseCode.PAYER_ACCOUNT_DELETED,
+    ResponseCode.INVALID_PAYER_SIGNATURE,
+}
+
+log = logging.getLogger(__name__)
+
+
+def parse_pool(spec: str) -> list:
+    """[(AccountId, PrivateKey)] from "0.0.n:key,0.0.m:key"."""
+    members = []
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        account_id, _, key = entry.partition(":")
+        if not key:
+            raise ValueError(f"OPERATOR_POOL entry {account_id!r} has no key (expected id:key)")
+        members.append((AccountId.from_string(account_id.strip()), PrivateKey.from_string(key.strip())))
+    return members
+
+
+class Payer:
+    def __init__(self, account_id: AccountId, key: PrivateKey, client):
+        self.account_id = account_id
+        self.key = key
+        self.client = client
+        self.in_flight = 0
+        self.submitted = 0
+        self.failures = 0           # consecutive payer-side refusals
+        self.cooldown_until = 0.0
+        self.hbar = None            # tinybars at the last balance poll
+        self.last_error = None
+
+    def eligible(self, now: float) -> bool:
+        low = self.hbar is not None and self.hbar < Hbar(OPERATOR_MIN_HBAR).to_tinybars()
+        return now >= self.cooldown_until and not low
+
+    def status(self) -> dict:
+        return {
+            "account_id":  str(self.account_id),
+            "healthy":     self.eligible(time.monotonic()),
+            "in_flight":   self.in_flight,
+            "submitted":   self.submitted,
+            "failures":    self.failures,
+            "cooldown_s":  round(max(0.0, self.cooldown_until - time.monotonic()), 1),
+            "hbar":        str(Hbar.from_tinybars(self.hbar)) if self.hbar is not None else None,
+            "last_error":  self.last_error,
+        }
+
+
+class OperatorPool:
+    def __init__(self, spec: str = OPERATOR_POOL, strategy: str = OPERATOR_POOL_STRATEGY):
+        self.spec = spec
+        self.strategy = strategy
+        self.payers = []
+        self._turn = itertools.count()
+        self._task = None
+
+    def __len__(self):
+        return len(self.payers)
+
+    # ── Setup ─────────────────────────────────────────────────────────────
+
+    def bind(self, hedera):
+        """runtime.on_ready("hedera") callback: the primary now, the rest once their clients are up."""
+        client, operator_id, operator_key = hedera
+        self.payers = [self._register(Payer(operator_id, operator_key, client))]
+        runtime.spawn(self._connect(client))
+
+    def _register(self, payer: Payer) -> Payer:
+        account = str(payer.account_id)
+        OPERATOR_IN_FLIGHT.labels(account).set_function(lambda: payer.in_flight)
+        OPERATOR_HEALTHY.labels(account).set_function(lambda: payer.eligible(time.monotonic()))
+        OPERATOR_HBAR.labels(account).set_function(lambda: (payer.hbar or 0) / 1e8)
+        return payer
+
+    async def _connect(self, primary_client):
+        network = primary_client.network.network
+        simulator = getattr(primary_client, "simulator", None) if network == SIMULATOR_NETWORK else None
+        known = {str(p.account_id) for p in self.payers}
+        try:
+            members = [(a, k) for a, k in parse_pool(self.spec) if str(a) not in known]
+        except ValueError as e:
+            log.error("OPERATOR_POOL ignored: %s", e)
+            members = []
+        for account_id, key in members:
+            try:
+                client = await asyncio.to_thread(new_client, network, account_id, key, simulator)
+            except Exception as e:
+                log.warning("Payer %s unavailable: %s", account_id, e)
+                continue
+            self.payers.append(self._register(Payer(account_id, key, client)))
+        if members:
+            log.info("Operator pool: %d payers (%s)", len(self.payers), self.strategy)
+        await self.stop()
+        self._task = runtime.spawn(self._balance_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ── Health ────────────────────────────────────────────────────────────
+
+    async def refresh_balances(self):
+        async def poll(payer):
+            try:
+                query = CryptoGetAccountBalanceQuery().set_account_id(payer.account_id)
+                balance = await run_hedera(query.execute, payer.client)
+                payer.hbar = balance.hbars.to_tinybars()
+            except Exception as e:
+                payer.last_error = str(e)
+                log.warning("Balance poll for payer %s failed: %s", payer.account_id, e)
+        await asyncio.gather(*(poll(p) for p in list(self.payers)))
+
+    async def _balance_loop(self):
+        while True:
+            await self.refresh_balances()
+            await asyncio.sleep(OPERATOR_BALANCE_INTERVAL)
+
+    def _refused(self, payer: Payer, status: ResponseCode):
+        payer.failures += 1
+        payer.last_error = status.name
+        payer.cooldown_until = time.monotonic() + OPERATOR_COOLDOWN
+        OPERATOR_FAILURES.labels(str(payer.account_id), status.name).inc()
+        log.warning("Payer %s refused (%s); cooling down %ss", payer.account_id, status.name, OPERATOR_COOLDOWN)
+
+    # ── Scheduling ────────────────────────────────────────────────────────
+
+    def pick(self) -> Payer:
+        if not self.payers:
+            raise RuntimeError("Hedera client not initialized")
+        now = time.monotonic()
+        candidates = [p for p in self.payers if p.eligible(now)] or self.payers
+        if self.strategy == "round-robin":
+            return candidates[next(self._turn) % len(candidates)]
+        turn = next(self._turn)     # rotates ties, so an idle pool still spreads the load
+        n = len(candidates)
+        return candidates[min(range(n), key=lambda i: (candidates[i].in_flight, (i - turn) % n))]
+
+    @asynccontextmanager
+    async def payer(self):
+        """Lend a payer for one submission; payer-side refusals put it on cooldown."""
+        payer = self.pick()
+        payer.in_flight += 1
+        try:
+            yield payer
+            payer.failures = 0
+        except (PrecheckError, ReceiptStatusError) as e:
+            if e.status in PAYER_STATUSES:
+                self._refused(payer, ResponseCode(e.status))
+            raise
+        finally:
+            payer.in_flight -= 1
+            payer.submitted += 1
+
+    def status(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "payers":   [p.status() for p in self.payers],
+        }
+
+
+operators = OperatorPool()
+runtime.on_ready("hedera", operators.bind)
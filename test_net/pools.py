@@ -0,0 +1,68 @@
+"""
+Process-wide I/O pools shared by the FastAPI services.
+
+- one keep-alive httpx.AsyncClient for every outbound HTTP call
+  (mirror node, Auth0), so connections are reused instead of re-opened
+- one bounded thread pool for the blocking Hedera SDK calls, so a slow
+  consensus round cannot eat Starlette's request threadpool
+
+run_hedera is also the seam for the offline simulator: a `tx.execute`
+bound for a SimulatedClient is served by its in-memory ledger instead
+(still on the same executor, so pool saturation shows up in capacity runs).
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import httpx
+
+from metrics import HEDERA_LATENCY, TimedTransport, hedera_operation
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE   = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_TIMEOUT         = float(os.getenv("HTTP_TIMEOUT", "10"))
+HEDERA_MAX_WORKERS   = int(os.getenv("HEDERA_MAX_WORKERS", "16"))
+
+hedera_executor = ThreadPoolExecutor(max_workers=HEDERA_MAX_WORKERS, thread_name_prefix="hedera")
+
+_http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared pooled client, created on first use inside the running loop."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            ),
+        )
+        _http_client = httpx.AsyncClient(transport=TimedTransport(transport), timeout=HTTP_TIMEOUT)
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def run_hedera(fn, *args, **kwargs):
+    """Run a blocking Hedera SDK call (execute, queries) on the bounded executor."""
+    loop = asyncio.get_running_loop()
+    operation = hedera_operation(fn)
+    owner = getattr(fn, "__self__", None)
+    if args and getattr(args[0], "is_simulated", False) and owner is not None:
+        fn, args = args[0].simulator.execute, (owner,)
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        result = await loop.run_in_executor(hedera_executor, partial(fn, *args, **kwargs))
+        outcome = "success"
+        return result
+    finally:
+        HEDERA_LATENCY.labels(operation, outcome).observe(time.perf_counter() - start)
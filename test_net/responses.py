@@ -0,0 +1,147 @@
+"""
+Fast JSON rendering and negotiated response compression.
+
+- FastJSONResponse renders with orjson. Endpoints that return one directly
+  (instead of a plain list/dict) also skip FastAPI's jsonable_encoder pass,
+  which is most of the cost for large lists of pymongo dicts.
+- dumps() is the shared orjson encoder (bytes out, unknown types -> str).
+- CompressionMiddleware applies brotli (if installed) or gzip to responses
+  above COMPRESSION_MIN_SIZE, per the request's Accept-Encoding. Streaming
+  bodies (NDJSON) are compressed chunk by chunk with a flush each time so
+  they stay incremental. Responses that already carry Content-Encoding are
+  passed through, which lets cached payloads be compressed once up front
+  via encode_body().
+"""
+import os
+import zlib
+
+import orjson
+from fastapi.responses import JSONResponse
+
+try:
+    import brotli
+except ImportError:     # optional: gzip only
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL           = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY       = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/plain", "text/html", "text/csv")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=str)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+# ── Encoding negotiation ──────────────────────────────────────────────────
+
+def choose_encoding(accept_encoding: str):
+    """'br', 'gzip' or None for an Accept-Encoding header value (q=0 excludes)."""
+    offered = {}
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name] = q
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if offered.get(encoding, offered.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._compress, self._flush, self._finish = self._c.process, self._c.flush, self._c.finish
+        else:
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)    # 31 = gzip container
+            self._compress = self._c.compress
+            self._flush = lambda: self._c.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._c.flush
+
+    def chunk(self, data: bytes, final: bool) -> bytes:
+        out = self._compress(data)
+        return out + (self._finish() if final else self._flush())
+
+
+def encode_body(body: bytes, encoding: str) -> bytes:
+    """One-shot compression, e.g. for a cached payload."""
+    return _Compressor(encoding).chunk(body, final=True)
+
+
+# ── Middleware ────────────────────────────────────────────────────────────
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = dict(scope["headers"])
+        encoding = choose_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (b"content-encoding" in headers
+                        or message["status"] in (204, 304)
+                        or not content_type.startswith(COMPRESSIBLE_TYPES)):
+                    await send(message)
+                    return
+                start = message             # held until we see the first body chunk
+                return
+
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    await send(start)
+                    start = None
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding)
+                vary = [v for k, v in start.get("headers", []) if k.lower() == b"vary"] + [b"Accept-Encoding"]
+                headers = [(k, v) for k, v in start.get("headers", [])
+                           if k.lower() not in (b"content-length", b"vary")]
+                headers += [(b"content-encoding", encoding.encode()), (b"vary", b", ".join(vary))]
+                payload = compressor.chunk(body, final=not more_body)
+                if not more_body:
+                    headers.append((b"content-length", str(len(payload)).encode()))
+                await send({**start, "headers": headers})
+                await send({"type": "http.response.body", "body": payload, "more_body": more_body})
+                return
+
+            await send({"type": "http.response.body",
+                        "body": compressor.chunk(body, final=not more_body),
+                        "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,198 @@
+"""
+Process-wide connections to MongoDB and Hedera, opened in the lifespan.
+
+Nothing connects at import, so importing a service is cheap and safe to
+do before a pre-fork. `runtime.start()` (from the app lifespan) connects
+both dependencies concurrently and waits at most STARTUP_TIMEOUT for them;
+one that is still down keeps retrying in the background with backoff, so
+an outage at boot no longer leaves the service without a database for the
+life of the process. Once connected, motor reconnects on its own; /ready
+keeps probing and reports it down meanwhile.
+
+Service modules register `runtime.on_ready(name, bind)` callbacks; each
+successful (re)connect calls them with the new value so the module can set
+its globals and `runtime.spawn()` background work such as index builds.
+`runtime.install(app)` adds GET /ready with per-dependency status.
+"""
+import asyncio
+import logging
+import os
+
+from fastapi.responses import JSONResponse
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from clock import utcnow
+import metrics
+from simulator import client_from_env
+
+STARTUP_TIMEOUT     = float(os.getenv("STARTUP_TIMEOUT", "5"))
+RECONNECT_MIN_DELAY = float(os.getenv("RECONNECT_MIN_DELAY", "1"))
+RECONNECT_MAX_DELAY = float(os.getenv("RECONNECT_MAX_DELAY", "30"))
+MONGO_PING_TIMEOUT  = float(os.getenv("MONGO_PING_TIMEOUT", "2"))
+
+DOWN       = "down"
+CONNECTING = "connecting"
+UP         = "up"
+
+log = logging.getLogger(__name__)
+
+
+
+# ── Connectors ────────────────────────────────────────────────────────────
+
+async def connect_mongo():
+    # Read at connect time: the services load .env after importing this module.
+    # Client construction resolves mongodb+srv:// seed lists synchronously.
+    mongo = await asyncio.to_thread(
+        AsyncIOMotorClient, os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+        event_listeners=[metrics.MongoCommandTimer()],
+        serverSelectionTimeoutMS=int(MONGO_PING_TIMEOUT * 1000),
+    )
+    try:
+        await mongo.admin.command("ping")
+    except Exception:
+        mongo.close()
+        raise
+    return mongo
+
+
+async def check_mongo(mongo):
+    await asyncio.wait_for(mongo.admin.command("ping"), MONGO_PING_TIMEOUT)
+
+
+async def connect_hedera():
+    # Client.for_testnet() fetches the node list from the mirror node (blocking)
+    return await asyncio.to_thread(client_from_env)
+
+
+# ── Dependencies ──────────────────────────────────────────────────────────
+
+class Dependency:
+    def __init__(self, name: str, connect, check=None):
+        self.name = name
+        self.connect = connect
+        self.check = check          # optional liveness probe for /ready
+        self.value = None
+        self.state = DOWN
+        self.error = None
+        self.attempts = 0
+        self.since = utcnow()
+        self.listeners = []
+        self._task = None
+
+    def _set(self, state: str, error: str = None):
+        if state != self.state:
+            self.since = utcnow()
+        self.state = state
+        self.error = error
+
+    def provide(self, value):
+        """Mark as connected with `value` and notify listeners."""
+        self.value = value
+        self._set(UP)
+        for bind in self.listeners:
+            bind(value)
+
+    async def _connect_loop(self):
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            self.attempts += 1
+            self._set(CONNECTING, self.error)
+            try:
+                value = await self.connect()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._set(DOWN, str(e))
+                log.warning("%s unavailable (attempt %d): %s; retrying in %gs", self.name, self.attempts, e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                continue
+            log.info("%s connected.", self.name)
+            self.provide(value)
+            return
+
+    def start(self):
+        if self.state != UP and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._connect_loop())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def status(self) -> dict:
+        # Once connected, the driver reconnects by itself; just report what the probe sees
+        if self.value is not None and self.check is not None:
+            try:
+                await self.check(self.value)
+                self._set(UP)
+            except Exception as e:
+                self._set(DOWN, str(e) or type(e).__name__)
+        return {"status": self.state, "since": self.since, "attempts": self.attempts, "error": self.error}
+
+
+class Runtime:
+    def __init__(self):
+        self.dependencies = {
+            "mongo":  Dependency("MongoDB", connect_mongo, check_mongo),
+            "hedera": Dependency("Hedera client", connect_hedera),
+        }
+        self._background = set()
+        self._users = 0
+
+    def on_ready(self, name: str, bind):
+        dependency = self.dependencies[name]
+        dependency.listeners.append(bind)
+        if dependency.state == UP:
+            bind(dependency.value)
+
+    def provide(self, name: str, value):
+        """Inject an already-built dependency (tests, benchmarks, simulators)."""
+        self.dependencies[name].provide(value)
+
+    def spawn(self, coro):
+        """Run background work (e.g. index builds) owned by the runtime."""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def start(self):
+        """Connect everything concurrently; co-hosted apps share one start."""
+        self._users += 1
+        if self._users > 1:
+            return
+        tasks = [t for t in (d.start() for d in self.dependencies.values()) if t is not None]
+        if tasks:
+            await asyncio.wait(tasks, timeout=STARTUP_TIMEOUT)
+
+    async def stop(self):
+        self._users = max(0, self._users - 1)
+        if self._users:
+            return
+        for dependency in self.dependencies.values():
+            await dependency.stop()
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+
+    async def ready(self) -> dict:
+        statuses = dict(zip(
+            self.dependencies,
+            await asyncio.gather(*(d.status() for d in self.dependencies.values())),
+        ))
+        ready = all(s["status"] == UP for s in statuses.values())
+        return {"status": "ready" if ready else "not_ready", "dependencies": statuses}
+
+    def install(self, app):
+        async def ready_endpoint():
+            report = await self.ready()
+            return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
+
+        app.add_api_route("/ready", ready_endpoint, methods=["GET"], include_in_schema=False)
+
+
+runtime = Runtime()
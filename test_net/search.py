@@ -0,0 +1,241 @@
+"""
+In-memory inverted index over marketplace listings.
+
+Indexes name, symbol, description and category (per-field weights, BM25
+term saturation and idf) and keeps a sorted term list for prefix lookups,
+so both ranked search and search-as-you-type autocomplete are dictionary
+and bisect work, no MongoDB round trip.
+
+The token API loads it from marketplace_col once MongoDB is up, adds each
+listing it creates, and polls for listings created by other processes every
+SEARCH_REFRESH_INTERVAL. A poll reads by _id, whose ObjectId is stamped
+when the driver inserts the doc (not when an import built it, as with
+created_at), from SEARCH_REFRESH_LOOKBACK before the previous poll started,
+so inserts that land late or from a skewed clock are still picked up;
+listings already indexed are skipped.
+"""
+import asyncio
+import bisect
+import heapq
+import logging
+import math
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+SEARCH_REFRESH_INTERVAL = float(os.getenv("SEARCH_REFRESH_INTERVAL", "30"))
+SEARCH_REFRESH_LOOKBACK = float(os.getenv("SEARCH_REFRESH_LOOKBACK", "60"))
+
+FIELD_WEIGHTS = {"symbol": 4.0, "name": 3.0, "category": 2.0, "description": 1.0}
+SUGGEST_FIELDS = ("symbol", "name")
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_TERMS = 50       # expansions of a partial last word
+MAX_CACHED_QUERIES = 1024
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+log = logging.getLogger(__name__)
+
+
+def tokenize(text) -> list:
+    return _TOKEN_RE.findall(str(text or "").lower())
+
+
+class SearchIndex:
+    def __init__(self):
+        self.postings = {}      # term -> {token_id: {field: tf}}
+        self.terms = []         # sorted, for prefix ranges
+        self.docs = {}          # token_id -> {"name", "symbol", "category", "lengths": {field: n}, "terms"}
+        self.total_length = {f: 0 for f in FIELD_WEIGHTS}
+        self.since = None       # next poll reads listings whose _id was stamped after this
+        self._term_scores = {}  # term -> {token_id: weighted BM25}; dropped on every change
+        self._results = {}      # (kind, query, ...) -> results; dropped on every change
+        self._bulk = False      # initial load: terms is rebuilt once at the end
+        self._task = None
+
+    def __len__(self):
+        return len(self.docs)
+
+    # ── Maintenance ───────────────────────────────────────────────────────
+
+    def add(self, doc: dict):
+        token_id = doc["token_id"]
+        if token_id in self.docs:
+            self.remove(token_id)
+        self._invalidate()
+        lengths = {}
+        terms = set()
+        for field in FIELD_WEIGHTS:
+            words = tokenize(doc.get(field))
+            lengths[field] = len(words)
+            self.total_length[field] += len(words)
+            terms.update(words)
+            for word in words:
+                entry = self.postings.get(word)
+                if entry is None:
+                    entry = self.postings[word] = {}
+                    if not self._bulk:
+                        bisect.insort(self.terms, word)
+                fields = entry.setdefault(token_id, {})
+                fields[field] = fields.get(field, 0) + 1
+        self.docs[token_id] = {
+            "name":     doc.get("name"),
+            "symbol":   doc.get("symbol"),
+            "category": doc.get("category"),
+            "lengths":  lengths,
+            "terms":    terms,
+        }
+
+    def remove(self, token_id: str):
+        doc = self.docs.pop(token_id, None)
+        if doc is None:
+            return
+        self._invalidate()
+        for field, n in doc["lengths"].items():
+            self.total_length[field] -= n
+        for word in doc["terms"]:
+            entry = self.postings.get(word)
+            if entry is not None and entry.pop(token_id, None) is not None and not entry:
+                del self.postings[word]
+                if not self._bulk:
+                    self.terms.pop(bisect.bisect_left(self.terms, word))
+
+    def _invalidate(self):
+        # idf and average field lengths move with every add/remove
+        self._term_scores.clear()
+        self._results.clear()
+
+    def _remember(self, key, results):
+        if len(self._results) >= MAX_CACHED_QUERIES:
+            self._results.clear()
+        self._results[key] = results
+        return results
+
+    async def load(self, marketplace_col):
+        started = datetime.now(timezone.utc)
+        query = {"_id": {"$gt": ObjectId.from_datetime(self.since)}} if self.since else {}
+        projection = {"_id": 0, "token_id": 1, **{f: 1 for f in FIELD_WEIGHTS}}
+        n = 0
+        # an insort per new term is quadratic over a cold start; sort once instead
+        self._bulk = not self.terms
+        try:
+            async for doc in marketplace_col.find(query, projection):
+                if doc["token_id"] in self.docs:
+                    continue        # seen by an earlier poll or added locally; listing text never changes
+                self.add(doc)
+                n += 1
+        finally:
+            if self._bulk:
+                self.terms = sorted(self.postings)
+                self._bulk = False
+        self.since = started - timedelta(seconds=SEARCH_REFRESH_LOOKBACK)
+        return n
+
+    async def _refresh_loop(self, marketplace_col):
+        while True:
+            try:
+                await self.load(marketplace_col)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Search index refresh failed: %s", e)
+            await asyncio.sleep(SEARCH_REFRESH_INTERVAL)
+
+    def start(self, marketplace_col):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop(marketplace_col))
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ── Queries ───────────────────────────────────────────────────────────
+
+    def _prefix_terms(self, prefix: str) -> list:
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\uffff")
+        candidates = self.terms[start:end]
+        if len(candidates) <= MAX_PREFIX_TERMS:
+            return candidates
+        # keep the expansions most listings use, not the alphabetically first
+        return heapq.nlargest(MAX_PREFIX_TERMS, candidates, key=lambda term: len(self.postings[term]))
+
+    def _term_score(self, term: str) -> dict:
+        cached = self._term_scores.get(term)
+        if cached is not None:
+            return cached
+        entry = self.postings.get(term, {})
+        n = len(self.docs)
+        idf = math.log(1 + (n - len(entry) + 0.5) / (len(entry) + 0.5))
+        avg = {f: self.total_length[f] / n or 1 for f in FIELD_WEIGHTS}
+        result = {}
+        for token_id, fields in entry.items():
+            lengths = self.docs[token_id]["lengths"]
+            score = 0.0
+            for field, tf in fields.items():
+                norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[field] / avg[field]))
+                score += FIELD_WEIGHTS[field] * norm
+            result[token_id] = idf * score
+        self._term_scores[term] = result
+        return result
+
+    def _score_term(self, scores: dict, term: str, discount: float = 1.0):
+        for token_id, score in self._term_score(term).items():
+            scores[token_id] = scores.get(token_id, 0.0) + score * discount
+
+    def search(self, query: str, limit: int = 20, category: str = None) -> list:
+        """[(token_id, score)] best first. The last word also matches as a prefix."""
+        words = tokenize(query)
+        if not words or not self.docs:
+            return []
+        key = ("search", tuple(words), limit, category)
+        if key in self._results:
+            return self._results[key]
+        scores = {}
+        for word in words[:-1]:
+            self._score_term(scores, word)
+        last = words[-1]
+        self._score_term(scores, last)
+        for term in self._prefix_terms(last):
+            if term != last:
+                self._score_term(scores, term, discount=len(last) / len(term))
+        if category:
+            scores = {t: s for t, s in scores.items() if self.docs[t]["category"] == category}
+        return self._remember(key, heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0])))
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        """Listings whose name or symbol has a word starting with the typed text."""
+        words = tokenize(prefix)
+        if not words:
+            return []
+        key = ("suggest", tuple(words), limit)
+        if key in self._results:
+            return self._results[key]
+        head, last = words[:-1], words[-1]
+        ranked = {}
+        for term in self._prefix_terms(last):
+            for token_id, fields in self.postings[term].items():
+                for field in SUGGEST_FIELDS:
+                    if field not in fields:
+                        continue
+                    # exact symbol beats a name prefix; shorter completions first
+                    score = FIELD_WEIGHTS[field] * len(last) / len(term)
+                    ranked[token_id] = max(ranked.get(token_id, 0.0), score)
+        if head:
+            # earlier words must appear in name/symbol as whole words
+            ranked = {
+                t: s for t, s in ranked.items()
+                if all(set(self.postings.get(w, {}).get(t, {})) & set(SUGGEST_FIELDS) for w in head)
+            }
+        best = heapq.nsmallest(limit, ranked.items(), key=lambda item: (-item[1], self.docs[item[0]]["name"] or ""))
+        return self._remember(key, [
+            {"token_id": t, "name": self.docs[t]["name"], "symbol": self.docs[t]["symbol"],
+             "category": self.docs[t]["category"]}
+            for t, _ in best
+        ])
@@ -0,0 +1,37 @@
+"""
+Token API and onboarding API co-hosted in one ASGI app.
+
+    uvicorn server:app --port 8000 --workers 4
+    python server.py                    # PORT / WEB_CONCURRENCY from the environment
+
+Both route sets share one MongoDB pool, one Hedera client, one outbound
+HTTP pool and one /metrics + /ready. Point both the token API URL and
+the onboarding URL of the frontend/Express backend at this port.
+testnet_test:app (:8000) and user_onboarding:app (:8002) still run
+standalone.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from logs import setup_logging  # noqa: E402
+
+setup_logging("fractok")        # before the services stamp their own name
+
+import testnet_test        # noqa: E402  (modules read .env at import)
+import user_onboarding     # noqa: E402
+from app_factory import create_app  # noqa: E402
+
+app = create_app(testnet_test.service, user_onboarding.service, name="fractok")
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+    )
@@ -0,0 +1,445 @@
+"""
+In-process Hedera network simulator for offline tests and capacity planning.
+
+SimulatedClient is a real hiero `Client` (so freeze_with, signing and the
+isinstance checks in the SDK all work) pointed at a single placeholder node
+that is never dialled. pools.run_hedera recognises it and hands the frozen
+transaction or query to the shared Simulator instead of calling execute(),
+which keeps every service code path unchanged.
+
+Supported: TokenCreate, TokenMint, Transfer (hbar + fungible tokens,
+lazy-create on an EVM alias), AccountCreate, CryptoGetAccountBalanceQuery
+and AccountInfoQuery. Ledger state lives in memory for the process.
+execute(wait_for_receipt=False) returns a SimulatedResponse whose
+get_receipt() waits out the consensus latency, as with the real SDK.
+
+Not modelled: signature checks, token association/KYC/freeze, NFTs in
+transfers, fee schedules (a flat fee is charged to the payer).
+
+Select it with NETWORK=simulator; see client_from_env().
+"""
+import os
+import random
+import threading
+import time
+
+from hiero_sdk_python import (
+    AccountCreateTransaction,
+    AccountId,
+    AccountInfoQuery,
+    Client,
+    CryptoGetAccountBalanceQuery,
+    Hbar,
+    Network,
+    PrivateKey,
+    TokenCreateTransaction,
+    TokenId,
+    TokenMintTransaction,
+    TransferTransaction,
+)
+from hiero_sdk_python.account.account_balance import AccountBalance
+from hiero_sdk_python.account.account_info import AccountInfo
+from hiero_sdk_python.exceptions import PrecheckError, ReceiptStatusError
+from hiero_sdk_python.hapi.services import transaction_receipt_pb2
+from hiero_sdk_python.node import _Node
+from hiero_sdk_python.response_code import ResponseCode
+from hiero_sdk_python.tokens.supply_type import SupplyType
+from hiero_sdk_python.tokens.token_type import TokenType
+from hiero_sdk_python.transaction.transaction_receipt import TransactionReceipt
+
+from admission import TokenBucket
+
+SIMULATOR_NETWORK = "simulator"
+
+SIM_CONSENSUS_LATENCY = float(os.getenv("SIM_CONSENSUS_LATENCY", "0"))     # seconds per transaction
+SIM_QUERY_LATENCY     = float(os.getenv("SIM_QUERY_LATENCY", "0"))         # seconds per query
+SIM_LATENCY_JITTER    = float(os.getenv("SIM_LATENCY_JITTER", "0.2"))      # +/- fraction of the latency
+SIM_TPS               = float(os.getenv("SIM_TPS", "0"))                   # 0 = unthrottled
+SIM_QPS               = float(os.getenv("SIM_QPS", "0"))
+SIM_PAYER_TPS         = float(os.getenv("SIM_PAYER_TPS", "0"))             # per paying account; 0 = unthrottled
+SIM_BUSY_TIMEOUT      = float(os.getenv("SIM_BUSY_TIMEOUT", "8"))          # longest wait before BUSY
+SIM_TX_FEE_TINYBARS   = int(os.getenv("SIM_TX_FEE_TINYBARS", "100000"))    # 0.001 HBAR
+SIM_OPERATOR_HBAR     = int(os.getenv("SIM_OPERATOR_HBAR", "1000000"))
+
+FIRST_ENTITY_NUM = 1001
+
+
+# ── Ledger ────────────────────────────────────────────────────────────────
+
+class SimulationError(Exception):
+    """A transaction that reached consensus but failed; carries the receipt status."""
+
+    def __init__(self, status: ResponseCode):
+        self.status = status
+        super().__init__(status.name)
+
+
+class SimulatedResponse:
+    """
+    What execute(wait_for_receipt=False) returns: the transaction passed
+    precheck and reaches consensus SIM_CONSENSUS_LATENCY later. The ledger
+    change is applied by the first get_receipt() after that point, which
+    blocks until then, like polling the real receipt query.
+    """
+
+    def __init__(self, simulator, executable, handler):
+        self.simulator = simulator
+        self.transaction_id = executable.transaction_id
+        self._executable = executable
+        self._handler = handler
+        self._consensus_at = time.monotonic() + simulator._jittered(simulator.consensus_latency)
+        self._receipt = None
+        self._lock = threading.Lock()
+
+    def get_receipt(self, client=None, timeout=None, validate_status: bool = False) -> TransactionReceipt:
+        with self._lock:
+            if self._receipt is None:
+                remaining = self._consensus_at - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+                self._receipt = self.simulator._reach_consensus(self._executable, self._handler)
+        receipt = self._receipt
+        if validate_status and receipt.status != ResponseCode.SUCCESS:
+            raise ReceiptStatusError(receipt.status, self.transaction_id, receipt)
+        return receipt
+
+
+class Simulator:
+    def __init__(
+        self,
+        consensus_latency: float = SIM_CONSENSUS_LATENCY,
+        query_latency: float = SIM_QUERY_LATENCY,
+        jitter: float = SIM_LATENCY_JITTER,
+        tps: float = SIM_TPS,
+        qps: float = SIM_QPS,
+        payer_tps: float = SIM_PAYER_TPS,
+        busy_timeout: float = SIM_BUSY_TIMEOUT,
+        tx_fee: int = SIM_TX_FEE_TINYBARS,
+    ):
+        self.consensus_latency = consensus_latency
+        self.query_latency = query_latency
+        self.jitter = jitter
+        self.tx_throttle = TokenBucket(tps)
+        self.query_throttle = TokenBucket(qps)
+        self.payer_tps = payer_tps
+        self.payer_throttles = {}   # payer "0.0.n" -> TokenBucket
+        self.busy_timeout = busy_timeout
+        self.tx_fee = tx_fee
+        self.accounts = {}      # "0.0.n" -> {"hbar", "tokens", "key", "evm_address", "memo"}
+        self.aliases = {}       # evm address hex -> "0.0.n"
+        self.tokens = {}        # "0.0.n" -> token record
+        self._next_num = FIRST_ENTITY_NUM
+        self._lock = threading.Lock()
+        self.handlers = {
+            TokenCreateTransaction:       self._token_create,
+            TokenMintTransaction:         self._token_mint,
+            TransferTransaction:          self._transfer,
+            AccountCreateTransaction:     self._account_create,
+            CryptoGetAccountBalanceQuery: self._balance,
+            AccountInfoQuery:             self._account_info,
+        }
+
+    # -- entry point (runs on the hedera executor, like the real execute()) --
+
+    def execute(self, executable, validate_status: bool = False, wait_for_receipt: bool = True, **_):
+        if isinstance(executable, SimulatedResponse):     # response.get_receipt(client, ...)
+            return executable.get_receipt(validate_status=validate_status)
+        handler = self.handlers.get(type(executable))
+        if handler is None:
+            raise NotImplementedError(f"Simulator does not support {type(executable).__name__}")
+
+        is_query = isinstance(executable, (CryptoGetAccountBalanceQuery, AccountInfoQuery))
+        tx_id = None if is_query else executable.transaction_id
+        bucket = self.query_throttle if is_query else self.tx_throttle
+        wait = bucket.reserve(self.busy_timeout)
+        if wait is None:
+            raise PrecheckError(ResponseCode.BUSY, tx_id)
+        if not is_query and self.payer_tps > 0:
+            payer_wait = self._payer_throttle(tx_id.account_id).reserve(self.busy_timeout)
+            if payer_wait is None:
+                bucket.refund()
+                raise PrecheckError(ResponseCode.BUSY, tx_id)
+            wait = max(wait, payer_wait)
+
+        if is_query:
+            self._sleep(wait + self.query_latency)
+            with self._lock:
+                return handler(executable)
+        self._sleep(wait)
+        response = SimulatedResponse(self, executable, handler)
+        if not wait_for_receipt:
+            return response
+        return response.get_receipt(validate_status=validate_status)
+
+    def _payer_throttle(self, account_id) -> TokenBucket:
+        key = str(account_id)
+        with self._lock:
+            throttle = self.payer_throttles.get(key)
+            if throttle is None:
+                throttle = self.payer_throttles[key] = TokenBucket(self.payer_tps)
+            return throttle
+
+    def _reach_consensus(self, executable, handler) -> TransactionReceipt:
+        tx_id = executable.transaction_id
+        with self._lock:
+            self._charge_fee(tx_id.account_id, tx_id)
+            try:
+                fields = handler(executable) or {}
+                status = ResponseCode.SUCCESS
+            except SimulationError as e:
+                fields, status = {}, e.status
+        return TransactionReceipt(
+            transaction_receipt_pb2.TransactionReceipt(status=status, **fields), tx_id
+        )
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter) if seconds > 0 else 0.0
+
+    def _sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(self._jittered(seconds))
+
+    # -- ledger helpers (callers hold self._lock) --
+
+    def _new_num(self) -> int:
+        num = self._next_num
+        self._next_num += 1
+        return num
+
+    def _add_account(self, hbar: int = 0, key=None, evm_address: str = None, memo: str = "",
+                     account_id: str = None) -> str:
+        account_id = account_id or f"0.0.{self._new_num()}"
+        self.accounts[account_id] = {
+            "hbar":        hbar,
+            "tokens":      {},
+            "key":         key,
+            "evm_address": evm_address,
+            "memo":        memo,
+        }
+        if evm_address:
+            self.aliases[evm_address] = account_id
+        return account_id
+
+    def _resolve(self, account_id: AccountId):
+        """Ledger id for an AccountId, following EVM aliases; None if it does not exist."""
+        if account_id.evm_address is not None:
+            return self.aliases.get(account_id.evm_address.to_string())
+        key = f"{account_id.shard}.{account_id.realm}.{account_id.num}"
+        return key if key in self.accounts else None
+
+    def _charge_fee(self, payer: AccountId, tx_id):
+        payer_id = self._resolve(payer)
+        if payer_id is None:
+            raise PrecheckError(ResponseCode.PAYER_ACCOUNT_NOT_FOUND, tx_id)
+        if self.accounts[payer_id]["hbar"] < self.tx_fee:
+            raise PrecheckError(ResponseCode.INSUFFICIENT_PAYER_BALANCE, tx_id)
+        self.accounts[payer_id]["hbar"] -= self.tx_fee
+
+    def _token(self, token_id: TokenId) -> dict:
+        token = self.tokens.get(str(token_id))
+        if token is None:
+            raise SimulationError(ResponseCode.INVALID_TOKEN_ID)
+        return token
+
+    # -- transactions (return receipt proto fields) --
+
+    def _token_create(self, tx):
+        params = tx._token_params
+        treasury = self._resolve(params.treasury_account_id)
+        if treasury is None:
+            raise SimulationError(ResponseCode.INVALID_TREASURY_ACCOUNT_FOR_TOKEN)
+        finite = params.supply_type == SupplyType.FINITE
+        if finite and params.initial_supply > params.max_supply:
+            raise SimulationError(ResponseCode.INVALID_TOKEN_INITIAL_SUPPLY)
+
+        token_id = TokenId(0, 0, self._new_num())
+        self.tokens[str(token_id)] = {
+            "name":         params.token_name,
+            "symbol":       params.token_symbol,
+            "decimals":     params.decimals,
+            "token_type":   params.token_type,
+            "max_supply":   params.max_supply if finite else None,
+            "total_supply": params.initial_supply,
+            "treasury":     treasury,
+            "serials":      0,
+        }
+        self.accounts[treasury]["tokens"][str(token_id)] = params.initial_supply
+        return {"tokenID": token_id._to_proto()}
+
+    def _token_mint(self, tx):
+        token = self._token(tx.token_id)
+        if token["token_type"] == TokenType.NON_FUNGIBLE_UNIQUE:
+            count = len(tx.metadata or [])
+        else:
+            count = tx.amount or 0
+        if token["max_supply"] is not None and token["total_supply"] + count > token["max_supply"]:
+            raise SimulationError(ResponseCode.TOKEN_MAX_SUPPLY_REACHED)
+
+        token["total_supply"] += count
+        holdings = self.accounts[token["treasury"]]["tokens"]
+        holdings[str(tx.token_id)] = holdings.get(str(tx.token_id), 0) + count
+        fields = {"newTotalSupply": token["total_supply"]}
+        if token["token_type"] == TokenType.NON_FUNGIBLE_UNIQUE:
+            fields["serialNumbers"] = list(range(token["serials"] + 1, token["serials"] + count + 1))
+            token["serials"] += count
+        return fields
+
+    def _transfer(self, tx):
+        if sum(t.amount for t in tx.hbar_transfers) != 0:
+            raise SimulationError(ResponseCode.INVALID_ACCOUNT_AMOUNTS)
+        for token_id, transfers in tx.token_transfers.items():
+            self._token(token_id)
+            if sum(t.amount for t in transfers) != 0:
+                raise SimulationError(ResponseCode.TRANSFERS_NOT_ZERO_SUM_FOR_TOKEN)
+
+        # Validate against a scratch copy so a failed transfer changes nothing
+        hbar = {}
+        tokens = {}
+        pending_aliases = {}
+        for transfer in tx.hbar_transfers:
+            account = self._resolve(transfer.account_id)
+            if account is None:
+                evm = transfer.account_id.evm_address
+                if evm is None or transfer.amount <= 0:
+                    raise SimulationError(ResponseCode.INVALID_ACCOUNT_ID)
+                account = pending_aliases.setdefault(evm.to_string(), f"pending:{evm.to_string()}")
+            hbar[account] = hbar.get(account, self.accounts.get(account, {}).get("hbar", 0)) + transfer.amount
+        for token_id, transfers in tx.token_transfers.items():
+            for transfer in transfers:
+                account = self._resolve(transfer.account_id)
+                if account is None:
+                    raise SimulationError(ResponseCode.INVALID_ACCOUNT_ID)
+                key = (account, str(token_id))
+                held = self.accounts[account]["tokens"].get(str(token_id), 0)
+                tokens[key] = tokens.get(key, held) + transfer.amount
+
+        if any(balance < 0 for balance in hbar.values()):
+            raise SimulationError(ResponseCode.INSUFFICIENT_ACCOUNT_BALANCE)
+        if any(balance < 0 for balance in tokens.values()):
+            raise SimulationError(ResponseCode.INSUFFICIENT_TOKEN_BALANCE)
+
+        for evm, placeholder in pending_aliases.items():     # lazy-create
+            account = self._add_account(evm_address=evm, memo="lazy-created")
+            hbar[account] = hbar.pop(placeholder)
+        for account, balance in hbar.items():
+            self.accounts[account]["hbar"] = balance
+        for (account, token_id), balance in tokens.items():
+            self.accounts[account]["tokens"][token_id] = balance
+
+    def _account_create(self, tx):
+        initial = tx.initial_balance
+        initial = initial.to_tinybars() if isinstance(initial, Hbar) else int(initial or 0)
+        payer = self._resolve(tx.transaction_id.account_id)
+        if self.accounts[payer]["hbar"] < initial:
+            raise SimulationError(ResponseCode.INSUFFICIENT_PAYER_BALANCE)
+        evm = tx.alias.to_string() if tx.alias is not None else None
+        if evm and evm in self.aliases:
+            raise SimulationError(ResponseCode.ALIAS_ALREADY_ASSIGNED)
+
+        self.accounts[payer]["hbar"] -= initial
+        account = self._add_account(hbar=initial, key=tx.key, evm_address=evm, memo=tx.account_memo or "")
+        return {"accountID": AccountId.from_string(account)._to_proto()}
+
+    # -- queries --
+
+    def _require_account(self, account_id: AccountId) -> str:
+        account = self._resolve(account_id)
+        if account is None:
+            raise PrecheckError(ResponseCode.INVALID_ACCOUNT_ID)
+        return account
+
+    def _balance(self, query):
+        account = self.accounts[self._require_account(query.account_id)]
+        token_balances = {TokenId.from_string(t): amount for t, amount in account["tokens"].items()}
+        token_decimals = {t: self.tokens[str(t)]["decimals"] for t in token_balances}
+        return AccountBalance(Hbar.from_tinybars(account["hbar"]), token_balances, token_decimals)
+
+    def _account_info(self, query):
+        account_id = self._require_account(query.account_id)
+        account = self.accounts[account_id]
+        return AccountInfo(
+            account_id=AccountId.from_string(account_id),
+            contract_account_id=account["evm_address"],
+            is_deleted=False,
+            key=account["key"],
+            balance=Hbar.from_tinybars(account["hbar"]),
+            account_memo=account["memo"],
+        )
+
+    # -- setup --
+
+    def fund(self, account_id: AccountId, tinybars: int, key=None):
+        """Create (or top up) an account outside of consensus, e.g. the operator."""
+        with self._lock:
+            account = self._resolve(account_id)
+            if account is None:
+                account = self._add_account(key=key, account_id=str(account_id))
+            self.accounts[account]["hbar"] += tinybars
+
+
+_default_simulator = None
+
+
+def default_simulator() -> Simulator:
+    """Process-wide simulator, so co-hosted services share one ledger."""
+    global _default_simulator
+    if _default_simulator is None:
+        _default_simulator = Simulator()
+    return _default_simulator
+
+
+# ── Client ────────────────────────────────────────────────────────────────
+
+class SimulatedClient(Client):
+    """A hiero Client whose executions are served by a Simulator."""
+
+    is_simulated = True
+
+    def __init__(self, simulator: Simulator = None):
+        node = _Node(AccountId(0, 0, 3), "127.0.0.1:50211", None)     # never dialled
+        super().__init__(Network(network=SIMULATOR_NETWORK, nodes=[node]))
+        self.simulator = simulator or default_simulator()
+
+    def set_operator(self, account_id: AccountId, private_key: PrivateKey) -> Client:
+        if self.simulator._resolve(account_id) is None:
+            self.simulator.fund(account_id, Hbar(SIM_OPERATOR_HBAR).to_tinybars(), private_key.public_key())
+        return super().set_operator(account_id, private_key)
+
+
+NETWORK_FACTORIES = {"testnet": Client.for_testnet, "mainnet": Client.for_mainnet, "previewnet": Client.for_previewnet}
+
+
+def new_client(network: str, operator_id: AccountId, operator_key: PrivateKey, simulator: Simulator = None) -> Client:
+    """A client for `network` paying with operator_id (blocking: fetches the node list)."""
+    if network == SIMULATOR_NETWORK:
+        client = SimulatedClient(simulator)
+    elif network in NETWORK_FACTORIES:
+        client = NETWORK_FACTORIES[network]()
+    else:
+        raise ValueError(f"Unknown NETWORK: {network}")
+    client.set_operator(operator_id, operator_key)
+    return client
+
+
+def client_from_env():
+    """
+    Build the Hedera client named by $NETWORK (testnet, mainnet, previewnet or
+    simulator) with the operator from OPERATOR_ID / OPERATOR_KEY.
+
+    Returns (client, operator_id, operator_key). The simulator falls back to
+    account 0.0.2 and a throwaway key when no operator is configured.
+    """
+    network = os.getenv("NETWORK", "testnet").lower()
+    operator_id_str = os.getenv("OPERATOR_ID")
+    operator_key_str = os.getenv("OPERATOR_KEY")
+
+    if network == SIMULATOR_NETWORK:
+        operator_id = AccountId.from_string(operator_id_str or "0.0.2")
+        operator_key = PrivateKey.from_string(operator_key_str) if operator_key_str else PrivateKey.generate_ed25519()
+    else:
+        if not operator_id_str or not operator_key_str:
+            raise ValueError("OPERATOR_ID and OPERATOR_KEY must be set")
+        operator_id = AccountId.from_string(operator_id_str)
+        operator_key = PrivateKey.from_string(operator_key_str)
+
+    return new_client(network, operator_id, operator_key), operator_id, operator_key
@@ -0,0 +1,263 @@
+"""
+Asynchronous transaction submission with live status.
+
+    submission = await submissions.submit("mint-token", owner, client, transaction, finalize=after_mint)
+    return FastJSONResponse(submission, status_code=202)
+
+submit() returns once the transaction has passed precheck (it raises
+PrecheckError like execute() does otherwise), so the request no longer
+waits out consensus. The receipt is fetched in the background and every
+record moves through
+
+    submitted -> consensus -> succeeded
+    submitted -> failed                     (receipt status or error in `reason`)
+
+`finalize(receipt)` runs between consensus and succeeded for the caller's
+bookkeeping (marketplace insert, cache invalidation) and returns the
+record's `result`.
+
+Records are kept in memory while this process resolves them and written to
+the `submissions` collection on every transition (finished ones expire
+after SUBMISSION_TTL_HOURS). stream() renders them as Server-Sent Events
+for one transaction or for everything an owner has open; transitions made
+in this process are pushed immediately, ones made by other workers are
+picked up from MongoDB every SSE_POLL_INTERVAL.
+
+A process killed mid-flight leaves its records at submitted/consensus; the
+mirror node has the outcome.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from hiero_sdk_python.exceptions import ReceiptStatusError
+
+from clock import utcnow
+from metrics import SSE_STREAMS, SUBMISSION_OUTCOMES, SUBMISSION_RESOLVE_TIME, SUBMISSIONS_OPEN
+from pools import run_hedera
+from responses import dumps
+
+SUBMISSION_TTL_HOURS     = float(os.getenv("SUBMISSION_TTL_HOURS", "24"))
+SUBMISSION_DRAIN_TIMEOUT = float(os.getenv("SUBMISSION_DRAIN_TIMEOUT", "30"))   # shutdown grace for open receipts
+SSE_POLL_INTERVAL        = float(os.getenv("SSE_POLL_INTERVAL", "2"))
+SSE_KEEPALIVE            = float(os.getenv("SSE_KEEPALIVE", "15"))
+MAX_TRACKED              = 10_000      # finished records kept in memory beyond this are dropped (MongoDB has them)
+
+SUBMITTED = "submitted"
+CONSENSUS = "consensus"
+SUCCEEDED = "succeeded"
+FAILED    = "failed"
+OPEN      = (SUBMITTED, CONSENSUS)
+
+log = logging.getLogger(__name__)
+
+
+
+def _public(doc: dict) -> dict:
+    return {k: v for k, v in doc.items() if k not in ("_id", "expires_at")}
+
+
+def sse_frame(doc: dict) -> bytes:
+    return (
+        f"id: {doc['transaction_id']}:{doc['seq']}\nevent: {doc['status']}\ndata: ".encode()
+        + dumps(_public(doc)) + b"\n\n"
+    )
+
+
+class Submissions:
+    def __init__(self):
+        self.collection = None
+        self.docs = OrderedDict()   # transaction_id -> record, oldest first
+        self._watchers = set()      # (queue, transaction_id, owner) per open stream
+        self._tasks = set()
+        SUBMISSIONS_OPEN.set_function(lambda: sum(d["status"] in OPEN for d in self.docs.values()))
+        SSE_STREAMS.set_function(lambda: len(self._watchers))
+
+    def bind(self, db):
+        self.collection = db["submissions"]
+
+    async def ensure_indexes(self):
+        if self.collection is None:
+            return
+        await self.collection.create_index([("owner", 1), ("updated_at", 1)])
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    # ── Submitting ────────────────────────────────────────────────────────
+
+    async def submit(self, operation: str, owner: str, client, transaction, finalize=None) -> dict:
+        """Send a frozen, signed transaction and resolve its receipt in the background."""
+        response = await run_hedera(transaction.execute, client, wait_for_receipt=False)
+        now = utcnow()
+        doc = {
+            "_id":            str(response.transaction_id),
+            "transaction_id": str(response.transaction_id),
+            "operation":      operation,
+            "owner":          owner,
+            "status":         SUBMITTED,
+            "reason":         None,
+            "result":         None,
+            "seq":            0,
+            "history":        [{"status": SUBMITTED, "at": now}],
+            "created_at":     now,
+            "updated_at":     now,
+        }
+        self._track(doc)
+        await self._save(doc)
+        self._publish(doc)
+        task = asyncio.create_task(self._resolve(doc, response, client, finalize, time.perf_counter()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return _public(doc)
+
+    async def _resolve(self, doc, response, client, finalize, started):
+        operation = doc["operation"]
+        try:
+            receipt = await run_hedera(response.get_receipt, client, validate_status=True)
+        except asyncio.CancelledError:
+            raise
+        except ReceiptStatusError as e:
+            await self._transition(doc, FAILED, reason=e.status.name)
+            return
+        except Exception as e:
+            log.warning("Receipt for %s failed: %s", doc["transaction_id"], e, extra={"operation": operation})
+            await self._transition(doc, FAILED, reason=str(e))
+            return
+        finally:
+            SUBMISSION_RESOLVE_TIME.labels(operation).observe(time.perf_counter() - started)
+
+        await self._transition(doc, CONSENSUS)
+        result = {}
+        if finalize is not None:
+            try:
+                result = await finalize(receipt) or {}
+            except Exception as e:      # the transaction itself succeeded; only our bookkeeping did not
+                log.exception("Post-consensus step for %s failed: %s", doc["transaction_id"], e)
+                result = {"warning": str(e)}
+        await self._transition(doc, SUCCEEDED, result=result)
+
+    async def _transition(self, doc: dict, status: str, reason: str = None, result: dict = None):
+        now = utcnow()
+        doc["status"] = status
+        doc["reason"] = reason
+        if result is not None:
+            doc["result"] = result
+        doc["seq"] += 1
+        doc["history"].append({"status": status, "at": now})
+        doc["updated_at"] = now
+        if status not in OPEN:
+            doc["expires_at"] = datetime.now(timezone.utc) + timedelta(hours=SUBMISSION_TTL_HOURS)
+            SUBMISSION_OUTCOMES.labels(doc["operation"], status).inc()
+        await self._save(doc)
+        self._publish(doc)
+
+    def _track(self, doc: dict):
+        self.docs[doc["transaction_id"]] = doc
+        excess = len(self.docs) - MAX_TRACKED
+        if excess > 0:
+            for tx_id in [t for t, d in self.docs.items() if d["status"] not in OPEN][:excess]:
+                del self.docs[tx_id]
+
+    async def _save(self, doc: dict):
+        if self.collection is None:
+            return
+        try:
+            await self.collection.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+        except Exception as e:
+            log.warning("Submission save failed: %s", e, extra={"transaction_id": doc["transaction_id"]})
+
+    async def stop(self, timeout: float = SUBMISSION_DRAIN_TIMEOUT):
+        """Give open receipts a grace period to resolve, then cancel them."""
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if pending:
+            log.warning("%d submissions still open at shutdown", len(pending))
+
+    # ── Reading ───────────────────────────────────────────────────────────
+
+    async def get(self, transaction_id: str):
+        doc = self.docs.get(transaction_id)
+        if doc is None and self.collection is not None:
+            doc = await self.collection.find_one({"_id": transaction_id})
+        return _public(doc) if doc is not None else None
+
+    async def open_for(self, owner: str) -> list:
+        found = {t: d for t, d in self.docs.items() if d["owner"] == owner and d["status"] in OPEN}
+        if self.collection is not None:
+            async for doc in self.collection.find({"owner": owner, "status": {"$in": list(OPEN)}}):
+                found.setdefault(doc["_id"], doc)
+        return sorted(found.values(), key=lambda d: d["created_at"])
+
+    async def _changed(self, transaction_id: str, owner: str, since: str) -> list:
+        """Records another process may have moved since `since` (updated_at)."""
+        if self.collection is None:
+            return []
+        query = {"_id": transaction_id} if transaction_id else {"owner": owner}
+        query["updated_at"] = {"$gt": since}
+        return [doc async for doc in self.collection.find(query).sort("updated_at", 1)]
+
+    # ── Streaming ─────────────────────────────────────────────────────────
+
+    def _publish(self, doc: dict):
+        for queue, transaction_id, owner in self._watchers:
+            if doc["transaction_id"] == transaction_id or (owner is not None and doc["owner"] == owner):
+                queue.put_nowait(dict(doc))
+
+    async def stream(self, transaction_id: str = None, owner: str = None):
+        """
+        SSE frames: the current state, then each transition. A transaction's
+        stream ends once it has succeeded or failed; an owner's stays open and
+        also reports transactions submitted after it started.
+        """
+        queue = asyncio.Queue()
+        watcher = (queue, transaction_id, owner)
+        self._watchers.add(watcher)
+        sent = {}           # transaction_id -> seq already sent
+        since = utcnow()
+
+        def fresh(doc) -> bool:
+            if sent.get(doc["transaction_id"], -1) >= doc["seq"]:
+                return False
+            sent[doc["transaction_id"]] = doc["seq"]
+            return True
+
+        try:
+            if transaction_id:
+                doc = await self.get(transaction_id)
+                initial = [doc] if doc is not None else []
+            else:
+                initial = await self.open_for(owner)
+            for doc in initial:
+                if fresh(doc):
+                    yield sse_frame(doc)
+            if transaction_id and all(d["status"] not in OPEN for d in initial):
+                return
+
+            quiet = 0.0
+            while True:
+                try:
+                    docs = [await asyncio.wait_for(queue.get(), SSE_POLL_INTERVAL)]
+                except asyncio.TimeoutError:
+                    docs = await self._changed(transaction_id, owner, since)
+                    quiet += SSE_POLL_INTERVAL
+                for doc in docs:
+                    since = max(since, doc["updated_at"])
+                    if fresh(doc):
+                        quiet = 0.0
+                        yield sse_frame(doc)
+                        if transaction_id and doc["status"] not in OPEN:
+                            return
+                if quiet >= SSE_KEEPALIVE:
+                    quiet = 0.0
+                    yield b": keepalive\n\n"     # keeps proxies from timing the stream out
+        finally:
+            self._watchers.discard(watcher)
+
+
+submissions = Submissions()
@@ -1,6 +1,5 @@
 from hiero_sdk_python import (
     Network,
-    Client,
     AccountId,
     PrivateKey,
     CryptoGetAccountBalanceQuery,
@@ -12,56 +11,137 @@ from hiero_sdk_python import (
     TransactionReceipt,
     Hbar,
     TokenMintTransaction,
+    TokenId,
     TransferTransaction)
 import os
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from pymongo import MongoClient
-import requests
+from pymongo import DESCENDING, UpdateOne
+from pymongo.errors import OperationFailure
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
+from pools import get_http_client, run_hedera
+from app_factory import Service, create_app
+from runtime import runtime
+from admission import admission, limit, request_key
+from cache import SingleFlightCache
+from ingest import MirrorIngestor
+import valuation
+from search import SearchIndex
+from submissions import submissions
+from operators import operators
+import nft_mint
+import token_import
+from uploads import iter_records, upload_format
+from logs import setup_logging
+from responses import COMPRESSION_MIN_SIZE, FastJSONResponse, choose_encoding, dumps, encode_body
+
 load_dotenv()
+setup_logging("token-api")
+log = logging.getLogger(__name__)
 
 # ── MongoDB ────────────────────────────────────────────────────────────────
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "hedera_users_db")
 
-try:
-    mongo_client = MongoClient(MONGO_URI)
-    db = mongo_client[MONGO_DB_NAME]
-    marketplace_col = db["marketplace"]
-    portfolio_col   = db["portfolio"]
-    marketplace_col.create_index("token_id", unique=True)
-    portfolio_col.create_index([("auth0_id", 1), ("token_id", 1)])
-    print(f"MongoDB connected: {MONGO_DB_NAME}")
-except Exception as e:
-    print(f"MongoDB connection failed: {e}")
-    db = None
-    marketplace_col = None
-    portfolio_col   = None
+# Bound by the runtime once MongoDB is reachable (see runtime.py); None until then
+mongo_client     = None
+db               = None
+marketplace_col  = None
+portfolio_col    = None
+transactions_col = None     # mirror-node cache, one doc per (account, tx)
+tx_sync_col      = None     # per-account high-water consensus timestamp
+holdings_col     = None     # chain balances per (token, account), written by ingest.py
+users_col        = None     # onboarding's users: auth0_id -> hedera_account_id
+nft_runs_col     = None     # bulk NFT mint runs and their per-batch checkpoints (nft_mint.py)
+nft_batches_col  = None
+imports_col      = None     # bulk token imports and their per-row status (token_import.py)
+import_rows_col  = None
+
+
+def bind_mongo(mongo):
+    global mongo_client, db, marketplace_col, portfolio_col, transactions_col, tx_sync_col, holdings_col, users_col
+    global nft_runs_col, nft_batches_col, imports_col, import_rows_col
+    mongo_client = mongo
+    db = mongo[MONGO_DB_NAME]
+    marketplace_col  = db["marketplace"]
+    portfolio_col    = db["portfolio"]
+    transactions_col = db["transactions"]
+    tx_sync_col      = db["transaction_sync"]
+    holdings_col     = db["holdings"]
+    users_col        = db["users"]
+    nft_runs_col     = db["nft_mint_runs"]
+    nft_batches_col  = db["nft_mint_batches"]
+    imports_col      = db["token_imports"]
+    import_rows_col  = db["token_import_rows"]
+    runtime.spawn(ensure_indexes())     # in the background; reads work meanwhile
+    search_index.start(marketplace_col)     # initial load, then picks up other workers' listings
+    ingestor.bind(db)
+    submissions.bind(db)
+    if INGEST_ENABLED:
+        ingestor.start()
+
+
+async def ensure_indexes():
+    if db is None:
+        return
+    try:
+        await marketplace_col.create_index("token_id", unique=True)
+        # Keyset pagination (newest first) plus the equality filters it is combined with
+        await marketplace_col.create_index([("created_at", DESCENDING), ("token_id", DESCENDING)])
+        await marketplace_col.create_index([("category", 1), ("created_at", DESCENDING), ("token_id", DESCENDING)])
+        await marketplace_col.create_index([("token_type", 1), ("created_at", DESCENDING), ("token_id", DESCENDING)])
+        await portfolio_col.create_index([("auth0_id", 1), ("token_id", 1)])
+        await transactions_col.create_index(
+            [("account_id", 1), ("consensus_timestamp", DESCENDING), ("transaction_id", 1)],
+            unique=True,
+        )
+        await tx_sync_col.create_index("account_id", unique=True)
+        await ingestor.ensure_indexes()
+        await submissions.ensure_indexes()
+        await nft_mint.ensure_indexes(nft_runs_col, nft_batches_col)
+        await token_import.ensure_indexes(imports_col, import_rows_col)
+        log.info("MongoDB indexes ready: %s", MONGO_DB_NAME)
+    except Exception as e:
+        log.exception("MongoDB index setup failed: %s", e)
 
 # ── Hedera Client ──────────────────────────────────────────────────────────
-try:
-    operator_id  = AccountId.from_string(os.getenv("OPERATOR_ID"))
-    operator_key = PrivateKey.from_string(os.getenv("OPERATOR_KEY"))
-    client = Client.for_testnet()
-    client.set_operator(operator_id, operator_key)
-    print("Client initialized successfully.")
-except Exception as e:
-    print(f"Failed to initialize client: {e}")
-    client = None
-
-app = FastAPI()
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+client       = None
+operator_id  = None
+operator_key = None
+
+
+def bind_hedera(hedera):
+    global client, operator_id, operator_key
+    client, operator_id, operator_key = hedera
+    log.info("Client initialized successfully (%s).", client.network.network)
+
+
+runtime.on_ready("mongo", bind_mongo)
+runtime.on_ready("hedera", bind_hedera)
+
+
+# Routes hang off a router so server.py can co-host them with the onboarding
+# API; `app` at the bottom of this file is the standalone service.
+router = APIRouter(default_response_class=FastJSONResponse)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield       # Mongo/Hedera/HTTP pools are opened and closed by app_factory.create_app
+    await submissions.stop()        # lets open receipts land while MongoDB is still up
+    await ingestor.stop()
+    await search_index.stop()
+
+
+service = Service("token-api", router, lifespan, expose_headers=("X-Next-Cursor", "ETag"))
 
 # ── Request Models ─────────────────────────────────────────────────────────
 
@@ -96,163 +176,645 @@ class InvestRequest(BaseModel):
     price_per_unit: float = 0.0
     tx_id: str = None
 
+class BulkInvestRequest(BaseModel):
+    investments: list[InvestRequest]
+
 
 # ── Balance ────────────────────────────────────────────────────────────────
 
-@app.get("/balance")
-def get_account_balance(account_id: str):
-    if not client:
-        return {"error": "Client not initialized"}
-    try:
-        acc_id  = AccountId.from_string(account_id)
-        balance = CryptoGetAccountBalanceQuery().set_account_id(acc_id).execute(client)
+# The Wallet page and Navbar poll balances; identical concurrent lookups share
+# one network query and results are reused for BALANCE_CACHE_TTL seconds.
+# Endpoints that move funds invalidate the accounts they touch.
+BALANCE_CACHE_TTL = float(os.getenv("BALANCE_CACHE_TTL", "5"))
+MAX_BALANCE_ACCOUNTS = 100
+
+balance_cache = SingleFlightCache(ttl=BALANCE_CACHE_TTL)
+
+
+def invalidate_balances(*account_ids):
+    for account_id in account_ids:
+        if account_id is not None:
+            balance_cache.invalidate(str(account_id))
+
+
+async def fetch_balance(account_id: str) -> dict:
+    acc_id = AccountId.from_string(account_id)
+
+    async def load():
+        query   = CryptoGetAccountBalanceQuery().set_account_id(acc_id)
+        balance = await run_hedera(query.execute, client)
         return {
             "hbars": str(balance.hbars),
             "tinybars": str(balance.hbars.to_tinybars()),
-            "tokens": str(balance.tokens)
+            "tokens": str(balance.token_balances)
         }
+
+    return await balance_cache.get(str(acc_id), load)
+
+
+@router.get("/balance")
+async def get_account_balance(account_id: str):
+    if not client:
+        return {"error": "Client not initialized"}
+    try:
+        return await fetch_balance(account_id)
     except Exception as e:
         return {"error": str(e)}
 
 
+@router.get("/balances")
+async def get_account_balances(account_ids: str):
+    """Comma-separated account ids; one entry (or error) per id."""
+    if not client:
+        return {"error": "Client not initialized"}
+    ids = list(dict.fromkeys(a.strip() for a in account_ids.split(",") if a.strip()))
+    if len(ids) > MAX_BALANCE_ACCOUNTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BALANCE_ACCOUNTS} accounts per call")
+    results = await asyncio.gather(*(fetch_balance(a) for a in ids), return_exceptions=True)
+    return {
+        a: {"error": str(r)} if isinstance(r, Exception) else r
+        for a, r in zip(ids, results)
+    }
+
+
 # ── Create Token ───────────────────────────────────────────────────────────
 
-@app.post("/create-token")
-def create_token(request: CreateTokenRequest):
+@router.post("/create-token", dependencies=[Depends(limit("create-token"))])
+async def create_token(request: CreateTokenRequest, http_request: Request, wait: bool = True):
     if not client:
         return {"error": "Client not initialized"}
 
     try:
-        tk_type = TokenType.NON_FUNGIBLE_UNIQUE if request.token_type == "NON_FUNGIBLE_UNIQUE" else TokenType.FUNGIBLE_COMMON
-        sp_type = SupplyType.INFINITE if request.supply_type == "INFINITE" else SupplyType.FINITE
-
-        transaction = TokenCreateTransaction()
-        transaction.set_token_name(request.name)
-        transaction.set_token_symbol(request.symbol)
-        transaction.set_token_type(tk_type)
-        transaction.set_decimals(request.decimals)
-        transaction.set_initial_supply(request.initial_supply)
-        transaction.set_max_supply(request.max_supply)
-        transaction.set_supply_type(sp_type)
-        transaction.set_freeze_default(request.freeze_default)
-
-        treasury_id = operator_id
-        if request.treasury_account_id:
-            treasury_id = AccountId.from_string(request.treasury_account_id)
-        transaction.set_treasury_account_id(treasury_id)
-
-        if request.admin_key:
-            transaction.set_admin_key(PrivateKey.from_string(request.admin_key).public_key())
-        if request.supply_key:
-            transaction.set_supply_key(PrivateKey.from_string(request.supply_key).public_key())
-        if request.freeze_key:
-            transaction.set_freeze_key(PrivateKey.from_string(request.freeze_key).public_key())
-        if request.wipe_key:
-            transaction.set_wipe_key(PrivateKey.from_string(request.wipe_key).public_key())
-        if request.kyc_key:
-            transaction.set_kyc_key(PrivateKey.from_string(request.kyc_key).public_key())
-        if request.pause_key:
-            transaction.set_pause_key(PrivateKey.from_string(request.pause_key).public_key())
-
-        transaction.freeze_with(client)
-
-        if str(treasury_id) == str(operator_id):
-            transaction.sign(operator_key)
-        if request.admin_key:
-            transaction.sign(PrivateKey.from_string(request.admin_key))
-
-        # execute() returns TransactionReceipt directly in this SDK version
-        receipt       = transaction.execute(client)
-        token_id_str  = str(receipt.token_id)
-
-        # ── Persist to MongoDB marketplace ──────────────────────────────
-        if marketplace_col is not None:
-            doc = {
-                "token_id":     token_id_str,
-                "name":         request.name,
-                "symbol":       request.symbol,
-                "description":  request.description or "",
-                "category":     request.category or "Other",
-                "decimals":     request.decimals,
-                "initial_supply": request.initial_supply,
-                "max_supply":   request.max_supply,
-                "available":    request.initial_supply,   # starts as full supply
-                "supply_type":  request.supply_type,
-                "token_type":   request.token_type,
-                "price":        0,                        # price set later; 0 = market determines
-                "created_by":   request.auth0_id or "unknown",
-                "created_at":   datetime.now(timezone.utc).isoformat(),
-            }
-            try:
-                marketplace_col.insert_one(doc)
-            except Exception as db_err:
-                print(f"DB insert warning: {db_err}")   # token still created, just log
+        transaction, treasury_id = build_token_create(request)
 
-        return {
-            "status":   "success",
-            "token_id": token_id_str,
-            "name":     request.name,
-            "symbol":   request.symbol,
-            "category": request.category,
-        }
+        # Any pool account pays; the treasury (usually the primary operator) co-signs
+        async with operators.payer() as payer:
+            transaction.freeze_with(payer.client)
+            sign_token_create(transaction, request, treasury_id)
+
+            if not wait:
+                owner = request.auth0_id or request_key(http_request)
+                submission = await submissions.submit(
+                    "create-token", owner, payer.client, transaction,
+                    finalize=lambda receipt: list_created_token(request, treasury_id, receipt),
+                )
+                return FastJSONResponse(submission, status_code=202)
+
+            # execute() returns TransactionReceipt directly in this SDK version
+            receipt = await run_hedera(transaction.execute, payer.client, validate_status=True)
+        return await list_created_token(request, treasury_id, receipt)
 
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+def build_token_create(request: CreateTokenRequest) -> tuple:
+    """Unfrozen TokenCreateTransaction for `request`, and its treasury account."""
+    tk_type = TokenType.NON_FUNGIBLE_UNIQUE if request.token_type == "NON_FUNGIBLE_UNIQUE" else TokenType.FUNGIBLE_COMMON
+    sp_type = SupplyType.INFINITE if request.supply_type == "INFINITE" else SupplyType.FINITE
+
+    transaction = TokenCreateTransaction()
+    transaction.set_token_name(request.name)
+    transaction.set_token_symbol(request.symbol)
+    transaction.set_token_type(tk_type)
+    transaction.set_decimals(request.decimals)
+    transaction.set_initial_supply(request.initial_supply)
+    transaction.set_max_supply(request.max_supply)
+    transaction.set_supply_type(sp_type)
+    transaction.set_freeze_default(request.freeze_default)
+
+    treasury_id = operator_id
+    if request.treasury_account_id:
+        treasury_id = AccountId.from_string(request.treasury_account_id)
+    transaction.set_treasury_account_id(treasury_id)
+
+    if request.admin_key:
+        transaction.set_admin_key(PrivateKey.from_string(request.admin_key).public_key())
+    if request.supply_key:
+        transaction.set_supply_key(PrivateKey.from_string(request.supply_key).public_key())
+    if request.freeze_key:
+        transaction.set_freeze_key(PrivateKey.from_string(request.freeze_key).public_key())
+    if request.wipe_key:
+        transaction.set_wipe_key(PrivateKey.from_string(request.wipe_key).public_key())
+    if request.kyc_key:
+        transaction.set_kyc_key(PrivateKey.from_string(request.kyc_key).public_key())
+    if request.pause_key:
+        transaction.set_pause_key(PrivateKey.from_string(request.pause_key).public_key())
+    return transaction, treasury_id
+
+
+def sign_token_create(transaction, request: CreateTokenRequest, treasury_id):
+    """Co-signatures a frozen TokenCreateTransaction needs besides the payer's."""
+    if str(treasury_id) == str(operator_id):
+        transaction.sign(operator_key)
+    if request.admin_key:
+        transaction.sign(PrivateKey.from_string(request.admin_key))
+
+
+def marketplace_listing(request: CreateTokenRequest, token_id: str, treasury_id) -> dict:
+    return {
+        "token_id":     token_id,
+        "name":         request.name,
+        "symbol":       request.symbol,
+        "description":  request.description or "",
+        "category":     request.category or "Other",
+        "decimals":     request.decimals,
+        "initial_supply": request.initial_supply,
+        "max_supply":   request.max_supply,
+        "available":    request.initial_supply,   # starts as full supply
+        "treasury_id":  str(treasury_id),         # whose balance is the unsold supply (ingest.py)
+        "supply_type":  request.supply_type,
+        "token_type":   request.token_type,
+        "price":        0,                        # price set later; 0 = market determines
+        "created_by":   request.auth0_id or "unknown",
+        "created_at":   datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def list_created_token(request: CreateTokenRequest, treasury_id, receipt) -> dict:
+    """Post-consensus half of create_token: refresh balances and persist the listing."""
+    token_id_str = str(receipt.token_id)
+    invalidate_balances(operator_id, treasury_id, receipt.transaction_id.account_id)   # last one paid the fee
+
+    # ── Persist to MongoDB marketplace ──────────────────────────────────
+    if marketplace_col is not None:
+        doc = marketplace_listing(request, token_id_str, treasury_id)
+        try:
+            await marketplace_col.insert_one(doc)
+            bump_marketplace_version()
+            search_index.add(doc)
+        except Exception as db_err:
+            log.warning("DB insert warning: %s", db_err, extra={"token_id": token_id_str})   # token still created
+
+    return {
+        "status":   "success",
+        "token_id": token_id_str,
+        "name":     request.name,
+        "symbol":   request.symbol,
+        "category": request.category,
+    }
+
+
+# ── Create Token: Bulk Import ──────────────────────────────────────────────
+
+async def create_token_for_import(request: CreateTokenRequest) -> tuple:
+    transaction, treasury_id = build_token_create(request)
+    async with operators.payer() as payer:
+        transaction.freeze_with(payer.client)
+        sign_token_create(transaction, request, treasury_id)
+        receipt = await run_hedera(transaction.execute, payer.client, validate_status=True)
+    invalidate_balances(treasury_id, payer.account_id)
+    return str(receipt.token_id), treasury_id
+
+
+def imported_listings(docs: list):
+    bump_marketplace_version()
+    for doc in docs:
+        search_index.add(doc)
+
+
+@router.post("/create-token/import", dependencies=[Depends(limit("create-token/import"))])
+async def import_tokens(http_request: Request, import_id: str = None, auth0_id: str = None):
+    """
+    Tokenizes a catalog: one CreateTokenRequest per NDJSON line or CSV row,
+    created by a bounded worker pool and listed with insert_many (see
+    token_import.py). Post the same file with the returned import_id to
+    resume after a failure.
+    """
+    if not client:
+        return {"error": "Client not initialized"}
+    if imports_col is None:
+        return {"error": "Database not initialized"}
+    content_type = http_request.headers.get("content-type")
+    try:
+        fmt = upload_format(content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    run = token_import.ImportRun(
+        imports_col, import_rows_col, marketplace_col, CreateTokenRequest,
+        create=create_token_for_import, listing=marketplace_listing, on_listed=imported_listings,
+        import_id=import_id, created_by=auth0_id or http_request.headers.get("x-user-sub"),
+        admit=lambda cost: admission.pace("create-token/import", cost),
+    )
+    try:
+        await run.open()
+    except token_import.ImportConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        return await run.run(iter_records(http_request.stream(), content_type), fmt)
+    except ValueError as e:         # unusable upload (bad CSV header, overlong line)
+        raise HTTPException(status_code=400, detail={"message": str(e), "import_id": run.import_id})
+
+
+@router.get("/create-token/import/{import_id}")
+async def get_token_import(import_id: str):
+    if imports_col is None:
+        return {"error": "Database not initialized"}
+    status = await token_import.import_status(imports_col, import_rows_col, import_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown import id")
+    return status
+
+
+@router.get("/create-token/import/{import_id}/rows")
+async def get_token_import_rows(import_id: str, status: str = None):
+    """NDJSON, one line per row in upload order; `status=failed` to list what needs fixing."""
+    if import_rows_col is None:
+        return {"error": "Database not initialized"}
+    query = {"import_id": import_id}
+    if status:
+        query["status"] = status
+    rows = import_rows_col.find(query, {"_id": 0, "import_id": 0}).sort("row", 1)
+    return StreamingResponse(_ndjson(rows), media_type="application/x-ndjson")
+
+
 # ── Marketplace Listing ────────────────────────────────────────────────────
 
-@app.get("/marketplace")
-def get_marketplace():
+MARKETPLACE_PAGE_SIZE = 100
+MARKETPLACE_MAX_PAGE_SIZE = 500
+MARKETPLACE_FIELDS = {
+    "token_id", "name", "symbol", "description", "category", "decimals",
+    "initial_supply", "max_supply", "available", "supply_type", "token_type",
+    "price", "created_by", "created_at", "chain_available", "chain_supply",
+}
+
+
+def encode_cursor(doc: dict) -> str:
+    raw = json.dumps([doc["created_at"], doc["token_id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, token_id = json.loads(raw)
+        return str(created_at), str(token_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# Listings are read far more often than written, so each distinct page is
+# kept as pre-encoded JSON, keyed by a version that every write to
+# marketplace_col bumps. A hit costs no Mongo query and no encoding, and a
+# matching If-None-Match gets a bodyless 304. The TTL bounds staleness from
+# writes made by other worker processes.
+MARKETPLACE_SNAPSHOT_TTL = float(os.getenv("MARKETPLACE_SNAPSHOT_TTL", "30"))
+
+marketplace_version = 0
+marketplace_snapshots = SingleFlightCache(ttl=MARKETPLACE_SNAPSHOT_TTL, maxsize=256)
+
+
+def bump_marketplace_version():
+    global marketplace_version
+    marketplace_version += 1
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+async def load_marketplace_page(limit, cursor, category, token_type, min_available, fields) -> dict:
+    query = {}
+    if category:
+        query["category"] = category
+    if token_type:
+        query["token_type"] = token_type
+    if min_available is not None:
+        query["available"] = {"$gte": min_available}
+    if cursor:
+        created_at, token_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "token_id": {"$lt": token_id}},
+        ]
+
+    projection = {"_id": 0}
+    if fields:
+        wanted = {f.strip() for f in fields.split(",")} & MARKETPLACE_FIELDS
+        # Sort keys are always returned so the cursor can be built
+        for f in wanted | {"created_at", "token_id"}:
+            projection[f] = 1
+
+    assets = await (
+        marketplace_col.find(query, projection)
+        .sort([("created_at", DESCENDING), ("token_id", DESCENDING)])
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    next_cursor = None
+    if len(assets) > limit:
+        assets = assets[:limit]
+        next_cursor = encode_cursor(assets[-1])
+
+    body = dumps(assets)
+    return {
+        "body":        body,
+        "etag":        '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"',
+        "next_cursor": next_cursor,
+        "encoded":     {},          # br/gzip variants, compressed on first request
+    }
+
+
+@router.get("/marketplace")
+async def get_marketplace(
+    limit: int = Query(MARKETPLACE_PAGE_SIZE, ge=1, le=MARKETPLACE_MAX_PAGE_SIZE),
+    cursor: str = None,
+    category: str = None,
+    token_type: str = None,
+    min_available: int = None,
+    fields: str = None,
+    if_none_match: str = Header(None),
+    accept_encoding: str = Header(None),
+):
+    """
+    Newest listings first, one page at a time. The cursor for the next page
+    is returned in the X-Next-Cursor header (absent on the last page) so the
+    body stays a plain list for existing callers.
+    """
     if marketplace_col is None:
         return []
+
+    params = (limit, cursor, category, token_type, min_available, fields)
     try:
-        assets = list(marketplace_col.find({}, {"_id": 0}))
-        return assets
+        snapshot = await marketplace_snapshots.get(
+            (marketplace_version,) + params, lambda: load_marketplace_page(*params)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        return {"error": str(e)}
+
+    headers = {"ETag": snapshot["etag"], "Cache-Control": "no-cache"}
+    if snapshot["next_cursor"]:
+        headers["X-Next-Cursor"] = snapshot["next_cursor"]
+    if etag_matches(if_none_match, snapshot["etag"]):
+        return Response(status_code=304, headers=headers)
+
+    body = snapshot["body"]
+    encoding = choose_encoding(accept_encoding) if len(body) >= COMPRESSION_MIN_SIZE else None
+    if encoding:
+        if encoding not in snapshot["encoded"]:
+            snapshot["encoded"][encoding] = encode_body(body, encoding)
+        body = snapshot["encoded"][encoding]
+        headers.update({"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+    return Response(body, media_type="application/json", headers=headers)
+
+
+# ── Marketplace Search ─────────────────────────────────────────────────────
+
+SEARCH_MAX_RESULTS = 100
+
+search_index = SearchIndex()
+
+
+@router.get("/marketplace/search")
+async def search_marketplace(
+    q: str,
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_RESULTS),
+    category: str = None,
+    fields: str = None,
+):
+    """Relevance-ranked listings for `q` over name, symbol, description and category."""
+    hits = search_index.search(q, limit, category)
+    if not hits or marketplace_col is None:
+        return []
+    projection = {"_id": 0}
+    if fields:
+        wanted = {f.strip() for f in fields.split(",")} & MARKETPLACE_FIELDS
+        projection.update({f: 1 for f in wanted | {"token_id"}})
+    try:
+        # Ranking comes from memory; listing fields (available, price) are read fresh
+        docs = await marketplace_col.find({"token_id": {"$in": [t for t, _ in hits]}}, projection).to_list(length=None)
     except Exception as e:
         return {"error": str(e)}
+    by_id = {d["token_id"]: d for d in docs}
+    return FastJSONResponse([
+        {**by_id[t], "score": round(score, 4)} for t, score in hits if t in by_id
+    ])
+
+
+@router.get("/marketplace/autocomplete")
+async def autocomplete_marketplace(q: str, limit: int = Query(8, ge=1, le=20)):
+    """Name/symbol completions for the text typed so far, served from memory."""
+    return search_index.suggest(q, limit)
 
 
 # ── Portfolio: Record Investment ───────────────────────────────────────────
 
-@app.post("/portfolio/invest")
-def portfolio_invest(req: InvestRequest):
+MAX_BULK_INVESTMENTS = 1000
+
+# Flipped off the first time the server rejects a transaction (standalone mongod)
+_transactions_supported = True
+
+
+def _investment_doc(req: InvestRequest) -> dict:
+    return {
+        "auth0_id":       req.auth0_id,
+        "token_id":       req.token_id,
+        "asset_name":     req.asset_name,
+        "symbol":         req.symbol,
+        "amount":         req.amount,
+        "price_per_unit": req.price_per_unit,
+        "total_cost":     req.amount * req.price_per_unit,
+        "tx_id":          req.tx_id or "",
+        "status":         "confirmed",
+        "created_at":     datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def _oversold(totals: dict, session=None) -> HTTPException:
+    docs = await marketplace_col.find(
+        {"token_id": {"$in": list(totals)}}, {"_id": 0, "token_id": 1, "available": 1}, session=session
+    ).to_list(length=None)
+    available = {d["token_id"]: d.get("available", 0) for d in docs}
+    shortfalls = [
+        {"token_id": t, "requested": amount, "available": available.get(t)}
+        for t, amount in totals.items()
+        if available.get(t) is None or available[t] < amount
+    ]
+    return HTTPException(status_code=409, detail={"message": "Insufficient available supply", "shortfalls": shortfalls})
+
+
+async def record_investments(reqs: list) -> list:
+    """
+    Record investments and take their amounts off marketplace `available`
+    all-or-nothing. Each listing is decremented once, guarded by
+    available >= amount, so concurrent buyers can never oversell it.
+    """
+    try:
+        return await _record_investments(reqs)
+    finally:
+        bump_marketplace_version()      # `available` may have moved, even if compensated
+
+
+async def _record_investments(reqs: list) -> list:
+    global _transactions_supported
+    docs = [_investment_doc(r) for r in reqs]
+    totals = {}
+    for r in reqs:
+        totals[r.token_id] = totals.get(r.token_id, 0) + r.amount
+    reserve = [
+        UpdateOne({"token_id": t, "available": {"$gte": amount}}, {"$inc": {"available": -amount}})
+        for t, amount in totals.items()
+    ]
+
+    if _transactions_supported:
+        try:
+            async with await mongo_client.start_session() as session:
+                async with session.start_transaction():
+                    result = await marketplace_col.bulk_write(reserve, ordered=False, session=session)
+                    if result.matched_count != len(totals):
+                        raise await _oversold(totals, session)     # aborts the transaction
+                    await portfolio_col.insert_many([dict(d) for d in docs], session=session)
+            return docs
+        except OperationFailure as e:
+            if e.code != 20:    # IllegalOperation: transactions need a replica set
+                raise
+            _transactions_supported = False
+            log.warning("MongoDB transactions unavailable; falling back to compensating updates")
+
+    # No transactions: reserve token by token and undo on the first shortfall
+    reserved = {}
+    try:
+        for op, (t, amount) in zip(reserve, totals.items()):
+            result = await marketplace_col.bulk_write([op])
+            if result.matched_count == 0:
+                raise await _oversold({t: amount})
+            reserved[t] = amount
+        await portfolio_col.insert_many([dict(d) for d in docs])
+    except Exception:
+        if reserved:
+            await marketplace_col.bulk_write([
+                UpdateOne({"token_id": t}, {"$inc": {"available": amount}})
+                for t, amount in reserved.items()
+            ])
+        raise
+    return docs
+
+
+@router.post("/portfolio/invest")
+async def portfolio_invest(req: InvestRequest):
     if portfolio_col is None:
         raise HTTPException(status_code=503, detail="Database not available")
+    if req.amount <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be positive")
     try:
-        doc = {
-            "auth0_id":       req.auth0_id,
-            "token_id":       req.token_id,
-            "asset_name":     req.asset_name,
-            "symbol":         req.symbol,
-            "amount":         req.amount,
-            "price_per_unit": req.price_per_unit,
-            "total_cost":     req.amount * req.price_per_unit,
-            "tx_id":          req.tx_id or "",
-            "status":         "confirmed",
-            "created_at":     datetime.now(timezone.utc).isoformat(),
-        }
-        portfolio_col.insert_one(doc)
-        # Reduce available supply on the marketplace listing
-        if marketplace_col is not None:
-            marketplace_col.update_one(
-                {"token_id": req.token_id},
-                {"$inc": {"available": -req.amount}}
-            )
-        return {"status": "success", "investment": doc}
+        docs = await record_investments([req])
+        return {"status": "success", "investment": docs[0]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/portfolio/invest/bulk")
+async def portfolio_invest_bulk(request: BulkInvestRequest):
+    """Order-book style batch: every investment is recorded, or none is."""
+    if portfolio_col is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    if not request.investments:
+        raise HTTPException(status_code=400, detail="No investments given")
+    if len(request.investments) > MAX_BULK_INVESTMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_INVESTMENTS} investments per batch")
+    if any(r.amount <= 0 for r in request.investments):
+        raise HTTPException(status_code=400, detail="Amounts must be positive")
+    try:
+        docs = await record_investments(request.investments)
+        return {"status": "success", "count": len(docs), "investments": docs}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ── Portfolio: Get User Holdings ───────────────────────────────────────────
 
-@app.get("/portfolio")
-def get_portfolio(auth0_id: str):
+@router.get("/portfolio")
+async def get_portfolio(auth0_id: str):
     if portfolio_col is None:
         return []
     try:
-        holdings = list(portfolio_col.find({"auth0_id": auth0_id}, {"_id": 0}))
-        return holdings
+        holdings = await portfolio_col.find({"auth0_id": auth0_id}, {"_id": 0}).to_list(length=None)
+        return FastJSONResponse(holdings)       # plain dicts: skip jsonable_encoder
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# ── Portfolio: Per-Token Summary ───────────────────────────────────────────
+
+@router.get("/portfolio/summary")
+async def get_portfolio_summary(auth0_id: str):
+    """One row per held token instead of one per /portfolio/invest call."""
+    summary = {"auth0_id": auth0_id, "holdings": [], "total_amount": 0, "total_cost": 0.0}
+    if portfolio_col is None:
+        return summary
+    pipeline = [
+        {"$match": {"auth0_id": auth0_id}},
+        {"$sort": {"created_at": 1}},      # $last below means the latest investment's name/symbol
+        {"$group": {
+            "_id":          "$token_id",
+            "asset_name":   {"$last": "$asset_name"},
+            "symbol":       {"$last": "$symbol"},
+            "amount":       {"$sum": "$amount"},
+            "total_cost":   {"$sum": "$total_cost"},
+            "investments":  {"$sum": 1},
+            "last_invested_at": {"$max": "$created_at"},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+    try:
+        holdings = []
+        async for row in portfolio_col.aggregate(pipeline):
+            amount = row["amount"]
+            holdings.append({
+                "token_id":         row["_id"],
+                "asset_name":       row["asset_name"],
+                "symbol":           row["symbol"],
+                "amount":           amount,
+                "total_cost":       row["total_cost"],
+                "avg_price":        row["total_cost"] / amount if amount else 0.0,
+                "investments":      row["investments"],
+                "last_invested_at": row["last_invested_at"],
+            })
+        summary["holdings"]     = holdings
+        summary["total_amount"] = sum(h["amount"] for h in holdings)
+        summary["total_cost"]   = sum(h["total_cost"] for h in holdings)
+        return summary
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# ── Portfolio: Valuation & P&L ─────────────────────────────────────────────
+
+@router.get("/portfolio/valuation")
+async def get_portfolio_valuation(auth0_id: str):
+    """Cost basis, market value, unrealized P&L and category allocation for one user."""
+    if portfolio_col is None:
+        return {"error": "Database not initialized"}
+    try:
+        positions = await valuation.load_positions(portfolio_col, auth0_id)
+        prices = await valuation.load_prices(marketplace_col, portfolio_col, positions.tokens)
+        return valuation.user_report(auth0_id, positions, prices)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@router.get("/portfolio/valuation/report")
+async def get_valuation_report(limit: int = Query(None, ge=1)):
+    """Platform-wide: every user's totals (largest first, `limit` to cap) plus platform totals."""
+    if portfolio_col is None:
+        return {"error": "Database not initialized"}
+    try:
+        positions = await valuation.load_positions(portfolio_col)
+        prices = await valuation.load_prices(marketplace_col, portfolio_col, positions.tokens)
+        # CPU-bound for large books: keep it off the event loop
+        report = await asyncio.to_thread(valuation.platform_report, positions, prices, limit)
+        report["generated_at"] = datetime.now(timezone.utc).isoformat()
+        return report
     except Exception as e:
         return {"error": str(e)}
 
@@ -263,8 +825,8 @@ class CreateAccountRequest(BaseModel):
     initial_balance: float
     memo: str = None
 
-@app.post("/create-account")
-def create_account(request: CreateAccountRequest):
+@router.post("/create-account", dependencies=[Depends(limit("create-account"))])
+async def create_account(request: CreateAccountRequest):
     if not client:
         return {"error": "Client not initialized"}
     try:
@@ -275,12 +837,13 @@ def create_account(request: CreateAccountRequest):
             .set_key_without_alias(new_public_key)
             .set_initial_balance(Hbar(request.initial_balance))
             .set_account_memo(request.memo)
-            .freeze_with(client)
         )
-        transaction.sign(operator_key)
-        transaction.sign(new_private_key)
-        receipt = transaction.execute(client)
+        async with operators.payer() as payer:     # the payer also funds the initial balance
+            transaction.freeze_with(payer.client)
+            transaction.sign(new_private_key)
+            receipt = await run_hedera(transaction.execute, payer.client, validate_status=True)
         new_account_id = str(receipt.account_id)
+        invalidate_balances(payer.account_id, new_account_id)
         return {
             "status":          "success",
             "account_id":      new_account_id,
@@ -294,79 +857,499 @@ def create_account(request: CreateAccountRequest):
 
 # ── Transactions via Mirror Node ───────────────────────────────────────────
 
-@app.get("/transactions/{account_id}")
-def get_transactions(account_id: str):
-    base = "https://testnet.mirrornode.hedera.com"
-    url  = f"{base}/api/v1/transactions?account.id={account_id}&limit=100&order=desc"
-    all_transactions = []
-    try:
-        while url:
-            res = requests.get(url)
+MIRROR_NODE_URL = os.getenv("MIRROR_NODE_URL", "https://testnet.mirrornode.hedera.com")
+TX_PAGE_SIZE = 100
+TX_MAX_PAGE_SIZE = 1000
+TX_SYNC_MAX_PAGES = 20          # head pages fetched per request; older history is backfilled in the background
+TX_BACKFILL_CONCURRENCY = 4     # accounts whose history is backfilled at once
+
+_tx_syncs = {}                  # account_id -> in-flight head sync, shared by concurrent requests
+_tx_backfills = {}              # account_id -> running backfill
+_tx_backfill_slots = asyncio.Semaphore(TX_BACKFILL_CONCURRENCY)
+
+
+def _tx_row(account_id: str, tx: dict) -> dict:
+    return {
+        "account_id":          account_id,
+        "transaction_id":      tx["transaction_id"],
+        "name":                tx["name"],
+        "result":              tx["result"],
+        "consensus_timestamp": tx["consensus_timestamp"],
+    }
+
+
+def _tx_url(account_id: str, after: str = None, before: str = None) -> str:
+    url = (f"{MIRROR_NODE_URL}/api/v1/transactions?account.id={account_id}"
+           f"&limit={TX_PAGE_SIZE}&order=desc")
+    if after:
+        url += f"&timestamp=gt:{after}"
+    if before:
+        url += f"&timestamp=lt:{before}"
+    return url
+
+
+async def _store_tx_page(account_id: str, url: str):
+    """Fetch one mirror page into transactions_col; returns (rows newest first, next page url or None)."""
+    res = await get_http_client().get(url)
+    res.raise_for_status()
+    data = res.json()
+    rows = [_tx_row(account_id, tx) for tx in data.get("transactions", [])]
+    if rows:
+        await transactions_col.bulk_write([
+            UpdateOne(
+                {"account_id": account_id,
+                 "consensus_timestamp": r["consensus_timestamp"],
+                 "transaction_id": r["transaction_id"]},
+                {"$set": r},
+                upsert=True,
+            )
+            for r in rows
+        ], ordered=False)
+    next_link = data.get("links", {}).get("next")
+    return rows, f"{MIRROR_NODE_URL}{next_link}" if next_link else None
+
+
+async def sync_transactions(account_id: str):
+    """Bring the account's newest transactions into transactions_col; concurrent callers await the same sync."""
+    task = _tx_syncs.get(account_id)
+    if task is None:
+        task = _tx_syncs[account_id] = asyncio.create_task(_sync_head(account_id))
+        task.add_done_callback(lambda t: _tx_syncs.pop(account_id, None))
+    await asyncio.shield(task)      # a caller that goes away does not cancel the others' sync
+
+
+async def _sync_head(account_id: str):
+    """
+    Newest first, down to the stored high-water mark. When TX_SYNC_MAX_PAGES
+    runs out before reaching it (first sync of an active account, or a long
+    absence), the stretch in between is recorded as a gap and fetched by a
+    background backfill, so the recent transactions are always current.
+    """
+    state = await tx_sync_col.find_one({"account_id": account_id}) or {}
+    high_water = state.get("high_water")
+    url = _tx_url(account_id, after=high_water)
+    newest = oldest = None
+    for _ in range(TX_SYNC_MAX_PAGES):
+        rows, url = await _store_tx_page(account_id, url)
+        if rows:
+            newest = newest or rows[0]["consensus_timestamp"]
+            oldest = rows[-1]["consensus_timestamp"]
+        if url is None:
+            break
+
+    update = {"$set": {"synced_at": datetime.now(timezone.utc).isoformat()}}
+    if newest:
+        update["$set"]["high_water"] = newest
+    if url is not None:         # stopped short of high_water (None: the account's first transaction)
+        update["$push"] = {"gaps": {"after": high_water, "before": oldest}}
+    await tx_sync_col.update_one({"account_id": account_id}, update, upsert=True)
+    if url is not None or state.get("gaps"):
+        _start_backfill(account_id)
+
+
+def _start_backfill(account_id: str):
+    if account_id not in _tx_backfills:
+        task = _tx_backfills[account_id] = runtime.spawn(_backfill(account_id))
+        task.add_done_callback(lambda t: _tx_backfills.pop(account_id, None))
+
+
+async def _backfill(account_id: str):
+    """Fill the account's gaps, most recent first, checkpointing the gap's upper bound after every page."""
+    async with _tx_backfill_slots:
+        try:
+            while True:
+                state = await tx_sync_col.find_one({"account_id": account_id}, {"gaps": 1}) or {}
+                if not state.get("gaps"):
+                    return
+                gap = max(state["gaps"], key=lambda g: g["before"])
+                rows, url = await _store_tx_page(account_id, _tx_url(account_id, gap["after"], gap["before"]))
+                if url is None or not rows:
+                    update = {"$pull": {"gaps": {"before": gap["before"]}}}
+                else:
+                    update = {"$set": {"gaps.$.before": rows[-1]["consensus_timestamp"]}}
+                await tx_sync_col.update_one({"account_id": account_id, "gaps.before": gap["before"]}, update)
+        except Exception as e:
+            log.warning("Transaction backfill for %s stopped: %s", account_id, e)   # resumed by the next sync
+
+
+async def _ndjson(rows):
+    async for row in rows:
+        yield dumps(row) + b"\n"
+
+
+@router.get("/transactions/{account_id}")
+async def get_transactions(
+    account_id: str,
+    limit: int = Query(TX_PAGE_SIZE, ge=1, le=TX_MAX_PAGE_SIZE),
+    cursor: str = None,
+):
+    """
+    Newest-first NDJSON stream, one transaction per line. Pass the last line's
+    consensus_timestamp as `cursor` to get the next (older) page.
+    """
+    if transactions_col is None:
+        # No cache available: serve a single live page straight from the mirror node
+        url = (f"{MIRROR_NODE_URL}/api/v1/transactions?account.id={account_id}"
+               f"&limit={min(limit, TX_PAGE_SIZE)}&order=desc")
+        if cursor:
+            url += f"&timestamp=lt:{cursor}"
+        try:
+            res = await get_http_client().get(url)
             res.raise_for_status()
-            data = res.json()
-            for tx in data.get("transactions", []):
-                all_transactions.append({
-                    "transaction_id": tx["transaction_id"],
-                    "name":           tx["name"],
-                    "result":         tx["result"],
-                })
-            next_link = data.get("links", {}).get("next")
-            url = f"{base}{next_link}" if next_link else None
-        return {"account_id": account_id, "transactions": all_transactions}
+            rows = [_tx_row(account_id, tx) for tx in res.json().get("transactions", [])]
+        except Exception as e:
+            return {"error": str(e)}
+        return StreamingResponse((dumps(r) + b"\n" for r in rows), media_type="application/x-ndjson")
+
+    # Only the first page needs fresh data; older pages are already cached
+    if not cursor:
+        try:
+            await sync_transactions(account_id)
+        except Exception as e:
+            log.warning("Mirror sync warning for %s: %s", account_id, e)   # serve what is cached
+
+    query = {"account_id": account_id}
+    if cursor:
+        query["consensus_timestamp"] = {"$lt": cursor}
+    rows = (
+        transactions_col.find(query, {"_id": 0, "account_id": 0})
+        .sort([("consensus_timestamp", DESCENDING), ("transaction_id", 1)])
+        .limit(limit)
+    )
+    return StreamingResponse(_ndjson(rows), media_type="application/x-ndjson")
+
+
+# ── Chain Holdings (mirror-node ingestion) ─────────────────────────────────
+
+INGEST_ENABLED = os.getenv("INGEST_ENABLED", "true").lower() == "true"
+
+# Tails the mirror node into holdings_col and marketplace chain_* fields (see ingest.py)
+ingestor = MirrorIngestor(MIRROR_NODE_URL, on_change=bump_marketplace_version)
+
+
+@router.get("/portfolio/holdings")
+async def get_chain_holdings(auth0_id: str):
+    """The user's on-chain balances of listed tokens, as of the last ingestion pass."""
+    if holdings_col is None:
+        return {"error": "Database not initialized"}
+    try:
+        user = await users_col.find_one({"auth0_id": auth0_id}, {"_id": 0, "hedera_account_id": 1})
+        account_id = (user or {}).get("hedera_account_id")
+        if not account_id:
+            raise HTTPException(status_code=404, detail="No Hedera account for this user")
+        rows = await holdings_col.find(
+            {"account_id": account_id, "balance": {"$ne": 0}}, {"_id": 0}
+        ).sort("token_id", 1).to_list(length=None)
+        return {
+            "auth0_id":    auth0_id,
+            "account_id":  account_id,
+            "holdings":    rows,
+            "lag_seconds": ingestor.lag_seconds(),
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
 
+@router.get("/ingest/status")
+async def get_ingest_status():
+    if ingestor.state_col is None:
+        return {"running": False, "error": "Database not initialized"}
+    return await ingestor.status()
+
+
 # ── Mint Token ─────────────────────────────────────────────────────────────
 
-@app.post("/mint-token")
-def mint_token(token_id: str, amount: int, admin_key: str):
+@router.post("/mint-token", dependencies=[Depends(limit("mint-token"))])
+async def mint_token(token_id: str, amount: int, admin_key: str, http_request: Request, wait: bool = True):
     if not client:
         return {"error": "Client not initialized"}
     try:
         transaction = (
             TokenMintTransaction()
-            .set_token_id(token_id)
+            .set_token_id(TokenId.from_string(token_id))
             .set_amount(amount)
-            .freeze_with(client)
         )
-        transaction.sign(operator_key)
-        transaction.sign(PrivateKey.from_string(admin_key))
-        receipt = transaction.execute(client)
-        return {
-            "status":           "success",
-            "new_total_supply": str(receipt.total_supply),
-            "transaction_id":   str(receipt.transaction_id),
-        }
+
+        async def minted(receipt) -> dict:
+            # operator is the treasury for minted supply
+            invalidate_balances(operator_id, receipt.transaction_id.account_id)
+            return {
+                "status":           "success",
+                "new_total_supply": str(receipt.new_total_supply),
+                "transaction_id":   str(receipt.transaction_id),
+            }
+
+        async with operators.payer() as payer:
+            transaction.freeze_with(payer.client)
+            transaction.sign(operator_key)
+            transaction.sign(PrivateKey.from_string(admin_key))
+            if not wait:
+                submission = await submissions.submit(
+                    "mint-token", request_key(http_request), payer.client, transaction, finalize=minted,
+                )
+                return FastJSONResponse(submission, status_code=202)
+            receipt = await run_hedera(transaction.execute, payer.client, validate_status=True)
+        return await minted(receipt)
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+# ── Mint NFTs: Bulk ────────────────────────────────────────────────────────
+
+@router.post("/mint-nft/bulk", dependencies=[Depends(limit("mint-nft/bulk"))])
+async def mint_nft_bulk(token_id: str, admin_key: str, http_request: Request, run_id: str = None):
+    """
+    Mints one NFT per row of an NDJSON or CSV body (see nft_mint.py), read
+    as it streams in and submitted in network-sized batches. Pass the
+    returned run_id again with the same file to resume after a failure.
+    """
+    if not client:
+        return {"error": "Client not initialized"}
+    if nft_runs_col is None:
+        return {"error": "Database not initialized"}
+    content_type = http_request.headers.get("content-type")
+    try:
+        fmt = upload_format(content_type)
+        token = TokenId.from_string(token_id)
+        supply_key = PrivateKey.from_string(admin_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def mint_batch(metadata: list):
+        transaction = TokenMintTransaction().set_token_id(token).set_metadata(metadata)
+        async with operators.payer() as payer:
+            transaction.freeze_with(payer.client)
+            transaction.sign(supply_key)
+            return await run_hedera(transaction.execute, payer.client, validate_status=True)
+
+    run = nft_mint.MintRun(
+        nft_runs_col, nft_batches_col, token_id, mint_batch, run_id=run_id,
+        admit=lambda cost: admission.pace("mint-nft/bulk", cost),
+    )
+    try:
+        await run.open()
+    except nft_mint.RunConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        return await run.run(iter_records(http_request.stream(), content_type), fmt)
+    except nft_mint.RunMismatch as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "run_id": run.run_id})
+    except ValueError as e:         # unusable upload (bad CSV header, overlong line)
+        raise HTTPException(status_code=400, detail={"message": str(e), "run_id": run.run_id})
+    finally:
+        invalidate_balances(operator_id)    # treasury of the new serials
+
+
+@router.get("/mint-nft/bulk/{run_id}")
+async def get_mint_nft_run(run_id: str):
+    if nft_runs_col is None:
+        return {"error": "Database not initialized"}
+    status = await nft_mint.run_status(nft_runs_col, nft_batches_col, run_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown run id")
+    return status
+
+
+@router.get("/mint-nft/bulk/{run_id}/serials")
+async def get_mint_nft_serials(run_id: str):
+    """NDJSON, one line per minted batch: the upload rows it covers and their serials."""
+    if nft_batches_col is None:
+        return {"error": "Database not initialized"}
+    batches = nft_batches_col.find(
+        {"run_id": run_id, "status": nft_mint.MINTED},
+        {"_id": 0, "index": 1, "first_row": 1, "last_row": 1, "count": 1, "serials": 1, "transaction_id": 1},
+    ).sort("index", 1)
+    return StreamingResponse(_ndjson(batches), media_type="application/x-ndjson")
+
+
 # ── Transfer Token ─────────────────────────────────────────────────────────
 
-@app.post("/transfer-token")
-def transfer_token(token_id: str, recipient_id: str, amount: int):
+@router.post("/transfer-token", dependencies=[Depends(limit("transfer-token"))])
+async def transfer_token(token_id: str, recipient_id: str, amount: int, http_request: Request, wait: bool = True):
     if not client:
         return {"error": "Client not initialized"}
     try:
         transaction = (
             TransferTransaction()
-            .add_token_transfer(token_id, operator_id, -amount)
-            .add_token_transfer(token_id, recipient_id, amount)
-            .freeze_with(client)
+            .add_token_transfer(TokenId.from_string(token_id), operator_id, -amount)
+            .add_token_transfer(TokenId.from_string(token_id), AccountId.from_string(recipient_id), amount)
         )
-        transaction.sign(operator_key)
-        receipt = transaction.execute(client)
-        return {
-            "status":         "success",
-            "transaction_id": str(receipt.transaction_id),
-        }
+
+        async def transferred(receipt) -> dict:
+            invalidate_balances(operator_id, recipient_id, receipt.transaction_id.account_id)
+            return {
+                "status":         "success",
+                "transaction_id": str(receipt.transaction_id),
+            }
+
+        async with operators.payer() as payer:
+            transaction.freeze_with(payer.client)
+            transaction.sign(operator_key)      # the tokens leave the operator's account
+            if not wait:
+                submission = await submissions.submit(
+                    "transfer-token", request_key(http_request), payer.client, transaction, finalize=transferred,
+                )
+                return FastJSONResponse(submission, status_code=202)
+            receipt = await run_hedera(transaction.execute, payer.client, validate_status=True)
+        return await transferred(receipt)
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+# ── Transfer Token: Batch ──────────────────────────────────────────────────
+
+# Network cap on fungible token balance adjustments per CryptoTransfer
+# (ledger.tokenTransfers.maxLen); each token in a chunk also needs one
+# operator debit entry.
+MAX_TOKEN_TRANSFERS_PER_TX = 10
+MAX_BATCH_TRANSFERS        = 1000
+TRANSFER_BATCH_CONCURRENCY = int(os.getenv("TRANSFER_BATCH_CONCURRENCY", "8"))
+
+class TransferItem(BaseModel):
+    token_id: str
+    recipient_id: str
+    amount: int
+
+class BatchTransferRequest(BaseModel):
+    transfers: list[TransferItem]
+
+
+def pack_transfers(items: list) -> list:
+    """
+    Greedily group (index, item) pairs into chunks whose operator debits plus
+    recipient credits stay within MAX_TOKEN_TRANSFERS_PER_TX.
+    """
+    chunks, current, accounts = [], [], {}
+    for index, item in enumerate(items):
+        recipients = accounts.get(item.token_id, set())
+        extra = 0 if item.recipient_id in recipients else 1
+        if item.token_id not in accounts:
+            extra += 1      # operator debit for a token new to this chunk
+        cost = sum(len(r) + 1 for r in accounts.values())
+        if current and cost + extra > MAX_TOKEN_TRANSFERS_PER_TX:
+            chunks.append(current)
+            current, accounts = [], {}
+        current.append((index, item))
+        accounts.setdefault(item.token_id, set()).add(item.recipient_id)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_batch_transfer(chunk: list) -> TransferTransaction:
+    credits = {}
+    for _, item in chunk:
+        key = (item.token_id, item.recipient_id)
+        credits[key] = credits.get(key, 0) + item.amount
+    debits = {}
+    for (token_id, _), amount in credits.items():
+        debits[token_id] = debits.get(token_id, 0) + amount
+
+    transaction = TransferTransaction()
+    for token_id, amount in debits.items():
+        transaction.add_token_transfer(TokenId.from_string(token_id), operator_id, -amount)
+    for (token_id, recipient_id), amount in credits.items():
+        transaction.add_token_transfer(
+            TokenId.from_string(token_id), AccountId.from_string(recipient_id), amount
+        )
+    return transaction
+
+
+@router.post("/transfer-token/batch")
+async def transfer_token_batch(request: BatchTransferRequest, http_request: Request):
+    """
+    Pays many recipients with as few TransferTransactions as the network
+    allows, submitting the chunks concurrently. Each chunk succeeds or fails
+    atomically; results come back per input row, in input order.
+    """
+    if not client:
+        return {"error": "Client not initialized"}
+    if not request.transfers:
+        raise HTTPException(status_code=400, detail="No transfers given")
+    if len(request.transfers) > MAX_BATCH_TRANSFERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TRANSFERS} transfers per batch")
+    if any(t.amount <= 0 for t in request.transfers):
+        raise HTTPException(status_code=400, detail="Transfer amounts must be positive")
+
+    chunks = pack_transfers(request.transfers)
+    # One token per transaction the batch will submit
+    await admission.admit("transfer-token/batch", request_key(http_request), cost=len(chunks))
+
+    results = [None] * len(request.transfers)
+    semaphore = asyncio.Semaphore(TRANSFER_BATCH_CONCURRENCY)
+
+    async def submit(chunk):
+        async with semaphore:
+            try:
+                async with operators.payer() as payer:     # chunks spread over the pool
+                    transaction = build_batch_transfer(chunk).freeze_with(payer.client)
+                    transaction.sign(operator_key)
+                    receipt = await run_hedera(transaction.execute, payer.client, validate_status=True)
+                invalidate_balances(operator_id, payer.account_id, *(item.recipient_id for _, item in chunk))
+                outcome = {"status": "success", "transaction_id": str(receipt.transaction_id)}
+            except Exception as e:
+                outcome = {"status": "error", "message": str(e)}
+        for index, item in chunk:
+            results[index] = {**item.model_dump(), **outcome}
+
+    await asyncio.gather(*(submit(chunk) for chunk in chunks))
+    failed = sum(1 for r in results if r["status"] != "success")
+    return {
+        "status":       "success" if not failed else ("error" if failed == len(results) else "partial"),
+        "transactions": len(chunks),
+        "succeeded":    len(results) - failed,
+        "failed":       failed,
+        "results":      results,
+    }
+
+
+# ── Operator Pool ──────────────────────────────────────────────────────────
+
+@router.get("/operators/status")
+async def get_operators_status():
+    """Payer accounts (operators.py): load, health and last polled HBAR balance."""
+    return operators.status()
+
+
+# ── Async Submissions (wait=false) ─────────────────────────────────────────
+# create-token, mint-token and transfer-token with ?wait=false answer 202
+# with the transaction id once precheck passes; the receipt is resolved in
+# the background (submissions.py) and its progress streamed from here.
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}   # no proxy buffering
+
+
+@router.get("/submissions/events")
+async def stream_user_submissions(http_request: Request, auth0_id: str = None):
+    """Every transaction the user has open, then each transition as it happens."""
+    owner = auth0_id or request_key(http_request)
+    return StreamingResponse(submissions.stream(owner=owner), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/submissions/{transaction_id}")
+async def get_submission(transaction_id: str):
+    doc = await submissions.get(transaction_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Unknown transaction id")
+    return doc
+
+
+@router.get("/submissions/{transaction_id}/events")
+async def stream_submission(transaction_id: str):
+    """Current state, then each transition; ends once it succeeded or failed."""
+    if await submissions.get(transaction_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown transaction id")
+    return StreamingResponse(
+        submissions.stream(transaction_id=transaction_id), media_type="text/event-stream", headers=SSE_HEADERS,
+    )
+
+
 # ── Entry Point ────────────────────────────────────────────────────────────
 
+app = create_app(service)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
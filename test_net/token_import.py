@@ -0,0 +1,240 @@
+"""
+Bulk asset tokenization from an NDJSON or CSV catalog upload.
+
+Each row is one CreateTokenRequest (CSV columns named like its fields,
+empty cells left at their defaults). Rows are parsed as the body streams
+in and handed to IMPORT_CONCURRENCY workers, which create the tokens; the
+marketplace rows are written with insert_many every IMPORT_INSERT_BATCH
+tokens instead of one insert per asset.
+
+Every row has a status document keyed by (import_id, row key), where the
+key is the row's `external_id` if the catalog has one, else its row
+number:
+
+    pending   TokenCreate submitted, receipt not yet recorded
+    created   token exists on chain (token_id recorded), listing not written
+    listed    marketplace row written: done
+    failed    creation provably failed (`error`); retried on resume
+
+A row is only marked failed when no token was created: the TokenCreate was
+refused at precheck, or reached consensus with a failure status. Any other
+error (receipt timeout, lost connection) leaves it pending, like a row left
+behind by a process that died mid-flight.
+
+Posting the catalog again with the same import_id resumes: listed rows are
+skipped, created rows only get their listing written, failed rows are
+retried. A pending row may or may not have created its token, so it is
+reported as unconfirmed and never resubmitted, instead of creating a
+second one. Give rows an external_id if the file may be edited between
+attempts, so keys survive rows being inserted or removed.
+"""
+import asyncio
+import logging
+import os
+
+from hiero_sdk_python.exceptions import PrecheckError, ReceiptStatusError
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from checkpoints import CheckpointedRun, RunConflict
+from clock import utcnow
+
+IMPORT_CONCURRENCY   = int(os.getenv("IMPORT_CONCURRENCY", "16"))
+IMPORT_INSERT_BATCH  = int(os.getenv("IMPORT_INSERT_BATCH", "100"))
+IMPORT_LEASE_SECONDS = float(os.getenv("IMPORT_LEASE_SECONDS", "120"))
+
+PENDING   = "pending"
+CREATED   = "created"
+LISTED    = "listed"
+FAILED    = "failed"
+
+log = logging.getLogger(__name__)
+
+
+class ImportConflict(RunConflict):
+    """Another upload is still working on this import id."""
+
+
+def _error_text(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    return str(e)
+
+
+class ImportRun(CheckpointedRun):
+    noun = "Import"
+    conflict = ImportConflict
+
+    def __init__(self, runs_col, rows_col, marketplace_col, model, create, listing, on_listed=None,
+                 import_id: str = None, created_by: str = None, concurrency: int = IMPORT_CONCURRENCY,
+                 admit=None):
+        super().__init__(runs_col, import_id, IMPORT_LEASE_SECONDS, admit)
+        self.rows_col = rows_col
+        self.marketplace_col = marketplace_col
+        self.model = model                  # CreateTokenRequest
+        self.create = create                # async (request) -> (token_id, treasury_id)
+        self.listing = listing              # (request, token_id, treasury_id) -> marketplace doc
+        self.on_listed = on_listed          # (docs) after each insert_many
+        self.created_by = created_by
+        self.concurrency = concurrency
+        self.counts = {"rows": 0, "created": 0, "listed": 0, "already_imported": 0,
+                       "failed": 0, "unconfirmed": 0, "invalid": 0}
+        self._listings = []                 # (key, doc) waiting for the next insert_many
+
+    @property
+    def import_id(self) -> str:
+        return self.run_id
+
+    async def open(self):
+        """Take the import's lease (creating it if new); raises ImportConflict."""
+        await super().open({"created_by": self.created_by})
+
+    # ── Checkpoints ───────────────────────────────────────────────────────
+
+    async def _set_row(self, key: str, row: int, **fields):
+        await self.rows_col.update_one(
+            {"_id": f"{self.import_id}:{key}"},
+            {"$set": {"import_id": self.import_id, "key": key, "row": row, "updated_at": utcnow(), **fields}},
+            upsert=True,
+        )
+        await self.renew()
+
+    # ── Import ────────────────────────────────────────────────────────────
+
+    def _parse(self, record, fmt: str):
+        if not isinstance(record, dict):
+            raise ValueError("expected an object per row")
+        if fmt == "csv":
+            record = {k: v for k, v in record.items() if k and v.strip() != ""}
+        key = str(record.pop("external_id", "") or "")
+        if self.created_by:
+            record["auth0_id"] = self.created_by    # the uploader owns every row
+        return key, self.model(**record)
+
+    async def run(self, records, fmt: str) -> dict:
+        """Import every row of `records` (uploads.iter_records output) not finished by an earlier attempt."""
+        previous = {
+            d["key"]: d
+            async for d in self.rows_col.find(
+                {"import_id": self.import_id}, {"key": 1, "status": 1, "token_id": 1, "treasury_id": 1},
+            )
+        }
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)     # backpressure on reading the upload
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+        seen = set()
+        try:
+            async for row, record, error in records:
+                self.counts["rows"] += 1
+                await self.renew()
+                if error is None:
+                    try:
+                        key, request = self._parse(record, fmt)
+                        key = key or f"row:{row}"
+                        if key in seen:
+                            raise ValueError(f"duplicate external_id {key!r}")
+                        seen.add(key)
+                    except (ValueError, TypeError, ValidationError) as e:
+                        error = _error_text(e)
+                if error is not None:
+                    self.counts["invalid"] += 1
+                    self.error(row, error)
+                    continue
+
+                done = previous.get(key, {})
+                status = done.get("status")
+                if status == LISTED:
+                    self.counts["already_imported"] += 1
+                elif status == CREATED:         # on chain already; only the listing is missing
+                    await self._listed(key, self.listing(request, done["token_id"], done["treasury_id"]))
+                elif status == PENDING:
+                    self.counts["unconfirmed"] += 1
+                    self.error(row, "token creation was interrupted in an earlier attempt; check the mirror node")
+                else:
+                    await queue.put((row, key, request))
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self._flush()
+            status = await self.close()
+        return {
+            "import_id": self.import_id,
+            "status":    status,
+            **self.counts,
+            "errors":    self.errors,
+        }
+
+    async def _worker(self, queue: asyncio.Queue):
+        while (item := await queue.get()) is not None:
+            try:
+                await self._import_row(*item)
+            except Exception as e:      # bookkeeping write failed; the row keeps its last recorded status
+                log.exception("Import row %s failed: %s", item[0], e, extra={"import_id": self.import_id})
+
+    async def _import_row(self, row: int, key: str, request):
+        await self.throttle()               # one TokenCreateTransaction per row
+        await self._set_row(key, row, status=PENDING, error=None)
+        try:
+            token_id, treasury_id = await self.create(request)
+        except (PrecheckError, ReceiptStatusError) as e:    # refused, or failed at consensus: no token
+            self.counts["failed"] += 1
+            self.error(row, str(e))
+            await self._set_row(key, row, status=FAILED, error=str(e))
+            return
+        except Exception as e:      # may have reached consensus; stays pending, never resubmitted
+            log.warning("Import row %s unconfirmed: %s", key, e, extra={"import_id": self.import_id})
+            self.counts["unconfirmed"] += 1
+            self.error(row, f"outcome unknown, check the mirror node: {e}")
+            await self._set_row(key, row, error=str(e))
+            return
+        self.counts["created"] += 1
+        await self._set_row(key, row, status=CREATED, token_id=token_id, treasury_id=str(treasury_id))
+        await self._listed(key, self.listing(request, token_id, treasury_id))
+
+    async def _listed(self, key: str, doc: dict):
+        self._listings.append((key, doc))
+        if len(self._listings) >= IMPORT_INSERT_BATCH:
+            await self._flush()
+
+    async def _flush(self):
+        batch, self._listings = self._listings, []
+        if not batch:
+            return
+        docs = [doc for _, doc in batch]
+        failed = set()
+        try:
+            await self.marketplace_col.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # 11000: listed by an earlier attempt that died before marking the row
+            failed = {err["index"] for err in e.details.get("writeErrors", []) if err.get("code") != 11000}
+        except Exception as e:
+            log.warning("Import listing insert failed: %s", e, extra={"import_id": self.import_id})
+            failed = set(range(len(batch)))
+        listed = [key for i, (key, _) in enumerate(batch) if i not in failed]
+        if listed:
+            await self.rows_col.update_many(
+                {"_id": {"$in": [f"{self.import_id}:{key}" for key in listed]}},
+                {"$set": {"status": LISTED, "updated_at": utcnow()}},
+            )
+        self.counts["listed"] += len(listed)
+        if self.on_listed is not None:
+            self.on_listed([doc for i, doc in enumerate(docs) if i not in failed])
+
+
+async def ensure_indexes(runs_col, rows_col):
+    await rows_col.create_index([("import_id", 1), ("status", 1), ("row", 1)])
+
+
+async def import_status(runs_col, rows_col, import_id: str):
+    run = await runs_col.find_one({"_id": import_id}, {"owner": 0})
+    if run is None:
+        return None
+    rows = {}
+    async for group in rows_col.aggregate([
+        {"$match": {"import_id": import_id}},
+        {"$group": {"_id": "$status", "n": {"$sum": 1}}},
+    ]):
+        rows[group["_id"]] = group["n"]
+    run["import_id"] = run.pop("_id")
+    run["rows"] = rows
+    return run
@@ -0,0 +1,86 @@
+"""
+Line-oriented upload parsing for the bulk endpoints.
+
+    async for row, record, error in iter_records(request.stream(), request.headers.get("content-type")):
+        ...
+
+NDJSON (application/x-ndjson, application/jsonl) yields each line's JSON
+value; CSV (text/csv) yields a dict per data row keyed by the header row,
+one record per line. Rows are numbered from 1 (a CSV header is not a row)
+and blank lines are skipped. The body is consumed as it arrives, so memory
+is bounded by the longest line rather than the file. A row that does not
+parse comes back as (row, None, error); the caller decides whether that
+is fatal.
+"""
+import csv
+
+import orjson
+
+MAX_LINE_BYTES = 64 * 1024
+
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+CSV_TYPES    = ("text/csv",)
+
+
+def upload_format(content_type: str) -> str:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in NDJSON_TYPES:
+        return "ndjson"
+    if media_type in CSV_TYPES:
+        return "csv"
+    raise ValueError(f"Unsupported upload type {media_type or 'none'!r}; send NDJSON or CSV")
+
+
+async def iter_lines(chunks):
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > MAX_LINE_BYTES:
+            raise ValueError(f"Line longer than {MAX_LINE_BYTES} bytes")
+    if buffer:
+        yield buffer
+
+
+async def iter_records(chunks, content_type: str):
+    """(row, record, error) per non-blank line; raises ValueError for an unusable upload."""
+    fmt = upload_format(content_type)
+    header = None
+    row = 0
+    first = True
+    async for raw in iter_lines(chunks):
+        try:
+            line = raw.decode("utf-8").rstrip("\r")
+        except UnicodeDecodeError:
+            line, error = None, "not valid UTF-8"
+        else:
+            error = None
+        if first and line:
+            line = line.lstrip("\ufeff")    # BOM from spreadsheet exports
+        first = False
+        if line is not None and not line.strip():
+            continue
+
+        if fmt == "csv" and header is None:
+            if line is None:
+                raise ValueError("CSV header is not valid UTF-8")
+            header = [h.strip() for h in next(csv.reader([line]))]
+            continue
+
+        row += 1
+        if error is not None:
+            yield row, None, error
+            continue
+        if fmt == "ndjson":
+            try:
+                yield row, orjson.loads(line), None
+            except orjson.JSONDecodeError as e:
+                yield row, None, f"invalid JSON: {e}"
+        else:
+            values = next(csv.reader([line]))
+            if len(values) != len(header):
+                yield row, None, f"expected {len(header)} columns, got {len(values)}"
+            else:
+                yield row, dict(zip(header, values)), None
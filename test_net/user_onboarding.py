@@ -1,13 +1,14 @@
-from fastapi import FastAPI, HTTPException, Header, Body
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import APIRouter, FastAPI, HTTPException, Header
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from pymongo import MongoClient, UpdateOne
+from contextlib import asynccontextmanager
 import os
-import requests
+import re
+import httpx
+import jwt
 from dotenv import load_dotenv
-import traceback
+import logging
 from hiero_sdk_python import (
-    Client,
     AccountId,
     PrivateKey,
     AccountCreateTransaction,
@@ -16,104 +17,236 @@ from hiero_sdk_python import (
     TransferTransaction,
     AccountInfoQuery
 )
-import time
+from hiero_sdk_python.exceptions import PrecheckError
+from hiero_sdk_python.response_code import ResponseCode
+import asyncio
 
-print("\n\n=== STARTING SYNCHRONIZATION SERVICE V2.1 (Hedera + Auth0) ===\n\n")
+from pools import get_http_client, run_hedera
+from app_factory import Service, create_app
+from runtime import runtime
+from auth import TokenVerifier, RemoteJWKS
+from cache import TTLCache
+from admission import admission
+from jobs import JobQueue
+from operators import operators
+from logs import setup_logging
 
 # Load environment variables
 load_dotenv()
+setup_logging("onboarding")
+log = logging.getLogger(__name__)
+log.info("Starting synchronization service v2.1 (Hedera + Auth0)")
 
 # MongoDB Configuration
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "hedera_users_db")
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN", "YOUR_AUTH0_DOMAIN.us.auth0.com") # Placeholder
+AUTH0_AUDIENCE = os.getenv("AUTH0_AUDIENCE") # API identifier; audience is not checked when unset
 
-# Initialize MongoDB
-try:
-    mongo_client = MongoClient(MONGO_URI)
-    db = mongo_client[MONGO_DB_NAME]
+# MongoDB and the Hedera client are bound by the runtime once reachable
+# (see runtime.py); they stay None until then
+mongo_client = None
+users_collection = None
+jobs_collection = None
+
+
+def bind_mongo(mongo):
+    global mongo_client, users_collection, jobs_collection
+    mongo_client = mongo
+    db = mongo[MONGO_DB_NAME]
     users_collection = db["users"]
-    # Index on Auth0 ID (primary key for us)
-    users_collection.create_index("auth0_id", unique=True)
-    # Optional: Index on Hedera Account ID too
-    users_collection.create_index("hedera_account_id", unique=False) # One user might own multiple accounts? Or unique?
-    # Usually unique per platform account.
-    print(f"Connected to MongoDB at {MONGO_URI}, DB: {MONGO_DB_NAME}")
-except Exception as e:
-    print(f"Failed to connect to MongoDB: {e}")
-    mongo_client = None
-    users_collection = None
-
-# Initialize Hedera Client
-try:
-    operator_id_str = os.getenv("OPERATOR_ID")
-    operator_key_str = os.getenv("OPERATOR_KEY")
-
-    if not operator_id_str or not operator_key_str:
-        print("Hedera credentials missing in .env")
-        client = None
-        operator_key = None
-    else:
-        operator_id = AccountId.from_string(operator_id_str)
-        operator_key = PrivateKey.from_string(operator_key_str)
-
-        client = Client.for_testnet()
-        client.set_operator(operator_id, operator_key)
-        print("Hedera Client initialized successfully.")
-except Exception as e:
-    print(f"Failed to initialize Hedera Client: {e}")
-    client = None
-    operator_key = None
-
-app = FastAPI()
-
-# Input: Add CORS Middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    jobs_collection = db["onboarding_jobs"]
+    onboarding_queue.collection = jobs_collection
+    runtime.spawn(ensure_indexes())
+    onboarding_queue.start()
+
+
+async def ensure_indexes():
+    if users_collection is None:
+        return
+    try:
+        # Index on Auth0 ID (primary key for us)
+        await users_collection.create_index("auth0_id", unique=True)
+        # Optional: Index on Hedera Account ID too
+        await users_collection.create_index("hedera_account_id", unique=False) # One user might own multiple accounts? Or unique?
+        # Usually unique per platform account.
+        await onboarding_queue.ensure_indexes()
+        log.info("MongoDB indexes ready, DB: %s", MONGO_DB_NAME)
+    except Exception as e:
+        log.exception("Failed to build MongoDB indexes: %s", e)
+
+# Hedera Client (NETWORK=simulator runs against the in-process ledger)
+client = None
+operator_id = None
+operator_key = None
+
+
+def bind_hedera(hedera):
+    global client, operator_id, operator_key
+    client, operator_id, operator_key = hedera
+    log.info("Hedera Client initialized successfully (%s).", client.network.network)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield       # Mongo/Hedera/HTTP pools are opened and closed by app_factory.create_app
+    await onboarding_queue.stop()
+
+
+# Routes hang off a router so server.py can co-host them with the token API;
+# `app` at the bottom of this file is the standalone service.
+router = APIRouter()
+service = Service("onboarding", router, lifespan)
+
+# Auth0 tokens are verified locally against the cached JWKS.
+# Swap token_verifier for one built on StaticJWKS to run against a local key set.
+token_verifier = TokenVerifier(
+    RemoteJWKS(AUTH0_DOMAIN),
+    issuer=f"https://{AUTH0_DOMAIN}/",
+    audience=AUTH0_AUDIENCE,
 )
+profile_cache = TTLCache(maxsize=1024, ttl=600) # /userinfo profiles by sub
+
+
+async def resolve_profile(token: str, claims: dict) -> dict:
+    """Email/name from the token, falling back to /userinfo only when they are missing."""
+    if claims.get("email") and claims.get("name"):
+        return claims
+    profile = profile_cache.get(claims["sub"])
+    if profile is None:
+        try:
+            userinfo_url = f"https://{AUTH0_DOMAIN}/userinfo"
+            response = await get_http_client().get(userinfo_url, headers={"Authorization": f"Bearer {token}"})
+            profile = response.json() if response.status_code == 200 else {}
+        except httpx.HTTPError as e:
+            log.warning("Auth0 /userinfo lookup failed: %s", e)
+            profile = {}
+        if profile:
+            profile_cache.set(claims["sub"], profile)
+    return {**profile, **{k: v for k, v in claims.items() if v}}
+
+# ── Lazy account creation (background jobs) ──────────────────────────────
+# New wallets are funded by a TransferTransaction to their EVM alias, which
+# lazily creates the account. The 0.0.x id only becomes queryable once that
+# lands, so this runs in a worker instead of holding the /sync-user request.
+
+ONBOARDING_FUNDING_HBAR = 10
+ONBOARDING_POLL_INITIAL = 0.5   # seconds before the first AccountInfoQuery
+ONBOARDING_POLL_MAX     = 8     # cap on the backoff between polls
+ONBOARDING_POLL_TIMEOUT = 60    # give up and fall back to the EVM address
+
+
+async def alias_exists(evm_account_id: AccountId) -> bool:
+    """Whether the alias already resolves to an account, e.g. funded by an earlier attempt."""
+    try:
+        await run_hedera(AccountInfoQuery().set_account_id(evm_account_id).execute, client)
+    except PrecheckError as e:
+        if e.status == ResponseCode.INVALID_ACCOUNT_ID:
+            return False
+        raise
+    return True
+
+
+async def run_onboarding_job(job: dict) -> dict:
+    if client is None:
+        raise RuntimeError("Hedera client not initialized")
+    payload = job["payload"]
+    evm_address_str = payload["evm_address"]
+    evm_account_id = AccountId.from_evm_address(evm_address_str, 0, 0)
+
+    # 1. Fund the alias once; a retried job that already submitted skips this.
+    # A worker that died mid-"submitting" may have sent the transfer without
+    # recording it, so a retry from there checks the ledger first.
+    stage = job.get("stage")
+    if stage == "submitting" and await alias_exists(evm_account_id):
+        log.info("Alias %s already funded by an earlier attempt", evm_address_str)
+    elif stage not in ("submitted", "polling"):
+        await onboarding_queue.update(job["_id"], stage="submitting")
+        async with operators.payer() as payer:
+            transaction = (
+                TransferTransaction()
+                .add_hbar_transfer(payer.account_id, Hbar(-ONBOARDING_FUNDING_HBAR)) # Debit the paying pool account
+                .add_hbar_transfer(evm_account_id, Hbar(ONBOARDING_FUNDING_HBAR)) # Lazy-create via EVM alias
+                .set_transaction_memo(f"Auth0: {payload.get('email')}") # Optional memo
+                .freeze_with(payer.client)
+            )
+            await run_hedera(transaction.execute, payer.client, validate_status=True)
+        await onboarding_queue.update(job["_id"], stage="submitted")
+
+    # 2. Poll for the real 0.0.x id with exponential backoff
+    await onboarding_queue.update(job["_id"], stage="polling")
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + ONBOARDING_POLL_TIMEOUT
+    delay = ONBOARDING_POLL_INITIAL
+    while True:
+        await asyncio.sleep(delay)
+        try:
+            info_query = AccountInfoQuery().set_account_id(evm_account_id)
+            account_info = await run_hedera(info_query.execute, client)
+            final_hedera_id = str(account_info.account_id)
+            log.info("Lazy Created Account ID: %s", final_hedera_id)
+            break
+        except Exception as info_err:
+            if loop.time() + delay > deadline:
+                log.warning("Could not fetch info for new account, using EVM as fallback: %s", info_err)
+                final_hedera_id = evm_address_str
+                break
+            delay = min(delay * 2, ONBOARDING_POLL_MAX)
+
+    await users_collection.update_one(
+        {"auth0_id": payload["auth0_id"]},
+        {"$set": {"hedera_account_id": final_hedera_id}},
+    )
+    return {"hedera_account_id": final_hedera_id}
+
+
+onboarding_queue = JobQueue(None, run_onboarding_job, workers=int(os.getenv("ONBOARDING_WORKERS", "4")))
+runtime.on_ready("mongo", bind_mongo)   # the queue's collection and workers start with Mongo
+runtime.on_ready("hedera", bind_hedera)
+
+
+async def authenticate(authorization: str):
+    """Verify the bearer token and return (token, claims)."""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
+
+    token = authorization.split(" ")[1]
+
+    # Verify Token locally (RS256 against Auth0's cached JWKS)
+    try:
+        claims = await token_verifier.verify(token)
+    except jwt.PyJWTError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid Auth0 Token: {str(e)}")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=503, detail=f"Failed to fetch Auth0 signing keys: {str(e)}")
+    return token, claims
+
+EVM_ADDRESS = re.compile(r"0x[0-9a-fA-F]{40}")
 
 class SyncUserRequest(BaseModel):
     wallet_address: str # EVM address
     hedera_account_id: str = None # Optional now
 
-@app.get("/health")
-def health_check():
+@router.get("/health")
+async def health_check():
     return {
         "status": "ok", 
         "mongo": users_collection is not None,
         "auth0_domain": AUTH0_DOMAIN
     }
 
-@app.post("/sync-user")
-def sync_user(
+@router.post("/sync-user")
+async def sync_user(
     request: SyncUserRequest,
     authorization: str = Header(None)
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
-
-    token = authorization.split(" ")[1]
-
-    # 1. Verify Token with Auth0
-    # We use the /userinfo endpoint to validate the token and get user profile
-    try:
-        userinfo_url = f"https://{AUTH0_DOMAIN}/userinfo"
-        response = requests.get(userinfo_url, headers={"Authorization": f"Bearer {token}"})
-        
-        if response.status_code != 200:
-             raise HTTPException(status_code=401, detail="Invalid Auth0 Token")
-        
-        user_profile = response.json()
-        auth0_id = user_profile.get("sub")
-        email = user_profile.get("email")
-        name = user_profile.get("name")
-        
-    except requests.RequestException as e:
-         raise HTTPException(status_code=503, detail=f"Failed to verify with Auth0: {str(e)}")
+    # 1. Verify Token
+    token, claims = await authenticate(authorization)
+    auth0_id = claims["sub"]
+    await admission.admit("sync-user", auth0_id)     # 429 + Retry-After when over the limit
+    user_profile = await resolve_profile(token, claims)
+    email = user_profile.get("email")
+    name = user_profile.get("name")
 
     if users_collection is None:
         raise HTTPException(status_code=503, detail="Database connection failed")
@@ -121,7 +254,7 @@ def sync_user(
     try:
         # 2. Check/Upsert User in MongoDB
         # We try to find existing user first to avoiding re-creating account if they just logged in from new device
-        existing_user = users_collection.find_one({"auth0_id": auth0_id})
+        existing_user = await users_collection.find_one({"auth0_id": auth0_id})
 
         final_hedera_id = None
         
@@ -136,53 +269,39 @@ def sync_user(
                  final_hedera_id = existing_user["hedera_account_id"]
              else:
                  # CREATE NEW HEDERA ACCOUNT (Aliased to EVM Address)
-                 # This allows the user to control it with their MetaMask private key
-                 print(f"Creating new Hedera account for EVM address: {request.wallet_address}")
-                 try:
-                     # Convert 0x... to evm address string
-                     evm_address_str = request.wallet_address if request.wallet_address.startswith("0x") else f"0x{request.wallet_address}"
-                     evm_bytes = bytes.fromhex(evm_address_str.replace("0x", ""))
-
-                     # Correct signature: from_evm_address(evm_address, shard, realm)
-                     # Shard and realm are both 0 on testnet/mainnet.
-                     evm_account_id_for_transfer = AccountId.from_evm_address(evm_address_str, 0, 0)
-
-                     transaction = (
-                        TransferTransaction()
-                        .add_hbar_transfer(operator_id, Hbar(-10)) # Debit operator
-                        .add_hbar_transfer(evm_account_id_for_transfer, Hbar(10)) # Lazy-create via EVM alias
-                        .set_transaction_memo(f"Auth0: {email}") # Optional memo
-                        .freeze_with(client)
-                     )
-                     transaction.sign(operator_key)
-                     response = transaction.execute(client)
-                     # Wait one beat, then query for the real Hedera Account ID
-                     # (AccountCreateTransaction implicitly creates an account, but we used TransferTransaction)
-                     # (So we query via the EVM Address to get the 0.0.x ID)
-                     try:
-                         # The AccountInfoQuery might need the EVM address as AccountId
-                         # Some SDKs allow AccountId(evm_address=...) or similar
-                         # Let's try passing EvmAddress directly if supported, or wrapped
-                        # AFTER (fixed)
-
-                         time.sleep(5)  # Allow network time to finalize the lazy-create
-                         
-                         evm_account_id = AccountId.from_evm_address(evm_address_str, 0, 0)
-                         info_query = AccountInfoQuery()
-                         info_query.set_account_id(evm_account_id)
-                         
-                         account_info = info_query.execute(client)
-                         final_hedera_id = str(account_info.account_id)
-                         print(f"Lazy Created Account ID: {final_hedera_id}")
-                     except Exception as info_err:
-                         print(f"Could not fetch info for new account, using EVM as fallback: {info_err}")
-                         final_hedera_id = f"0x{evm_bytes.hex()}"
-                     
-                     print(f"Final Hedera ID used: {final_hedera_id}")
-                 except Exception as hedera_err:
-                     print(f"Hedera Creation Failed: {hedera_err}")
-                     # Ensure we don't crash the sync, but we return no ID
-                     raise hedera_err
+                 # This allows the user to control it with their MetaMask private key.
+                 # Queued for a worker; the client polls /sync-user/status/{job_id}.
+                 if jobs_collection is None:
+                     raise RuntimeError("Onboarding queue not available")
+                 # Convert 0x... to evm address string
+                 evm_address_str = request.wallet_address if request.wallet_address.startswith("0x") else f"0x{request.wallet_address}"
+                 if not EVM_ADDRESS.fullmatch(evm_address_str):
+                     raise HTTPException(status_code=400, detail=f"Invalid wallet address: {request.wallet_address!r}")
+                 log.info("Queueing new Hedera account for EVM address: %s", evm_address_str)
+
+                 job = await onboarding_queue.enqueue(
+                     {"auth0_id": auth0_id, "email": email, "evm_address": evm_address_str},
+                     dedupe_key=f"{auth0_id}:{evm_address_str.lower()}",
+                 )
+                 await users_collection.update_one(
+                     {"auth0_id": auth0_id},
+                     {"$set": {
+                         "auth0_id": auth0_id,
+                         "email": email,
+                         "name": name,
+                         "wallet_address": request.wallet_address,
+                         "onboarding_job_id": job["_id"],
+                         "last_login": "NOW"
+                     }},
+                     upsert=True
+                 )
+                 return JSONResponse(status_code=202, content={
+                     "status": "pending",
+                     "message": "Hedera account creation queued",
+                     "auth0_id": auth0_id,
+                     "job_id": job["_id"],
+                     "status_url": f"/sync-user/status/{job['_id']}"
+                 })
 
         update_doc = {
             "$set": {
@@ -195,7 +314,7 @@ def sync_user(
             }
         }
         
-        result = users_collection.update_one(
+        result = await users_collection.update_one(
             {"auth0_id": auth0_id},
             update_doc,
             upsert=True
@@ -208,21 +327,37 @@ def sync_user(
             "hedera_account_id": final_hedera_id
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        # Log full error safely
-        error_msg = f"Error syncing user (Auth0 ID: {auth0_id if 'auth0_id' in locals() else 'Unknown'}): {str(e)}"
-        print(error_msg) # Print to console for immediate visibility
-        
-        try:
-            with open("error.log", "a") as f:
-                f.write(f"{error_msg}\n")
-                traceback.print_exc(file=f)
-                f.write("\n-------------------\n")
-        except:
-            pass # Look, if logging fails, just don't crash the crash handler.
-        
+        # Queued for the log thread; repeated identical tracebacks are rate-limited
+        auth0 = auth0_id if 'auth0_id' in locals() else None
+        log.exception("Error syncing user (Auth0 ID: %s): %s", auth0 or "Unknown", e, extra={"auth0_id": auth0})
+
         raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
 
+@router.get("/sync-user/status/{job_id}")
+async def sync_user_status(job_id: str, authorization: str = Header(None)):
+    _, claims = await authenticate(authorization)
+    if jobs_collection is None:
+        raise HTTPException(status_code=503, detail="Database connection failed")
+
+    job = await onboarding_queue.get(job_id)
+    if job is None or job["payload"]["auth0_id"] != claims["sub"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "attempts": job["attempts"],
+        "hedera_account_id": (job["result"] or {}).get("hedera_account_id"),
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+
+app = create_app(service)
+
 # Start the server
 if __name__ == "__main__":
     import uvicorn
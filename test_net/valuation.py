@@ -0,0 +1,201 @@
+"""
+Portfolio valuation and P&L, computed in bulk with NumPy.
+
+Positions are aggregated per (auth0_id, token_id) in MongoDB, then loaded
+into column arrays (one entry per position) together with a per-token
+price table. Cost basis, market value, unrealized P&L and allocation by
+category for every user come out of a handful of vectorized ops and
+np.bincount reductions, so one user and a platform-wide report share the
+same code path.
+
+Mark price per token: the listing's `price` when set (> 0), else the last
+price paid in portfolio_col, else the position's own average cost (P&L 0).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+# ── Loading ───────────────────────────────────────────────────────────────
+
+POSITIONS_PIPELINE = [
+    {"$group": {
+        "_id":        {"auth0_id": "$auth0_id", "token_id": "$token_id"},
+        "amount":     {"$sum": "$amount"},
+        "total_cost": {"$sum": "$total_cost"},
+    }},
+]
+
+LAST_TRADE_PIPELINE = [
+    {"$match": {"price_per_unit": {"$gt": 0}}},
+    {"$sort": {"created_at": 1}},
+    {"$group": {"_id": "$token_id", "price": {"$last": "$price_per_unit"}}},
+]
+
+
+@dataclass
+class Positions:
+    users: np.ndarray       # unique auth0_ids
+    tokens: np.ndarray      # unique token_ids
+    user_idx: np.ndarray    # per position -> users
+    token_idx: np.ndarray   # per position -> tokens
+    amount: np.ndarray
+    cost: np.ndarray
+
+
+async def load_positions(portfolio_col, auth0_id: str = None) -> Positions:
+    match = [{"$match": {"auth0_id": auth0_id}}] if auth0_id else []
+    rows = await portfolio_col.aggregate(match + POSITIONS_PIPELINE).to_list(length=None)
+    users, user_idx = np.unique(np.array([r["_id"]["auth0_id"] for r in rows], dtype=object).astype(str),
+                                return_inverse=True)
+    tokens, token_idx = np.unique(np.array([r["_id"]["token_id"] for r in rows], dtype=object).astype(str),
+                                  return_inverse=True)
+    return Positions(
+        users=users,
+        tokens=tokens,
+        user_idx=user_idx,
+        token_idx=token_idx,
+        amount=np.fromiter((r["amount"] for r in rows), dtype=np.float64, count=len(rows)),
+        cost=np.fromiter((r["total_cost"] for r in rows), dtype=np.float64, count=len(rows)),
+    )
+
+
+async def load_prices(marketplace_col, portfolio_col, tokens: np.ndarray) -> dict:
+    """Column arrays aligned with `tokens`: price (NaN = unknown), name, symbol, category."""
+    ids = tokens.tolist()
+    listings = {
+        d["token_id"]: d for d in await marketplace_col.find(
+            {"token_id": {"$in": ids}},
+            {"_id": 0, "token_id": 1, "name": 1, "symbol": 1, "category": 1, "price": 1},
+        ).to_list(length=None)
+    }
+    trades = {
+        d["_id"]: d["price"] for d in await portfolio_col.aggregate(
+            [{"$match": {"token_id": {"$in": ids}}}] + LAST_TRADE_PIPELINE
+        ).to_list(length=None)
+    }
+    listed = np.array([float(listings.get(t, {}).get("price") or 0) for t in ids], dtype=np.float64)
+    traded = np.array([float(trades.get(t, np.nan)) for t in ids], dtype=np.float64)
+    return {
+        "price":    np.where(listed > 0, listed, traded),
+        "name":     [listings.get(t, {}).get("name") for t in ids],
+        "symbol":   [listings.get(t, {}).get("symbol") for t in ids],
+        "category": np.array([listings.get(t, {}).get("category") or "Other" for t in ids], dtype=object).astype(str),
+    }
+
+
+# ── Valuation ─────────────────────────────────────────────────────────────
+
+def value(positions: Positions, prices: dict) -> dict:
+    """All per-position and per-user figures, as arrays."""
+    p = positions
+    n_users = len(p.users)
+    avg_cost = np.divide(p.cost, p.amount, out=np.zeros_like(p.cost), where=p.amount != 0)
+    mark = prices["price"][p.token_idx] if len(p.tokens) else np.zeros(0)
+    mark = np.where(np.isnan(mark), avg_cost, mark)
+    market_value = p.amount * mark
+    pnl = market_value - p.cost
+
+    categories, cat_of_token = np.unique(prices["category"], return_inverse=True)
+    cat_idx = cat_of_token[p.token_idx] if len(p.tokens) else np.zeros(0, dtype=np.int64)
+    by_category = np.bincount(
+        p.user_idx * len(categories) + cat_idx, weights=market_value, minlength=n_users * len(categories)
+    ).reshape(n_users, len(categories))
+
+    user_cost = np.bincount(p.user_idx, weights=p.cost, minlength=n_users)
+    user_value = np.bincount(p.user_idx, weights=market_value, minlength=n_users)
+    return {
+        "avg_cost":     avg_cost,
+        "mark":         mark,
+        "market_value": market_value,
+        "pnl":          pnl,
+        "categories":   categories,
+        "by_category":  by_category,
+        "user_cost":    user_cost,
+        "user_value":   user_value,
+        "user_pnl":     user_value - user_cost,
+        "user_count":   np.bincount(p.user_idx, minlength=n_users),
+    }
+
+
+def _pct(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.float64)     # bincount of nothing comes back as int
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0) * 100
+
+
+def _allocation(categories, row, total) -> dict:
+    pct = _pct(row, np.full_like(row, total))
+    return {c: {"market_value": v, "pct": s} for c, v, s in zip(categories.tolist(), row.tolist(), pct.tolist()) if v}
+
+
+# ── Reports ───────────────────────────────────────────────────────────────
+
+def user_report(auth0_id: str, positions: Positions, prices: dict) -> dict:
+    v = value(positions, prices)
+    p = positions
+    pnl_pct = _pct(v["pnl"], p.cost)
+    category = prices["category"].tolist()
+    holdings = [
+        {
+            "token_id":       token,
+            "asset_name":     prices["name"][t],
+            "symbol":         prices["symbol"][t],
+            "category":       category[t],
+            "amount":         amount,
+            "cost_basis":     cost,
+            "avg_cost":       avg,
+            "mark_price":     mark,
+            "market_value":   mv,
+            "unrealized_pnl": pnl,
+            "pnl_pct":        pct,
+        }
+        for token, t, amount, cost, avg, mark, mv, pnl, pct in zip(
+            p.tokens[p.token_idx].tolist(), p.token_idx.tolist(), p.amount.tolist(), p.cost.tolist(),
+            v["avg_cost"].tolist(), v["mark"].tolist(), v["market_value"].tolist(), v["pnl"].tolist(),
+            pnl_pct.tolist(),
+        )
+        if amount
+    ]
+    holdings.sort(key=lambda h: h["market_value"], reverse=True)
+    cost = float(v["user_cost"].sum())
+    market_value = float(v["user_value"].sum())
+    return {
+        "auth0_id":       auth0_id,
+        "cost_basis":     cost,
+        "market_value":   market_value,
+        "unrealized_pnl": market_value - cost,
+        "pnl_pct":        (market_value - cost) / cost * 100 if cost else 0.0,
+        "allocation":     _allocation(v["categories"], v["by_category"].sum(axis=0), market_value),
+        "holdings":       holdings,
+    }
+
+
+def platform_report(positions: Positions, prices: dict, limit: int = None) -> dict:
+    """Per-user totals (largest market value first) plus platform totals."""
+    v = value(positions, prices)
+    order = np.argsort(-v["user_value"], kind="stable")
+    if limit is not None:
+        order = order[:limit]
+    pnl_pct = _pct(v["user_pnl"], v["user_cost"])
+    users = [
+        {
+            "auth0_id":       str(positions.users[i]),
+            "positions":      int(v["user_count"][i]),
+            "cost_basis":     float(v["user_cost"][i]),
+            "market_value":   float(v["user_value"][i]),
+            "unrealized_pnl": float(v["user_pnl"][i]),
+            "pnl_pct":        float(pnl_pct[i]),
+        }
+        for i in order.tolist()
+    ]
+    cost = float(v["user_cost"].sum())
+    market_value = float(v["user_value"].sum())
+    return {
+        "users_total":    len(positions.users),
+        "positions":      len(positions.amount),
+        "cost_basis":     cost,
+        "market_value":   market_value,
+        "unrealized_pnl": market_value - cost,
+        "pnl_pct":        (market_value - cost) / cost * 100 if cost else 0.0,
+        "allocation":     _allocation(v["categories"], v["by_category"].sum(axis=0), market_value),
+        "users":          users,
+    }
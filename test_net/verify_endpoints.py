@@ -12,8 +12,8 @@ def run_verification():
     print("Starting FastAPI server...")
     # Start uvicorn in a separate process
     process = subprocess.Popen(
-        [sys.executable, "-m", "uvicorn", "test_net.testnet_test:app", "--port", "8000"],
-        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), # Run from parent dir of test_net
+        [sys.executable, "-m", "uvicorn", "testnet_test:app", "--port", "8000"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), # Run from test_net so sibling modules import
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE
     )
@@ -33,18 +33,15 @@ def run_verification():
         except Exception as e:
             print(f"Balance check failed: {e}")
 
-        # 2. Test /transactions
+        # 2. Test /transactions (NDJSON, one transaction per line)
         print(f"\n--- Testing GET {base_url}/transactions/{operator_id} ---")
         try:
-            res = requests.get(f"{base_url}/transactions/{operator_id}")
+            res = requests.get(f"{base_url}/transactions/{operator_id}", params={"limit": 25})
             print(f"Status: {res.status_code}")
-            data = res.json()
-            if "transactions" in data:
-                print(f"Found {len(data['transactions'])} transactions.")
-                if len(data['transactions']) > 0:
-                    print(f"First tx: {data['transactions'][0]}")
-            else:
-                print(f"Response: {data}")
+            lines = [l for l in res.text.splitlines() if l.strip()]
+            print(f"Found {len(lines)} transactions.")
+            if lines:
+                print(f"First tx: {lines[0]}")
         except Exception as e:
             print(f"Transactions check failed: {e}")
 